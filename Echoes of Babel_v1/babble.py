@@ -0,0 +1,203 @@
+# babble.py
+# Voz procedural: cada línea de diálogo se convierte en sílabas (ráfaga de ruido para las
+# consonantes + vocal con formantes) al ritmo del texto. El audio se genera por bloques pequeños
+# que se van encolando en el canal (Channel.queue): suena al instante y nunca se reserva un
+# buffer de varios segundos.
+import array
+import math
+import random
+import re
+import unicodedata
+import zlib
+import pygame
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SAMPLE_RATE = 44100
+CHUNK_FRAMES = 4096   # ~93 ms por bloque; hay uno sonando y otro en cola
+
+# Formantes (F1, F2) en Hz de cada vocal
+VOWELS = {"a": (800, 1200), "e": (450, 1900), "i": (300, 2300), "o": (500, 900), "u": (350, 800)}
+HISS = set("sczfjx")   # Consonantes con siseo largo
+PAUSES = {".": 0.28, "!": 0.28, "?": 0.28, "…": 0.4, ",": 0.14, ";": 0.14, ":": 0.14}
+
+# pitch: f0 (Hz); harmonics: armónicos sumados; breath: ruido mezclado en la vocal;
+# crush: niveles de cuantización (0 = sin efecto); volume: ganancia final
+VOICES = {
+    "elena": {"pitch": 210, "harmonics": 16, "breath": 0.06, "crush": 0, "volume": 0.45},
+    "aris": {"pitch": 112, "harmonics": 22, "breath": 0.04, "crush": 0, "volume": 0.5},
+    "sistema": {"pitch": 85, "harmonics": 24, "breath": 0.0, "crush": 6, "volume": 0.4},
+    "sombra": {"pitch": 58, "harmonics": 20, "breath": 0.55, "crush": 0, "volume": 0.6},
+}
+
+
+def _plain(text):
+    # Minúsculas sin tildes: "¡Atención!" -> "¡atencion!"
+    return "".join(c for c in unicodedata.normalize("NFD", text.lower()) if unicodedata.category(c) != "Mn")
+
+
+def plan(text, rng, rate=SAMPLE_RATE):
+    """Segmentos [(tipo, muestras, parámetro)] de la línea: "vowel" (vocal, tono relativo),
+    "noise" (siseo: True/False) o "silence"."""
+    segments = []
+    tokens = re.findall(r"[a-z]+|[.,;:!?…]", _plain(text))
+    for n, token in enumerate(tokens):
+        if token in PAUSES:
+            segments.append(("silence", int(PAUSES[token] * rate), None))
+            continue
+        # Sílabas: consonantes + grupo de vocales; las consonantes finales quedan como ráfaga suelta
+        syllables = re.findall(r"[^aeiou]*[aeiou]+|[^aeiou]+$", token)
+        ending = tokens[n + 1] if n + 1 < len(tokens) else ""
+        for i, syllable in enumerate(syllables):
+            onset = re.match(r"[^aeiou]*", syllable).group()
+            vowel = next((c for c in syllable if c in VOWELS), None)
+            if onset:
+                hiss = onset[-1] in HISS
+                segments.append(("noise", int((0.06 if hiss else 0.025) * rate), hiss))
+            if vowel is None:
+                continue
+            tone = rng.uniform(0.92, 1.08)
+            if i == len(syllables) - 1 and ending == "?":
+                tone *= 1.25   # Pregunta: la última sílaba sube
+            segments.append(("vowel", int(rng.uniform(0.09, 0.14) * rate), (vowel, tone)))
+        segments.append(("silence", int(0.04 * rate), None))
+    return segments
+
+
+class Babble:
+    """Generador por bloques de la voz de `speaker` diciendo `text` (máximo `max_seconds`)."""
+    def __init__(self, text, speaker, rate=SAMPLE_RATE, max_seconds=None):
+        self.voice = VOICES.get(speaker, VOICES["aris"])
+        self.rate = rate
+        # Misma línea, misma voz: el azar sale del propio texto
+        seed = zlib.crc32(f"{speaker}:{text}".encode("utf-8"))
+        self.rng = random.Random(seed)
+        self.noise_rng = np.random.default_rng(seed) if NUMPY_AVAILABLE else self.rng
+        self.segments = plan(text, self.rng, rate)
+        if max_seconds is not None:
+            self._truncate(int(max_seconds * rate))
+        self.total = sum(length for _, length, _ in self.segments)
+        self.seg_index = 0
+        self.seg_pos = 0
+        self.pos = 0   # Muestra global (fase continua de los armónicos)
+
+    def _truncate(self, limit):
+        kept, used = [], 0
+        for kind, length, param in self.segments:
+            if used + length > limit:
+                if limit - used > 0:
+                    kept.append((kind, limit - used, param))
+                break
+            kept.append((kind, length, param))
+            used += length
+        self.segments = kept
+
+    @property
+    def seconds(self):
+        return self.total / self.rate
+
+    def done(self):
+        return self.seg_index >= len(self.segments)
+
+    def next_chunk(self, frames=CHUNK_FRAMES):
+        """Siguientes `frames` muestras (floats -1..1) o None si la línea terminó."""
+        if self.done():
+            return None
+        parts = []
+        needed = frames
+        while needed > 0 and not self.done():
+            kind, length, param = self.segments[self.seg_index]
+            count = min(needed, length - self.seg_pos)
+            parts.append(self._render(kind, length, param, self.seg_pos, count))
+            self.seg_pos += count
+            self.pos += count
+            needed -= count
+            if self.seg_pos >= length:
+                self.seg_index += 1
+                self.seg_pos = 0
+        if NUMPY_AVAILABLE:
+            return np.concatenate(parts)
+        return [v for part in parts for v in part]
+
+    def _envelope(self, length, start, count):
+        # Subida de 10 ms y caída de 30 ms dentro del segmento
+        attack = max(1, int(0.01 * self.rate))
+        release = max(1, int(0.03 * self.rate))
+        if NUMPY_AVAILABLE:
+            p = np.arange(start, start + count)
+            return np.minimum(np.minimum(p / attack, (length - p) / release), 1.0)
+        return [min(p / attack, (length - p) / release, 1.0) for p in range(start, start + count)]
+
+    def _harmonic_weights(self, vowel, f0):
+        # Resonancia de cada formante sobre cada armónico, con caída espectral 1/k
+        f1, f2 = VOWELS[vowel]
+        weights = []
+        for k in range(1, self.voice["harmonics"] + 1):
+            f = k * f0
+            if f >= self.rate / 2:
+                break
+            res = 1.0 / (1 + ((f - f1) / 90.0) ** 2) + 0.7 / (1 + ((f - f2) / 120.0) ** 2)
+            weights.append((k, (res + 0.05) / k))
+        total = sum(w for _, w in weights) or 1.0
+        return [(k, w / total) for k, w in weights]
+
+    def _render(self, kind, length, param, start, count):
+        v = self.voice
+        if kind == "silence":
+            return np.zeros(count) if NUMPY_AVAILABLE else [0.0] * count
+        env = self._envelope(length, start, count)
+        if kind == "noise":
+            amp = 0.35 if param else 0.5
+            if NUMPY_AVAILABLE:
+                noise = self.noise_rng.uniform(-1, 1, count + 1)
+                if param:
+                    noise = np.diff(noise) * 0.5   # Siseo: realza los agudos
+                else:
+                    noise = noise[1:]
+                return noise * env * amp
+            out, prev = [], self.rng.uniform(-1, 1)
+            for e in env:
+                cur = self.rng.uniform(-1, 1)
+                out.append(((cur - prev) * 0.5 if param else cur) * e * amp)
+                prev = cur
+            return out
+        vowel, tone = param
+        f0 = v["pitch"] * tone
+        weights = self._harmonic_weights(vowel, f0)
+        w = 2 * math.pi * f0 / self.rate
+        if NUMPY_AVAILABLE:
+            n = np.arange(self.pos, self.pos + count)
+            ks = np.array([k for k, _ in weights], dtype=np.float64)
+            amps = np.array([a for _, a in weights])
+            signal = np.sin(np.outer(n * w, ks)) @ amps
+            if v["breath"]:
+                signal += self.noise_rng.uniform(-1, 1, count) * v["breath"] * 0.3
+            if v["crush"]:
+                signal = np.round(signal * v["crush"]) / v["crush"]
+            return signal * env
+        weights = weights[:6]  # Sin NumPy: menos armónicos para mantener el coste
+        out = []
+        for i, e in enumerate(env):
+            phase = (self.pos + i) * w
+            s = sum(a * math.sin(k * phase) for k, a in weights)
+            if v["breath"]:
+                s += self.rng.uniform(-1, 1) * v["breath"] * 0.3
+            if v["crush"]:
+                s = round(s * v["crush"]) / v["crush"]
+            out.append(s * e)
+        return out
+
+
+def to_sound(samples, volume, channels):
+    """Bloque de floats -> pygame Sound con el formato del mezclador."""
+    if NUMPY_AVAILABLE:
+        pcm = (np.clip(np.asarray(samples) * volume, -1, 1) * 32767).astype(np.int16)
+        if channels > 1:
+            pcm = np.repeat(pcm, channels)
+        return pygame.mixer.Sound(buffer=pcm.tobytes())
+    pcm = array.array('h', (int(max(-1.0, min(1.0, s * volume)) * 32767) for s in samples for _ in range(channels)))
+    return pygame.mixer.Sound(buffer=pcm)
@@ -0,0 +1,328 @@
+# benchmark.py
+# Banco de pruebas de rendimiento sin pantalla ni micrófono.
+# Uso: python benchmark.py [--frames N] [--output resultado.json] [--only demo] [--replay partida.ebr]
+import os
+
+# Los drivers "dummy" deben fijarse ANTES de importar pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import contextlib
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import pygame
+import config
+import database
+import scenes
+import level_zero
+import demo_level
+import replay
+import voice
+import postfx
+from scene_loader import SceneLoader
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ScriptedRecognizer:
+    """Sustituye al reconocedor Vosk: inyecta comandos en frames concretos."""
+    def __init__(self, script):
+        # script: {frame: [comando, ...]}
+        self.script = script
+
+    def feed(self, scene, frame):
+        cmds = self.script.get(frame)
+        if cmds and hasattr(scene, "command_queue"):
+            for cmd in cmds:
+                scene.command_queue.put(cmd)
+
+
+def storm(commands, every, frames, start=0):
+    """Genera un guion que repite la lista de comandos cada `every` frames."""
+    script = {}
+    for i, f in enumerate(range(start, frames, every)):
+        script.setdefault(f, []).append(commands[i % len(commands)])
+    return script
+
+
+# --- PREPARACIÓN DE CADA ESCENARIO ---
+def _menu_state(state):
+    def setup(scene):
+        scene.menu_state = state
+    return setup
+
+
+def _level_zero_phase(phase):
+    def setup(scene):
+        scene.phase = phase
+        if phase == "THE_EVENT":
+            scene.shake_screen = 5
+            scene.glitch_intensity = 0.2
+    return setup
+
+
+def _demo_sombra(scene):
+    scene.player.set_character("sombra")
+
+
+def _demo_caza(scene):
+    # 400 fantasmas en anillo alrededor del jugador, que grita todo el rato
+    scene.player.set_character("sombra")
+    px, py = scene.player.x, scene.player.y
+    for i in range(400):
+        angle = i * 2.399963
+        dist = 300 + (i % 10) * 50
+        gx, gy = px + math.cos(angle) * dist, py + math.sin(angle) * dist
+        # Con el chunk real: se descargan y se guardan como los del nivel
+        scene.ghosts.add(gx, gy, chunk=scene.ghosts.chunk_of(gx, gy))
+    scene.db_level = 0
+
+
+def build_scenarios(frames):
+    """Lista de escenarios: (nombre, clase de escena, preparación, guion de voz)."""
+    scenarios = [("boot", scenes.BootSequence, None, {})]
+    for state in ["title", "options", "slot_selection_new", "settings_main",
+                  "settings_audio", "settings_audio_test", "settings_graphics", "loading"]:
+        scenarios.append((f"menu:{state}", scenes.MenuScene, _menu_state(state), {}))
+    for phase in ["CALIBRATION", "ARGUMENT", "THE_EVENT"]:
+        script = storm(["detener", "abortar"], 20, frames) if phase == "THE_EVENT" else {}
+        scenarios.append((f"level_zero:{phase}", level_zero.LevelZeroScene, _level_zero_phase(phase), script))
+    scenarios += [
+        ("demo:idle", demo_level.DemoScene, None, {}),
+        ("demo:fuego", demo_level.DemoScene, None, storm(["fuego"], 15, frames)),
+        ("demo:eco", demo_level.DemoScene, None, storm(["eco"], 10, frames)),
+        ("demo:luz", demo_level.DemoScene, None, storm(["luz"], 30, frames)),
+        ("demo:camino_de_fuego", demo_level.DemoScene, None,
+         storm(["derecha", "camino de fuego", "abajo", "camino de fuego"], 8, frames)),
+        ("demo:mixto", demo_level.DemoScene, None,
+         storm(["fuego", "eco", "luz", "camino de fuego", "correr", "izquierda"], 6, frames)),
+        ("demo:sombra", demo_level.DemoScene, _demo_sombra,
+         storm(["derecha", "arriba", "izquierda", "abajo"], 45, frames)),
+        ("demo:caza", demo_level.DemoScene, _demo_caza,
+         storm(["correr", "derecha", "arriba", "izquierda", "abajo"], 40, frames)),
+    ]
+    return scenarios
+
+
+# --- MEDICIÓN ---
+def percentiles(values, points=(50, 90, 95, 99)):
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    out = {}
+    for p in points:
+        idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        out[f"p{p}"] = round(ordered[idx], 3)
+    out["mean"] = round(sum(ordered) / len(ordered), 3)
+    out["max"] = round(ordered[-1], 3)
+    return out
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS devuelve bytes, Linux kilobytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_scenario(screen, scene_cls, setup, script, frames, warmup, seed, trace_allocs):
+    random.seed(seed)
+    replay.seed_scenes(seed)
+    scenes.CURRENT_SESSION["slot"] = 1
+    scenes.CURRENT_SESSION["should_load"] = False
+
+    t0 = time.perf_counter()
+    scene = scene_cls(screen)
+    scene.enter()
+    setup_ms = (time.perf_counter() - t0) * 1000
+    if setup:
+        setup(scene)
+    recognizer = ScriptedRecognizer(script)
+
+    frame_ms = []
+    alloc_kb = []
+    blocks = []
+    if trace_allocs:
+        tracemalloc.start()
+
+    for frame in range(warmup + frames):
+        recognizer.feed(scene, frame)
+        events = pygame.event.get()
+        if trace_allocs:
+            tracemalloc.reset_peak()
+            base_mem = tracemalloc.get_traced_memory()[0]
+        base_blocks = sys.getallocatedblocks()
+        t0 = time.perf_counter()
+
+        scene.process_events(events)
+        scene.update()
+        scene.draw()
+        postfx.apply(pygame.display.get_surface(), scene.post_fx, scene.fx_rng)
+        pygame.display.flip()
+
+        elapsed = (time.perf_counter() - t0) * 1000
+        if frame < warmup:
+            continue
+        frame_ms.append(elapsed)
+        blocks.append(sys.getallocatedblocks() - base_blocks)
+        if trace_allocs:
+            alloc_kb.append((tracemalloc.get_traced_memory()[1] - base_mem) / 1024.0)
+
+    if trace_allocs:
+        tracemalloc.stop()
+    # Detener hilos de escucha y diálogos diferidos para que no contaminen el siguiente escenario
+    if hasattr(scene, "audio_running"):
+        scene.audio_running = False
+    for t in threading.enumerate():
+        if isinstance(t, threading.Timer):
+            t.cancel()
+
+    result = {
+        "setup_ms": round(setup_ms, 3),
+        "frames": frames,
+        "frame_ms": percentiles(frame_ms),
+        "fps_mean": round(1000.0 / (sum(frame_ms) / len(frame_ms)), 1) if frame_ms else None,
+        "retained_blocks_per_frame": percentiles(blocks),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+    if trace_allocs:
+        result["alloc_kb_per_frame"] = percentiles(alloc_kb)
+    return result
+
+
+def run_replay(path):
+    """Reproduce una grabación de juego completo (como main.py, un paso por frame) midiendo cada frame."""
+    replay.active = replay.InputReplayer(path)
+    replay.seed_scenes(replay.active.seed)
+    scenes.CURRENT_SESSION.update(slot=1, should_load=False, autosave=False)
+    loader = SceneLoader()
+    state = config.STATE_BOOT
+    scene = loader.take(state)
+    frame_ms = []
+    per_scene = {}
+    while not replay.active.finished():
+        events = pygame.event.get()
+        t0 = time.perf_counter()
+        if scene.next_state is None:
+            scene.process_events(replay.active.events(events))
+            scene.update()
+            replay.active.step()
+        else:
+            if scene.next_state == config.STATE_QUIT:
+                break
+            state = scene.next_state
+            scene = loader.take(state)  # Construcción síncrona: cuenta como hitch del frame
+        scene.draw()
+        postfx.apply(pygame.display.get_surface(), scene.post_fx, scene.fx_rng)
+        pygame.display.flip()
+        elapsed = (time.perf_counter() - t0) * 1000
+        frame_ms.append(elapsed)
+        per_scene.setdefault(state, []).append(elapsed)
+    steps = replay.active.frame
+    replay.active = None
+    return {
+        "steps": steps,
+        "frame_ms": percentiles(frame_ms),
+        "scenes": {name: percentiles(values) for name, values in per_scene.items()},
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless de escenas de Echoes of Babel")
+    parser.add_argument("--frames", type=int, default=300, help="frames medidos por escenario")
+    parser.add_argument("--warmup", type=int, default=30, help="frames descartados al inicio")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", default="", help="filtra escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--width", type=int, default=config.SCREEN_WIDTH)
+    parser.add_argument("--height", type=int, default=config.SCREEN_HEIGHT)
+    parser.add_argument("--no-allocs", action="store_true", help="omite la pasada de asignaciones con tracemalloc")
+    parser.add_argument("--output", default="", help="archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--replay", default="", help="mide una grabación de main.py --record en vez de los escenarios")
+    args = parser.parse_args()
+
+    # Los print() del juego van a stderr para que stdout sea JSON puro
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_all(args)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def run_all(args):
+    # Base de datos temporal para no tocar las partidas del jugador
+    tmp_dir = tempfile.mkdtemp(prefix="echoes_bench_")
+    database.DB_NAME = os.path.join(tmp_dir, "bench_save.db")
+    database.init_db()
+
+    # Reconocedor simulado: ninguna escena abre el micrófono ni carga Vosk
+    voice.AUDIO_AVAILABLE = False  # scenes lo consulta en voice al activar cada escena
+    level_zero.AUDIO_AVAILABLE = False
+    demo_level.AUDIO_AVAILABLE = False
+
+    config.SCREEN_WIDTH, config.SCREEN_HEIGHT = args.width, args.height
+    pygame.mixer.pre_init(44100, -16, 2, 2048)
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(f"[BENCH] Mixer no disponible: {e}", file=sys.stderr)
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "resolution": [config.SCREEN_WIDTH, config.SCREEN_HEIGHT],
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "video_driver": pygame.display.get_driver(),
+        },
+        "scenes": {},
+    }
+
+    if args.replay:
+        report["replay"] = run_replay(args.replay)
+        pygame.quit()
+        return report
+
+    for name, scene_cls, setup, script in build_scenarios(args.warmup + args.frames):
+        if args.only and args.only not in name:
+            continue
+        gc.collect()
+        print(f"[BENCH] {name}...", file=sys.stderr)
+        result = run_scenario(screen, scene_cls, setup, script, args.frames, args.warmup, args.seed, False)
+        if not args.no_allocs:
+            # Segunda pasada con tracemalloc para no contaminar los tiempos
+            traced = run_scenario(screen, scene_cls, setup, script, args.frames, args.warmup, args.seed, True)
+            result["alloc_kb_per_frame"] = traced["alloc_kb_per_frame"]
+        report["scenes"][name] = result
+
+    report["peak_rss_kb"] = peak_rss_kb()
+    pygame.quit()
+    return report
+
+
+if __name__ == "__main__":
+    main()
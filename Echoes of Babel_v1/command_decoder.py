@@ -0,0 +1,136 @@
+# command_decoder.py
+# Confirmación temprana de comandos sobre el reconocimiento en streaming de Vosk. En vez de
+# actuar con el primer parcial que contiene una palabra clave (y reiniciar el reconocedor),
+# se sigue cuánto tiempo lleva igual cada palabra de los parciales: un comando se confirma
+# cuando su palabra lleva estable VOICE_STABLE_SECONDS, cuando el parcial no cambia durante
+# el silencio final de la regla de endpoint de model.conf, o cuando llega el resultado final
+# (SetWords(True)), en cuyo caso las palabras con poca confianza se descartan.
+import json
+import math
+import os
+
+import config
+
+DEFAULT_TRAILING_SILENCE = 0.5   # endpoint.rule2.min-trailing-silence de Kaldi
+
+
+def _segments(tokens, phrases):
+    """Recorre `tokens` de izquierda a derecha: (posición, frase encontrada o None si la palabra
+    no empieza ninguna). La frase más larga gana y no se solapan."""
+    candidates = sorted((p.split() for p in phrases), key=len, reverse=True)
+    i = 0
+    while i < len(tokens):
+        for words in candidates:
+            if tokens[i:i + len(words)] == words:
+                yield i, " ".join(words)
+                i += len(words)
+                break
+        else:
+            yield i, None
+            i += 1
+
+
+def find_phrases(text, phrases):
+    """Frases de `phrases` dichas en `text`, por palabras completas y en el orden dicho:
+    "camino de fuego" no da también "fuego", y "a" no aparece dentro de "nueva"."""
+    return [phrase for _, phrase in _segments(text.split(), phrases) if phrase]
+
+
+def command_predicate(keywords):
+    """Predicado puro del StreamingDecoder (keywords=None: cualquier texto es comando).
+
+    is_command(texto, final): el texto contiene alguna frase clave completa. Si no es final
+    (confirmación por estabilidad), tampoco vale mientras sus últimas palabras sean el comienzo
+    de una frase más larga: "volumen" espera a "volumen diez" y "subir" a "subir volumen".
+    No llama al matcher de la escena, que puede tener efectos.
+    """
+    if keywords is None:
+        return lambda text, final=True: bool(text)
+    keywords = tuple(keywords)
+    prefixes = {tuple(w[:k]) for w in (p.split() for p in keywords) for k in range(1, len(w))}
+
+    def is_command(text, final=True):
+        tokens = text.split()
+        segments = list(_segments(tokens, keywords))
+        # Solo cuentan las colas que empiezan donde empieza una frase o una palabra suelta
+        if not final and any(tuple(tokens[i:]) in prefixes for i, _ in segments):
+            return False
+        return any(phrase for _, phrase in segments)
+    return is_command
+
+
+class StreamingDecoder:
+    """Envuelve un KaldiRecognizer; accept(bloque) -> textos confirmados que contienen comandos.
+
+    is_command(texto) dice si un texto ya forma un comando: las palabras confirmadas que aún
+    no lo forman (p. ej. "cambiar" de "cambiar a sombra") esperan a las siguientes. Debe ser
+    un predicado puro (command_predicate): se llama con cada parcial.
+    """
+    def __init__(self, rec, is_command, chunk_seconds, model_path=None,
+                 stable_seconds=None, min_conf=None):
+        self.rec = rec
+        self.rec.SetWords(True)
+        self.is_command = is_command
+        stable_seconds = config.VOICE_STABLE_SECONDS if stable_seconds is None else stable_seconds
+        self.min_conf = config.VOICE_MIN_CONF if min_conf is None else min_conf
+        # Al menos dos parciales seguidos iguales, sea cual sea el tamaño del bloque
+        self.stable_chunks = max(2, math.ceil(stable_seconds / chunk_seconds))
+        from keyword_spotter import read_conf  # Solo el decodificador lee model.conf; el menú usa find_phrases
+        opts = read_conf(os.path.join(model_path or config.VOICE_MODEL_PATH, "conf", "model.conf"))
+        silence = float(opts.get("endpoint_rule2_min_trailing_silence", DEFAULT_TRAILING_SILENCE))
+        self.endpoint_chunks = max(self.stable_chunks, math.ceil(silence / chunk_seconds))
+        self._reset()
+
+    def _reset(self):
+        self.tokens = []      # Último parcial
+        self.stable = []      # Parciales seguidos en que cada posición no ha cambiado
+        self.unchanged = 0    # Parciales seguidos idénticos (silencio final)
+        self.consumed = 0     # Palabras del parcial ya convertidas en comandos
+        self.committed = []   # Esas palabras, para reconocerlas en el resultado final
+
+    def accept(self, data):
+        """Decodifica un bloque PCM16 y devuelve los textos que se confirmaron con él."""
+        if self.rec.AcceptWaveform(data):
+            # Vosk aplicó las reglas de endpoint: enunciado terminado
+            return self._final(json.loads(self.rec.Result()))
+        return self._partial(json.loads(self.rec.PartialResult()).get("partial", "").split())
+
+    def _partial(self, tokens):
+        k = 0
+        while k < min(len(tokens), len(self.tokens)) and tokens[k] == self.tokens[k]:
+            k += 1
+        self.unchanged = self.unchanged + 1 if tokens == self.tokens else 0
+        self.stable = [s + 1 for s in self.stable[:k]] + [1] * (len(tokens) - k)
+        self.tokens = tokens
+        self.consumed = min(self.consumed, len(tokens))
+        endpoint = bool(tokens) and self.unchanged + 1 >= self.endpoint_chunks
+        if endpoint:
+            ready = len(tokens)
+        else:
+            ready = 0
+            while ready < len(tokens) and self.stable[ready] >= self.stable_chunks:
+                ready += 1
+        return self._commit(tokens[self.consumed:ready], ready, endpoint)
+
+    def _final(self, result):
+        words = result.get("result", [])
+        # El final puede segmentar distinto que los parciales: las palabras que ya dieron comando
+        # se buscan por su texto, en orden, y se descarta todo hasta la última encontrada
+        start = 0
+        for token in self.committed:
+            for i in range(start, len(words)):
+                if words[i]["word"] == token:
+                    start = i + 1
+                    break
+        confident = [w["word"] for w in words[start:] if w.get("conf", 1.0) >= self.min_conf]
+        out = self._commit(confident, len(self.tokens), True)
+        self._reset()
+        return out
+
+    def _commit(self, tokens, ready, final):
+        text = " ".join(t for t in tokens if t != "[unk]")
+        if not text or not self.is_command(text, final):
+            return []
+        self.consumed = ready
+        self.committed = self.tokens[:ready]
+        return [text]
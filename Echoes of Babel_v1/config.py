@@ -2,12 +2,27 @@
 # Configuraciones de Pantalla (Full HD por defecto para inmersión)
 SCREEN_WIDTH = 1920
 SCREEN_HEIGHT = 1080
-FPS = 60
+FPS = 60                 # Límite de FPS de render
+SIM_FPS = 60             # Paso fijo de la simulación (los timers en frames asumen 60)
+MIN_RENDER_FPS = 30      # El render puede bajar hasta aquí si la máquina va cargada
+MAX_FRAME_TIME = 0.25    # Tope de tiempo real acumulado por frame (s)
+MAX_SIM_STEPS = 5        # Máximo de updates por frame antes de descartar el atraso
+VOICE_MODEL_PATH = "model"
+MUSIC_DIR = "music"      # Capas de música (drone.ogg, pulse.ogg...); las que falten se sintetizan
+VOICE_PROCESS = False    # True: Vosk decodifica en un proceso aparte (el audio va por memoria compartida)
+VOICE_STABLE_SECONDS = 0.2  # Tiempo que una palabra debe seguir igual en los parciales para dar comando
+VOICE_MIN_CONF = 0.6     # Confianza mínima de una palabra del resultado final de Vosk
+KWS_TEMPLATE_DIR = "voice_templates"  # Plantillas grabadas del detector ligero de palabras
+KWS_MAX_WORDS = 3        # Gramáticas de hasta tantas palabras usan el detector ligero (si hay plantillas)
 TITLE = "Echoes of Babel: La Sintaxis de Dios"
 
 # Configuraciones del MUNDO
 WORLD_WIDTH = 3000
 WORLD_HEIGHT = 3000
+LEVEL_FILE = "maps/nivel1.lvl" # Si no existe se genera el nivel de demo en memoria
+AUTOSAVE_FRAMES = 60 * 30       # Autoguardado del nivel cada 30 s de simulación
+DEMO_PROGRESS = 15              # Progreso (%) que muestra la ranura con el prólogo superado
+SAVE_SLOTS = 3                  # Ranuras de guardado (el menú las muestra de 3 en 3)
 
 # Definición de Colores (RGB)
 BLACK = (5, 5, 5)        # Oscuridad casi total
@@ -15,6 +30,7 @@ WHITE = (240, 240, 240)
 RED_BLOOD = (180, 0, 0)  # Color sangre
 DARK_GRAY = (20, 20, 20)
 WALL_COLOR = (40, 40, 50) 
+FLOOR_COLOR = (15, 15, 22)
 LIGHT_BLUE = (100, 200, 255)
 YELLOW_ICON = (255, 200, 50) 
 GLITCH_COLOR = (0, 255, 255) 
@@ -37,6 +53,17 @@ SPEED_SLOW = 2
 SPEED_WALK = 5   
 SPEED_RUN = 9    
 TRANSITION_SPEED = 8 
+ECHO_SPEED = 10  # Píxeles por paso que avanza la onda de eco (también fija el retardo del retorno)
+SPEED_HUNT = 3   # Fantasmas hostiles persiguiendo al jugador
+
+# Canales del mezclador: los primeros VOICE_CHANNELS son de las voces y los siguientes de la música
+MIXER_CHANNELS = 16
+VOICE_CHANNELS = 3
+RESERVED_CHANNELS = 8
+
+# Fantasmas hostiles: hablar por encima de LOUD_DB los alerta dentro de HEAR_RADIUS (a 0 dB)
+LOUD_DB = -20
+HEAR_RADIUS = 900
 
 # Estados del Juego
 STATE_BOOT = "boot"       # Secuencia de carga
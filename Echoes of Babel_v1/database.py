@@ -1,94 +1,501 @@
 import sqlite3
 import os
 import time
+import struct
+import threading
+import zlib
+import config
 
 # Nombre del archivo de base de datos (binario, no editable fácilmente)
 DB_NAME = "echoes_save.db"
 
+# --- ESQUEMA VERSIONADO ---
+# v1: save_slots.player_data = "x,y,char_type" (formato original)
+# v2: el estado va en save_sections, una fila binaria por sección; solo se reescriben las que cambian
+# v3: save_slots es la tabla resumen del menú (añade la escena donde continuar)
+SCHEMA_VERSION = 3
+# Formato de cada sección (primer byte): v2 binario; v3 la memoria guarda nivel y paso de cada
+# celda en vez de la intensidad ya olvidada, así no cambia entera en cada autoguardado;
+# v4 los fantasmas guardan también los chunks cargados, que no vuelven a sacar los del nivel
+SAVE_VERSION = 4
+SECTIONS_VERSION = 2  # Primera versión de save_slots.version con el estado en save_sections
+
+SECTION_PROLOGUE = 1   # escena donde continuar + fase del prólogo
+SECTION_PLAYER = 2     # posición, mirada, modo de velocidad, personaje
+SECTION_SCENE = 3      # visión, luz, castigo
+SECTION_PARTICLES = 4  # partículas vivas
+SECTION_GHOSTS = 5     # chunks cargados y sus fantasmas (timer y frase en curso)
+SECTION_MEMORY = 6     # mapa de memoria del eco (nivel y paso de cada celda)
+
+SECTION_NAMES = {
+    "prologue": SECTION_PROLOGUE, "player": SECTION_PLAYER, "scene": SECTION_SCENE,
+    "particles": SECTION_PARTICLES, "ghosts": SECTION_GHOSTS, "memory": SECTION_MEMORY,
+}
+
+FLAG_ZLIB = 1
+ZLIB_MIN_SIZE = 256  # Por debajo de esto comprimir no compensa
+
+SCENE_CODES = {"level_zero": 0, "demo": 1}
+SCENE_NAMES = {v: k for k, v in SCENE_CODES.items()}
+
+_PLAYER = struct.Struct("<ffbb?")        # x, y, facing_x, facing_y, agachado (+ 2 cadenas)
+_SCENE = struct.Struct("<fiii")          # vision_radius, light_timer, punishment_mode, repetition_count
+_PARTICLE = struct.Struct("<fffffihBBB") # x, y, vx, vy, size, life, kind, r, g, b
+_GHOST = struct.Struct("<Iffih")         # chunk, x, y, timer, lore (+ frase)
+_MEMORY = struct.Struct("<HHHi")         # tamaño de celda, columnas, filas, paso (+ niveles u8 y pasos i32)
+_MEMORY_V2 = struct.Struct("<HHH")       # v2: sin paso, solo un byte de intensidad por celda
+_COUNT = struct.Struct("<I")
+_STR_LEN = struct.Struct("<H")
+
+# Sentencias fijas: sqlite3 reutiliza la sentencia preparada mientras el texto sea idéntico
+SQL_UPSERT = 'INSERT OR REPLACE INTO save_slots (slot_id, progress, timestamp, player_data, version, scene) VALUES (?, ?, ?, ?, ?, ?)'
+SQL_LOAD = 'SELECT progress, player_data, version FROM save_slots WHERE slot_id = ?'
+SQL_SLOTS_PAGE = 'SELECT slot_id, progress, timestamp, scene FROM save_slots ORDER BY slot_id LIMIT ? OFFSET ?'
+SQL_SCENE = 'UPDATE save_slots SET scene = ? WHERE slot_id = ?'
+SQL_SECTIONS = 'SELECT section, data FROM save_sections WHERE slot_id = ?'
+SQL_SECTION_UPSERT = 'INSERT OR REPLACE INTO save_sections (slot_id, section, data) VALUES (?, ?, ?)'
+SQL_SECTION_DELETE = 'DELETE FROM save_sections WHERE slot_id = ? AND section = ?'
+
+# Una sola conexión para todo el juego (lecturas del hilo principal y escrituras del escritor)
+_conn = None
+_conn_name = None
+_conn_lock = threading.RLock()
+# Último contenido escrito de cada sección por ranura: base de los guardados incrementales
+_written = {}
+
+def get_connection():
+    """Conexión persistente en modo WAL; se reabre si DB_NAME cambia."""
+    global _conn, _conn_name
+    with _conn_lock:
+        if _conn is None or _conn_name != DB_NAME:
+            if _conn is not None:
+                _conn.close()
+            _conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+            # WAL: el commit no bloquea a los lectores y basta un fsync por checkpoint
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _conn_name = DB_NAME
+            _written.clear()
+            slot_index.invalidate()
+        return _conn
+
+def close():
+    """Vacía las escrituras pendientes y cierra la conexión (al salir del juego)."""
+    global _conn, _conn_name
+    save_writer.flush()
+    with _conn_lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+            _conn_name = None
+            _written.clear()
+
 def init_db():
     """Inicializa la estructura de la base de datos si no existe."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Creamos una tabla simple pero robusta
-    # slot_id: 1, 2 o 3
-    # progress: Porcentaje (0-100)
-    # play_time: Timestamp de guardado
-    # player_data: Una cadena codificada con los datos vitales (X, Y, Estado)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS save_slots (
-            slot_id INTEGER PRIMARY KEY,
-            progress INTEGER,
-            timestamp TEXT,
-            player_data TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with _conn_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        # Creamos una tabla simple pero robusta
+        # slot_id: 1, 2 o 3
+        # progress: Porcentaje (0-100)
+        # play_time: Timestamp de guardado
+        # player_data: Resumen legible "x,y,char_type" (en v1 era el único dato guardado)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS save_slots (
+                slot_id INTEGER PRIMARY KEY,
+                progress INTEGER,
+                timestamp TEXT,
+                player_data TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS save_sections (
+                slot_id INTEGER,
+                section INTEGER,
+                data BLOB,
+                PRIMARY KEY (slot_id, section)
+            )
+        ''')
+        schema = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if schema < 2:
+            _migrate_v1(cursor)
+        if schema < 3:
+            _migrate_v2(cursor)
+        if schema < SCHEMA_VERSION:
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
     print(f"[SISTEMA] Base de datos {DB_NAME} verificada.")
 
-def save_game(slot_id, progress, x, y, char_type):
-    """Guarda o sobrescribe una ranura."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
+def _migrate_v1(cursor):
+    """Convierte las filas "x,y,char_type" al esquema por secciones."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(save_slots)")]
+    if "version" not in columns:
+        cursor.execute("ALTER TABLE save_slots ADD COLUMN version INTEGER DEFAULT 1")
+    rows = cursor.execute("SELECT slot_id, progress, player_data FROM save_slots WHERE version < ?",
+                          (SECTIONS_VERSION,)).fetchall()
+    for slot_id, progress, player_data in rows:
+        state = _legacy_state(progress, player_data)
+        for name, payload in encode_state(state).items():
+            cursor.execute(SQL_SECTION_UPSERT, (slot_id, SECTION_NAMES[name], payload))
+        cursor.execute("UPDATE save_slots SET version = ? WHERE slot_id = ?", (SAVE_VERSION, slot_id))
+    if rows:
+        print(f"[SISTEMA] {len(rows)} partida(s) migradas al formato v{SAVE_VERSION}.")
+
+def _migrate_v2(cursor):
+    """Rellena la columna resumen `scene` a partir de la sección del prólogo."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(save_slots)")]
+    if "scene" not in columns:
+        cursor.execute("ALTER TABLE save_slots ADD COLUMN scene TEXT")
+    rows = cursor.execute("SELECT slot_id, data FROM save_sections WHERE section = ?", (SECTION_PROLOGUE,)).fetchall()
+    for slot_id, payload in rows:
+        try:
+            _, prologue = _decode_section(SECTION_PROLOGUE, bytes(payload))
+        except ValueError:
+            continue  # Partida de una versión más nueva: no se toca
+        cursor.execute(SQL_SCENE, (prologue["scene"], slot_id))
+
+def _legacy_state(progress, player_data):
+    # Filas v1 sin resumen (NULL): posición inicial por defecto
+    x, y, char_type = (player_data or "1500,1500,cero").split(',')
+    # En v1 solo el nivel demo guardaba con progreso > 0; una partida nueva empezaba en el prólogo
+    return {
+        "prologue": {"scene": "demo" if progress else "level_zero", "phase": "SETUP"},
+        "player": {"x": float(x), "y": float(y), "char_type": char_type},
+    }
+
+# --- CODIFICACIÓN BINARIA ---
+def _pack_str(text):
+    raw = text.encode("utf-8")[:0xFFFF]
+    return _STR_LEN.pack(len(raw)) + raw
+
+def _unpack_str(data, offset):
+    (n,) = _STR_LEN.unpack_from(data, offset)
+    offset += _STR_LEN.size
+    return data[offset:offset + n].decode("utf-8"), offset + n
+
+def _encode_section(name, value):
+    if name == "prologue":
+        body = bytes([SCENE_CODES.get(value.get("scene"), 0)]) + _pack_str(value.get("phase", "SETUP"))
+    elif name == "player":
+        body = _PLAYER.pack(value["x"], value["y"], int(value.get("facing_x", 0)), int(value.get("facing_y", 1)),
+                            bool(value.get("is_crouching", False)))
+        body += _pack_str(value.get("char_type", "cero")) + _pack_str(value.get("speed_mode", "caminar"))
+    elif name == "scene":
+        body = _SCENE.pack(value["vision_radius"], int(value["light_timer"]), int(value["punishment_mode"]),
+                           int(value["repetition_count"])) + _pack_str(value.get("last_cmd_str", ""))
+    elif name == "particles":
+        body = _COUNT.pack(len(value)) + b"".join(_PARTICLE.pack(*p) for p in value)
+    elif name == "ghosts":
+        parts = [_COUNT.pack(len(value["ghosts"]))]
+        for chunk, x, y, timer, lore, phrase in value["ghosts"]:
+            parts.append(_GHOST.pack(chunk, x, y, int(timer), lore))
+            parts.append(_pack_str(phrase or ""))
+        chunks = sorted(value["chunks"])
+        parts.append(_COUNT.pack(len(chunks)) + struct.pack(f"<{len(chunks)}I", *chunks))
+        body = b"".join(parts)
+    elif name == "memory":
+        body = _MEMORY.pack(value["cell"], value["cols"], value["rows"], value["step"])
+        body += bytes(value["level"]) + bytes(value["stamp"])
+    else:
+        raise ValueError(f"Sección desconocida: {name}")
+    flags = 0
+    if len(body) >= ZLIB_MIN_SIZE:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_ZLIB
+    return bytes([SAVE_VERSION, flags]) + body
+
+def _decode_section(section, payload):
+    version, flags = payload[0], payload[1]
+    if version > SAVE_VERSION:
+        raise ValueError(f"Partida de una versión más nueva (v{version})")
+    body = payload[2:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    if section == SECTION_PROLOGUE:
+        phase, _ = _unpack_str(body, 1)
+        return "prologue", {"scene": SCENE_NAMES.get(body[0], "level_zero"), "phase": phase}
+    if section == SECTION_PLAYER:
+        x, y, fx, fy, crouch = _PLAYER.unpack_from(body, 0)
+        char_type, offset = _unpack_str(body, _PLAYER.size)
+        speed_mode, _ = _unpack_str(body, offset)
+        return "player", {"x": x, "y": y, "facing_x": fx, "facing_y": fy, "is_crouching": crouch,
+                          "char_type": char_type, "speed_mode": speed_mode}
+    if section == SECTION_SCENE:
+        vision, light, punish, reps = _SCENE.unpack_from(body, 0)
+        last_cmd, _ = _unpack_str(body, _SCENE.size)
+        return "scene", {"vision_radius": vision, "light_timer": light, "punishment_mode": punish,
+                         "repetition_count": reps, "last_cmd_str": last_cmd}
+    if section == SECTION_PARTICLES:
+        (n,) = _COUNT.unpack_from(body, 0)
+        return "particles", [_PARTICLE.unpack_from(body, _COUNT.size + i * _PARTICLE.size) for i in range(n)]
+    if section == SECTION_GHOSTS:
+        (n,) = _COUNT.unpack_from(body, 0)
+        offset = _COUNT.size
+        ghosts = []
+        for _ in range(n):
+            chunk, x, y, timer, lore = _GHOST.unpack_from(body, offset)
+            phrase, offset = _unpack_str(body, offset + _GHOST.size)
+            ghosts.append((chunk, x, y, timer, lore, phrase))
+        if version < 4:
+            # Sin la lista: al menos los chunks donde había fantasmas no repiten los del nivel
+            chunks = sorted({g[0] for g in ghosts})
+        else:
+            (count,) = _COUNT.unpack_from(body, offset)
+            chunks = list(struct.unpack_from(f"<{count}I", body, offset + _COUNT.size))
+        return "ghosts", {"chunks": chunks, "ghosts": ghosts}
+    if section == SECTION_MEMORY:
+        if version < 3:
+            # La intensidad guardada pasa a ser el nivel de cada celda, revelada en el paso 0
+            cell, cols, rows = _MEMORY_V2.unpack_from(body, 0)
+            return "memory", {"cell": cell, "cols": cols, "rows": rows, "step": 0,
+                              "level": body[_MEMORY_V2.size:], "stamp": bytes(4 * cols * rows)}
+        cell, cols, rows, step = _MEMORY.unpack_from(body, 0)
+        n = cols * rows
+        return "memory", {"cell": cell, "cols": cols, "rows": rows, "step": step,
+                          "level": body[_MEMORY.size:_MEMORY.size + n],
+                          "stamp": body[_MEMORY.size + n:_MEMORY.size + 5 * n]}
+    return None, None  # Sección de una versión futura: se ignora
+
+def encode_state(state):
+    """{nombre: valor} -> {nombre: bytes}; un valor None significa "borrar la sección"."""
+    return {name: (None if value is None else _encode_section(name, value)) for name, value in state.items()}
+
+def decode_sections(rows):
+    state = {}
+    for section, payload in rows:
+        name, value = _decode_section(section, bytes(payload))
+        if name is not None:
+            state[name] = value
+    return state
+
+# --- ESCRITURA ---
+def _write_slot(slot_id, progress, sections):
+    """Escribe solo las secciones que difieren de lo último guardado en la ranura (guardado incremental)."""
     # Formato de tiempo legible
     current_time = time.strftime("%Y-%m-%d %H:%M")
-    
-    # Empaquetamos los datos del jugador en una cadena simple (X,Y,TYPE)
-    # Esto se podría encriptar en el futuro para más seguridad
-    data_payload = f"{x},{y},{char_type}"
-    
-    # UPSERT: Insertar o Reemplazar si ya existe la ID
-    cursor.execute('''
-        INSERT OR REPLACE INTO save_slots (slot_id, progress, timestamp, player_data)
-        VALUES (?, ?, ?, ?)
-    ''', (slot_id, progress, current_time, data_payload))
-    
-    conn.commit()
-    conn.close()
-    print(f"[SISTEMA] Partida guardada en Ranura {slot_id} - Progreso: {progress}%")
+    with _conn_lock:
+        conn = get_connection()
+        written = _written.get(slot_id)
+        if written is None:
+            written = {section: bytes(data) for section, data in conn.execute(SQL_SECTIONS, (slot_id,))}
+            _written[slot_id] = written
+        player = sections.get("player")
+        if player is None:
+            row = conn.execute(SQL_LOAD, (slot_id,)).fetchone()
+            summary = row[1] if row else ""
+        else:
+            summary = f"{player['x']},{player['y']},{player.get('char_type', 'cero')}"
+        changed = 0
+        for name, payload in encode_state(sections).items():
+            section = SECTION_NAMES[name]
+            if payload is None:
+                if section in written:
+                    conn.execute(SQL_SECTION_DELETE, (slot_id, section))
+                    del written[section]
+                    changed += 1
+            elif written.get(section) != payload:
+                conn.execute(SQL_SECTION_UPSERT, (slot_id, section, payload))
+                written[section] = payload
+                changed += 1
+        prologue = sections.get("prologue")
+        if prologue is not None:
+            scene = prologue.get("scene", "level_zero")
+        else:
+            row = conn.execute('SELECT scene FROM save_slots WHERE slot_id = ?', (slot_id,)).fetchone()
+            scene = row[0] if row else "level_zero"
+        # UPSERT: Insertar o Reemplazar si ya existe la ID
+        conn.execute(SQL_UPSERT, (slot_id, progress, current_time, summary, SAVE_VERSION, scene))
+        try:
+            conn.commit()
+        except sqlite3.Error:
+            _written.pop(slot_id, None)  # No sabemos qué quedó escrito: releer la próxima vez
+            raise
+    # El índice del menú se actualiza con lo que se acaba de escribir, sin volver a consultar
+    slot_index.update(slot_id, progress, current_time, scene)
+    print(f"[SISTEMA] Partida guardada en Ranura {slot_id} - Progreso: {progress}% ({changed} secciones)")
+
+def _new_game_state(x, y, char_type):
+    # Partida nueva o sobrescrita: borra todo lo que no sea jugador y prólogo
+    return {
+        "prologue": {"scene": "level_zero", "phase": "SETUP"},
+        "player": {"x": x, "y": y, "char_type": char_type},
+        "scene": None, "particles": None, "ghosts": None, "memory": None,
+    }
+
+def save_game(slot_id, progress, x, y, char_type):
+    """Empieza una ranura desde cero (síncrono: espera al commit)."""
+    save_state(slot_id, progress, _new_game_state(x, y, char_type))
+
+def save_game_async(slot_id, progress, x, y, char_type, on_done=None):
+    """Como save_game, en el hilo escritor; on_done(slot_id, ok) se llama tras el commit."""
+    save_writer.submit(slot_id, progress, _new_game_state(x, y, char_type), on_done)
+
+def save_state(slot_id, progress, state):
+    """Guarda las secciones de `state` (las que no aparecen se conservan tal cual)."""
+    save_writer.flush(slot_id)
+    _write_slot(slot_id, progress, state)
+
+def save_state_async(slot_id, progress, state, on_done=None):
+    save_writer.submit(slot_id, progress, state, on_done)
+
+
+class SaveWriter:
+    """Hilo escritor: agrupa ráfagas de guardados a la misma ranura y solo escribe el último."""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending = {}   # slot_id -> (progreso, secciones, [callbacks])
+        self.writing = None # slot_id que se está escribiendo ahora
+        self.thread = None
+
+    def submit(self, slot_id, progress, sections, on_done=None):
+        with self.cond:
+            _, merged, callbacks = self.pending.get(slot_id, (None, {}, []))
+            # Las secciones de guardados anteriores aún sin escribir se conservan si el nuevo no las trae
+            merged.update(sections)
+            if on_done is not None:
+                callbacks.append(on_done)
+            self.pending[slot_id] = (progress, merged, callbacks)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def is_pending(self, slot_id=None):
+        with self.cond:
+            if slot_id is None:
+                return bool(self.pending) or self.writing is not None
+            return slot_id in self.pending or self.writing == slot_id
+
+    def flush(self, slot_id=None):
+        """Bloquea hasta que no quede nada pendiente (de esa ranura o de todas)."""
+        with self.cond:
+            while (slot_id in self.pending or self.writing == slot_id) if slot_id is not None \
+                    else (self.pending or self.writing is not None):
+                self.cond.wait(0.1)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.pending:
+                    return  # El hilo termina solo; submit() lo relanza
+                slot_id = next(iter(self.pending))
+                progress, sections, callbacks = self.pending.pop(slot_id)
+                self.writing = slot_id
+            ok = True
+            try:
+                _write_slot(slot_id, progress, sections)
+            except (sqlite3.Error, ValueError, struct.error) as e:
+                ok = False
+                print(f"[SISTEMA] Error guardando Ranura {slot_id}: {e}")
+            with self.cond:
+                self.writing = None
+                self.cond.notify_all()
+            for cb in callbacks:
+                cb(slot_id, ok)
+
+save_writer = SaveWriter()
 
 def load_game(slot_id):
     """Carga los datos de una ranura específica."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT progress, player_data FROM save_slots WHERE slot_id = ?', (slot_id,))
-    row = cursor.fetchone()
-    conn.close()
-    
+    save_writer.flush(slot_id)
+    with _conn_lock:
+        conn = get_connection()
+        row = conn.execute(SQL_LOAD, (slot_id,)).fetchone()
+        sections = conn.execute(SQL_SECTIONS, (slot_id,)).fetchall() if row else []
+
     if row:
-        # Desempaquetamos
-        progress = row[0]
-        data_str = row[1]
-        x, y, char_type = data_str.split(',')
+        progress, data_str, version = row
+        if version is not None and version >= SECTIONS_VERSION:
+            try:
+                state = decode_sections(sections)
+            except ValueError as e:
+                # Guardada por una versión más nueva del juego: no se carga
+                print(f"[SISTEMA] Ranura {slot_id}: {e}")
+                return {"exists": False, "newer": True}
+        else:
+            state = _legacy_state(progress, data_str)
+        player = state.get("player") or {"x": 1500.0, "y": 1500.0, "char_type": "cero"}
         return {
             "exists": True,
             "progress": progress,
-            "x": float(x),
-            "y": float(y),
-            "char_type": char_type
+            "x": player["x"],
+            "y": player["y"],
+            "char_type": player["char_type"],
+            "state": state
         }
     else:
         return {"exists": False}
 
+class SlotIndex:
+    """Resumen de las ranuras en memoria: se lee una vez (por páginas) y el escritor lo mantiene al día."""
+    PAGE_QUERY = 64  # Filas por consulta al cargar
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}      # slot_id -> {"empty", "progress", "date", "scene"}
+        self.loaded = False
+        self.version = 0     # Cambia con cada modificación (el menú cachea lo que dibuja con él)
+
+    def invalidate(self):
+        with self.lock:
+            self.slots = {}
+            self.loaded = False
+            self.version += 1
+
+    def ensure_loaded(self):
+        """Carga el resumen si hace falta (llamar fuera del hilo principal, p. ej. al construir la escena)."""
+        if self.loaded:
+            return
+        save_writer.flush()
+        slots = {}
+        offset = 0
+        while True:
+            with _conn_lock:
+                rows = get_connection().execute(SQL_SLOTS_PAGE, (self.PAGE_QUERY, offset)).fetchall()
+            for s_id, prog, date, scene in rows:
+                slots[s_id] = {"empty": False, "progress": prog, "date": date, "scene": scene or "level_zero"}
+            if len(rows) < self.PAGE_QUERY:
+                break
+            offset += len(rows)
+        with self.lock:
+            # Lo que el escritor haya actualizado mientras tanto es más nuevo que lo leído
+            slots.update(self.slots)
+            self.slots = slots
+            self.loaded = True
+            self.version += 1
+
+    def update(self, slot_id, progress, date, scene):
+        with self.lock:
+            self.slots[slot_id] = {"empty": False, "progress": progress, "date": date, "scene": scene}
+            self.version += 1
+
+    @staticmethod
+    def _empty():
+        return {"empty": True, "progress": 0, "date": "---", "scene": None}
+
+    def get(self, slot_id):
+        return self.slots.get(slot_id) or self._empty()
+
+    def slot_count(self):
+        """Ranuras a mostrar: las configuradas o más si la base de datos trae ranuras extra."""
+        return max([config.SAVE_SLOTS] + list(self.slots))
+
+    def page_count(self, per_page):
+        return max(1, -(-self.slot_count() // per_page))
+
+    def page(self, page, per_page):
+        """[(slot_id, resumen)] de una página del menú (solo memoria)."""
+        first = page * per_page + 1
+        last = min(self.slot_count(), first + per_page - 1)
+        return [(i, self.get(i)) for i in range(first, last + 1)]
+
+    def has_saves(self):
+        return bool(self.slots)
+
+slot_index = SlotIndex()
+
 def get_slots_info():
     """Obtiene un resumen de todas las ranuras para mostrar en el menú."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    slots = {}
-    # Inicializamos vacíos
-    for i in range(1, 4):
-        slots[i] = {"empty": True, "progress": 0, "date": "---"}
-        
-    cursor.execute('SELECT slot_id, progress, timestamp FROM save_slots')
-    rows = cursor.fetchall()
-    
-    for row in rows:
-        s_id, prog, date = row
-        slots[s_id] = {"empty": False, "progress": prog, "date": date}
-        
-    conn.close()
-    return slots
\ No newline at end of file
+    slot_index.ensure_loaded()
+    return {i: slot_index.get(i) for i in range(1, slot_index.slot_count() + 1)}
@@ -7,48 +7,73 @@ import time
 import random
 import database
 import math
-import array
 import struct
 import json
-from scenes import Scene, CURRENT_SESSION, AUDIO_AVAILABLE
-from entities import Player
-
-try:
-    import pyaudio
-    from vosk import Model, KaldiRecognizer
-except ImportError:
-    pass
+from scenes import Scene, CURRENT_SESSION
+from entities import Player, ParticleSystem, GhostSystem, PARTICLE_FIRE, PARTICLE_MORPH
+import levels
+import replay
+import music
+from echolocation import EchoCaster, MATERIAL_COLORS
+from pathfinding import FlowField
+from echo_memory import EchoMemory
+from echo_synth import EchoSynth
+from voice import AUDIO_AVAILABLE, VoiceListener
+from command_decoder import find_phrases
 
 class DemoScene(Scene):
     def __init__(self, screen):
         super().__init__(screen)
-        self.world_width = config.WORLD_WIDTH
-        self.world_height = config.WORLD_HEIGHT
+        # Nivel por chunks: solo se mantienen en memoria los chunks cercanos a la cámara
+        self.level = levels.open_level(config.LEVEL_FILE)
+        self.world_width = self.level.world_width
+        self.world_height = self.level.world_height
+        # Al grabar/reproducir los chunks se leen en el mismo paso: la llegada no depende del disco
+        self.streamer = levels.ChunkStreamer(self.level, synchronous=replay.deterministic())
         
         # Inicializar jugador
-        self.player = Player(self.world_width // 2, self.world_height // 2)
+        self.player = Player(*self.level.spawn)
+        self.player.fx_rng = self.fx_rng
         
         # --- CARGA DE DATOS (Integración con Database) ---
+        saved = {}
         if CURRENT_SESSION["should_load"]:
             data = database.load_game(CURRENT_SESSION["slot"])
             if data["exists"]:
-                self.player.x = data["x"]
-                self.player.y = data["y"]
-                self.player.set_character(data["char_type"])
+                saved = data["state"]
+                self._restore_player(saved.get("player") or data)
                 print(f"[DEMO] Partida cargada: Slot {CURRENT_SESSION['slot']}")
+        # Chunks cargados al guardar (también los vacíos): al volver a cargarse traen sus fantasmas
+        # guardados, estén donde estén, y no los del nivel; el resto los saca del nivel como siempre
+        saved_ghosts = saved.get("ghosts") or {"chunks": [], "ghosts": []}
+        self.saved_ghosts = {chunk_id: [] for chunk_id in saved_ghosts["chunks"]}
+        for chunk_id, gx, gy, timer, lore, phrase in saved_ghosts["ghosts"]:
+            self.saved_ghosts.setdefault(chunk_id, []).append((gx, gy, timer, lore, phrase))
+        self.streamed = set()  # Ids de los chunks cargados ahora
 
-        # Cámara y Efectos
-        self.camera_x = 0
-        self.camera_y = 0
-        self.particles = []
+        # Cámara y Efectos (arranca centrada en el jugador)
+        self.camera_x, self.camera_y = self._camera_target()
+        self.prev_camera_x = self.camera_x
+        self.prev_camera_y = self.camera_y
+        self.particles = ParticleSystem()
         self.pulses = [] 
         
-        # Entidades Fantasma (Lore)
-        self.ghosts = [
-            {"x": self.world_width//2 + 300, "y": self.world_height//2 - 200, "phrase": "", "timer": 0},
-            {"x": self.world_width//2 - 300, "y": self.world_height//2 + 300, "phrase": "", "timer": 0}
-        ]
-        self.lore_phrases = ["No es aire... es vibración.", "Elena... ¿dónde estás?", "El Pozo nos traga a todos.", "Silencio... ellos escuchan.", "La frecuencia de Dios duele."]
+        # Entidades Fantasma (Lore), en columnas; llegan y se van con sus chunks
+        self.lore_phrases = self.level.phrases or list(levels.DEFAULT_LORE)
+        self.ghosts = GhostSystem(self.lore_phrases, self.world_width, self.world_height,
+                                  chunk_grid=(self.level.chunk_size, self.level.chunks_x, self.level.chunks_y))
+        self.phrase_surfs = {}  # fila -> frase rasterizada (se invalida con ghosts.take_changed)
+        
+        # Geometría cargada: muros por id (un muro largo puede estar en varios chunks) y capas de tiles
+        self.walls = {}
+        self.wall_refs = {}
+        self.tile_layers = {}
+        self.solid_cells = {}  # chunk -> celdas TILE_SOLID (obstáculos del campo de flujo)
+        # Campo de flujo compartido por todos los fantasmas que persiguen al jugador
+        self.flow = FlowField(self.world_width, self.world_height, self.level.tile_size)
+        self.echo_caster = EchoCaster(num_rays=360, max_range=600)
+        self.walls_dirty = True
+        self._apply_chunks(self.streamer.prime(self.camera_x, self.camera_y, config.SCREEN_WIDTH, config.SCREEN_HEIGHT), [])
         
         # Mecánicas de Visión y Castigo
         self.base_vision = 80
@@ -58,85 +83,167 @@ class DemoScene(Scene):
         self.repetition_count = 0
         self.punishment_mode = 0 
         self.last_cmd_display = ""
+        if "scene" in saved:
+            s = saved["scene"]
+            self.vision_radius = s["vision_radius"]
+            self.light_timer = s["light_timer"]
+            self.punishment_mode = s["punishment_mode"]
+            self.repetition_count = s["repetition_count"]
+            self.last_cmd_str = s["last_cmd_str"]
+        if "particles" in saved:
+            self.particles.restore(saved["particles"])
+        # Memoria de lo que el eco y la luz han revelado (se va olvidando)
+        self.memory = EchoMemory(self.world_width, self.world_height)
+        if "memory" in saved:
+            self.memory.restore(saved["memory"])
+        self.autosave_timer = config.AUTOSAVE_FRAMES
         
         # Audio y Comandos
         self.command_queue = queue.Queue()
         self.audio_running = False
         self.db_level = -60
         self.echo_sound = self._generate_ping_sound()
+        self.echo_synth = self.prepare_sounds()
         
         # Estados de Guardado
         self.is_paused = False
         self.saving_timer = 0
-        
+        self.save_pending = False
+        self.save_ok = True
+
+    def enter(self):
+        # Se escucha solo con la escena en pantalla (el reconocedor es compartido)
         if AUDIO_AVAILABLE:
             self.audio_running = True
-            threading.Thread(target=self.listener, daemon=True).start()
+            self.start_listening()
+
+    def _camera_target(self):
+        target_cam_x = self.player.x - config.SCREEN_WIDTH // 2
+        target_cam_y = self.player.y - config.SCREEN_HEIGHT // 2
+        target_cam_x = max(0, min(target_cam_x, self.world_width - config.SCREEN_WIDTH))
+        target_cam_y = max(0, min(target_cam_y, self.world_height - config.SCREEN_HEIGHT))
+        return target_cam_x, target_cam_y
+
+    def _apply_chunks(self, loaded, evicted):
+        """Integra los chunks que entran y retira los que salen del área de streaming."""
+        if not loaded and not evicted:
+            return
+        if evicted:
+            gone = set()
+            for chunk in evicted:
+                gone.add(self.level.chunk_id(chunk.cx, chunk.cy))
+                self.tile_layers.pop(chunk.key, None)
+                self.solid_cells.pop(chunk.key, None)
+                for wall in chunk.walls:
+                    self.wall_refs[wall[0]] -= 1
+                    if self.wall_refs[wall[0]] <= 0:
+                        del self.wall_refs[wall[0]]
+                        del self.walls[wall[0]]
+            self.ghosts.remove_chunks(gone)
+            self.streamed -= gone
+        for chunk in loaded:
+            chunk_id = self.level.chunk_id(chunk.cx, chunk.cy)
+            self.streamed.add(chunk_id)
+            for wall in chunk.walls:
+                self.walls[wall[0]] = wall
+                self.wall_refs[wall[0]] = self.wall_refs.get(wall[0], 0) + 1
+            saved_ghosts = self.saved_ghosts.pop(chunk_id, None)
+            if saved_ghosts is not None:
+                for gx, gy, timer, lore, phrase in saved_ghosts:
+                    self.ghosts.add(gx, gy, lore, chunk_id, timer, phrase)
+            else:
+                for gx, gy, lore in chunk.ghosts:
+                    self.ghosts.add(gx, gy, lore, chunk_id)
+            if chunk.tiles:
+                self.tile_layers[chunk.key] = self._render_tiles(chunk)
+                tps = self.level.tiles_per_side
+                self.solid_cells[chunk.key] = [(chunk.cx * tps + i % tps, chunk.cy * tps + i // tps)
+                                               for i, kind in enumerate(chunk.tiles) if kind == levels.TILE_SOLID]
+        self.walls_dirty = True
+        self.flow.set_obstacles(self.walls.values(), [c for cells in self.solid_cells.values() for c in cells])
+
+    def _render_tiles(self, chunk):
+        """Rasteriza la capa de tiles de un chunk una sola vez."""
+        tps, ts = self.level.tiles_per_side, self.level.tile_size
+        surf = pygame.Surface((self.level.chunk_size, self.level.chunk_size), pygame.SRCALPHA)
+        for i, kind in enumerate(chunk.tiles):
+            if kind == levels.TILE_FLOOR:
+                surf.fill(config.FLOOR_COLOR, ((i % tps) * ts, (i // tps) * ts, ts, ts))
+            elif kind == levels.TILE_SOLID:
+                surf.fill(config.WALL_COLOR, ((i % tps) * ts, (i // tps) * ts, ts, ts))
+        return surf
+
+    _echo_synth = None
+    _ghost_sprites = {}  # vaivén (px) -> silueta fantasmal
+
+    @classmethod
+    def prepare_sounds(cls, render_all=False):
+        """Sintetizador del eco compartido entre instancias (se crea una vez, también desde la precarga).
+        `render_all` renderiza además todas las variantes por distancia."""
+        if cls._echo_synth is None:
+            cls._echo_synth = EchoSynth(max_distance=600)
+        if render_all:
+            cls._echo_synth.prepare()
+        return cls._echo_synth
 
     def _generate_ping_sound(self):
-        sample_rate = 44100
-        duration = 0.5
-        n_samples = int(sample_rate * duration)
-        buf = array.array('h', [0] * n_samples)
-        for i in range(n_samples):
-            t = float(i) / sample_rate
-            value = int(32767.0 * math.sin(2 * math.pi * 800 * t) * math.exp(-6 * t))
-            buf[i] = value
-        return pygame.mixer.Sound(buffer=buf)
-
-    def listener(self):
-        try:
-            model = Model("model")
-            # Gramática expandida con comandos de menú y guardado
-            grammar = '["luz", "fuego", "camino de fuego", "eco", "menu", "arriba", "abajo", "derecha", "izquierda", "caminar", "correr", "parar", "detenerse", "agacharse", "levantarse", "pie", "cambiar a sombra", "cambiar a cero", "lento", "guardar", "pausa", "salir", "[unk]"]'
-            rec = KaldiRecognizer(model, 16000, grammar)
-            p = pyaudio.PyAudio()
-            stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=512)
-            stream.start_stream()
-            
-            while self.audio_running:
-                data = stream.read(512, exception_on_overflow=False)
-                # Cálculo de DB para efectos visuales si se desea
-                shorts = struct.unpack(f"<{len(data)//2}h", data)
-                rms = math.sqrt(sum(s**2 for s in shorts) / len(shorts)) if shorts else 0
-                self.db_level = (20 * math.log10(rms) - 90) if rms > 0 else -60
-                
-                if rec.AcceptWaveform(data): pass 
-                else:
-                    partial = json.loads(rec.PartialResult()).get("partial", "")
-                    if partial:
-                        words = ["arriba", "abajo", "derecha", "izquierda", "correr", "caminar", "parar", "luz", "fuego", "menu", "cambiar a sombra", "cambiar a cero", "camino de fuego", "agacharse", "levantarse", "pie", "eco", "lento", "guardar", "pausa", "salir"]
-                        for w in words:
-                            if w in partial:
-                                self.command_queue.put(w)
-                                rec.Reset()
-                                break
-        except Exception as e:
-            print(f"Error Audio: {e}")
+        return self.prepare_sounds().dry
+
+    VOICE_WORDS = ["arriba", "abajo", "derecha", "izquierda", "correr", "caminar", "parar", "luz", "fuego", "menu", "cambiar a sombra", "cambiar a cero", "camino de fuego", "agacharse", "levantarse", "pie", "eco", "lento", "guardar", "pausa", "salir"]
+
+    def start_listening(self):
+        # Gramática expandida con comandos de menú y guardado
+        grammar = '["luz", "fuego", "camino de fuego", "eco", "menu", "arriba", "abajo", "derecha", "izquierda", "caminar", "correr", "parar", "detenerse", "agacharse", "levantarse", "pie", "cambiar a sombra", "cambiar a cero", "lento", "guardar", "pausa", "salir", "[unk]"]'
+        VoiceListener(self, grammar, self.match_command, keywords=self.VOICE_WORDS,
+                      frames_per_buffer=512, on_level=self._set_db_level).start()
+
+    def _set_db_level(self, db):
+        # Nivel de la voz para efectos visuales si se desea
+        self.db_level = db
+
+    def match_command(self, partial):
+        # Todos los comandos del texto en el orden dicho ("luz eco" -> ambos)
+        return find_phrases(partial, self.VOICE_WORDS)
+
+    @staticmethod
+    def _pan_volumes(angle, gain=1.0):
+        pan = math.cos(angle) # -1 izquierda, 1 derecha
+        vol_left = max(0.1, min(1.0, 1.0 - max(0, pan) + 0.2))
+        vol_right = max(0.1, min(1.0, 1.0 + min(0, pan) + 0.2))
+        return vol_left * gain, vol_right * gain
 
     def trigger_echo(self):
         """Mecánica de Ecolocalización"""
-        nearest_dist = float('inf')
-        nearest_ghost = None
-        for g in self.ghosts:
-            dist = math.hypot(g["x"] - self.player.x, g["y"] - self.player.y)
-            if dist < nearest_dist:
-                nearest_dist = dist
-                nearest_ghost = g
-        
-        # Audio Panning (Sonido 3D simulado)
-        if nearest_ghost:
-            dx = nearest_ghost["x"] - self.player.x
-            dy = nearest_ghost["y"] - self.player.y
-            angle = math.atan2(dy, dx)
-            pan = math.cos(angle) # -1 izquierda, 1 derecha
-            vol_left = max(0.1, min(1.0, 1.0 - max(0, pan) + 0.2))
-            vol_right = max(0.1, min(1.0, 1.0 + min(0, pan) + 0.2))
-            channel = self.echo_sound.play()
-            if channel: channel.set_volume(vol_left, vol_right)
-            
-            # Efecto Visual de Onda
-            self.pulses.append({"x": self.player.x, "y": self.player.y, "radius": 0, "max_radius": 600, "color": config.LIGHT_BLUE})
+        # Barrido de rayos contra los muros cargados: la onda solo revela lo que alcanza
+        if self.walls_dirty:
+            self.echo_caster.set_walls(list(self.walls.values()))
+            self.walls_dirty = False
+        echo = self.echo_caster.cast(self.player.x, self.player.y)
+        
+        # El ping suena con la acústica de lo más cercano (fantasma o muro): retardo, rebotes y cola
+        # según la distancia, con paneo hacia esa dirección (Sonido 3D simulado)
+        distance, angle = echo.max_range, None
+        idx, ghost_dist = self.ghosts.nearest(self.player.x, self.player.y)
+        if idx is not None and ghost_dist < distance:
+            gx, gy = self.ghosts.position(idx)
+            distance, angle = ghost_dist, math.atan2(gy - self.player.y, gx - self.player.x)
+        wall = echo.nearest_hit()
+        if wall is not None and wall[0] < distance:
+            distance, angle = wall
+        channel = self.echo_synth.sound(distance).play()
+        if channel and angle is not None: channel.set_volume(*self._pan_volumes(angle))
+        
+        # Retornos: cada sector devuelve un eco con retardo de ida y vuelta y paneo según su dirección
+        taps = []
+        for dist, angle, reflection in sorted(echo.returns(sectors=8), key=lambda r: -r[2] * (1 - r[0] / echo.max_range))[:4]:
+            delay = int(2 * dist / config.ECHO_SPEED)
+            gain = reflection * (1 - dist / echo.max_range)
+            taps.append((delay, self._pan_volumes(angle, gain)))
+        taps.sort(key=lambda t: t[0])
+        
+        # Efecto Visual de Onda
+        self.pulses.append({"x": self.player.x, "y": self.player.y, "radius": 0, "max_radius": echo.max_range,
+                            "color": config.LIGHT_BLUE, "echo": echo, "age": 0, "taps": taps})
 
     def execute_command(self, cmd):
         # Comandos que no castigan por repetición
@@ -176,11 +283,11 @@ class DemoScene(Scene):
         
         elif cmd == "cambiar a sombra":
             self.player.set_character("sombra")
-            self.particles.append({"x": self.player.x, "y": self.player.y, "vx": 0, "vy": 0, "life": 60, "size": 100, "color": (100, 0, 0), "type": "morph"})
+            self.particles.spawn(self.player.x, self.player.y, 0, 0, 60, 100, (100, 0, 0), PARTICLE_MORPH)
         
         elif cmd == "cambiar a cero":
             self.player.set_character("cero")
-            self.particles.append({"x": self.player.x, "y": self.player.y, "vx": 0, "vy": 0, "life": 60, "size": 100, "color": (0, 200, 255), "type": "morph"})
+            self.particles.spawn(self.player.x, self.player.y, 0, 0, 60, 100, (0, 200, 255), PARTICLE_MORPH)
         
         elif cmd == "luz":
             self.light_timer = 180 
@@ -188,37 +295,78 @@ class DemoScene(Scene):
         elif cmd == "fuego":
             # Efecto de explosión de partículas
             for _ in range(60):
-                angle = random.uniform(0, 6.28)
-                speed = random.uniform(2, 8)
-                self.particles.append({
-                    "x": self.player.x, "y": self.player.y, 
-                    "vx": math.cos(angle)*speed, "vy": math.sin(angle)*speed, 
-                    "life": random.randint(40, 80), "size": random.randint(8, 18), 
-                    "color": config.RED_BLOOD, "type": "fire"
-                })
+                angle = self.rng.uniform(0, 6.28)
+                speed = self.rng.uniform(2, 8)
+                self.particles.spawn(
+                    self.player.x, self.player.y,
+                    math.cos(angle)*speed, math.sin(angle)*speed,
+                    self.rng.randint(40, 80), self.rng.randint(8, 18),
+                    config.RED_BLOOD, PARTICLE_FIRE
+                )
         
         elif cmd == "camino de fuego":
             dx, dy = self.player.facing_x, self.player.facing_y
             for i in range(25):
-                offset_x = random.uniform(-15, 15)
-                offset_y = random.uniform(-15, 15)
-                self.particles.append({
-                    "x": self.player.x + offset_x, "y": self.player.y + offset_y, 
-                    "vx": dx * 8 + random.uniform(-1, 1), "vy": dy * 8 + random.uniform(-1, 1), 
-                    "life": 100, "size": random.randint(10, 22), 
-                    "color": (255, 100, 0), "type": "fire"
-                })
+                offset_x = self.rng.uniform(-15, 15)
+                offset_y = self.rng.uniform(-15, 15)
+                self.particles.spawn(
+                    self.player.x + offset_x, self.player.y + offset_y,
+                    dx * 8 + self.rng.uniform(-1, 1), dy * 8 + self.rng.uniform(-1, 1),
+                    100, self.rng.randint(10, 22),
+                    (255, 100, 0), PARTICLE_FIRE
+                )
         
         # --- SISTEMA ---
         elif cmd == "guardar":
-            database.save_game(CURRENT_SESSION["slot"], 15, self.player.x, self.player.y, self.player.char_type)
-            self.last_cmd_display = "JUEGO GUARDADO"
-            self.saving_timer = 60
+            # El commit ocurre en el hilo escritor; "GUARDANDO..." se mantiene hasta que termine
+            self.save_pending = True
+            database.save_state_async(CURRENT_SESSION["slot"], config.DEMO_PROGRESS, self.capture_state(), on_done=self._on_saved)
+            self.last_cmd_display = "GUARDANDO"
             
         elif cmd == "menu" or cmd == "salir":
             self.audio_running = False
             self.change_scene(config.STATE_MENU)
 
+    def _restore_player(self, p):
+        self.player.set_position(p["x"], p["y"])
+        self.player.set_character(p["char_type"])
+        if "speed_mode" in p:
+            self.player.set_speed_mode(p["speed_mode"])
+            self.player.facing_x, self.player.facing_y = p["facing_x"], p["facing_y"]
+            self.player.is_crouching = p["is_crouching"]
+
+    def capture_state(self):
+        """Estado completo de la escena en secciones de database (el escritor solo guarda las que cambian)."""
+        p = self.player
+        return {
+            "prologue": {"scene": "demo", "phase": "DONE"},
+            "player": {"x": p.x, "y": p.y, "facing_x": p.facing_x, "facing_y": p.facing_y,
+                       "is_crouching": p.is_crouching, "char_type": p.char_type, "speed_mode": p.speed_mode},
+            "scene": {"vision_radius": self.vision_radius, "light_timer": self.light_timer,
+                      "punishment_mode": self.punishment_mode, "repetition_count": self.repetition_count,
+                      "last_cmd_str": self.last_cmd_str},
+            "particles": self.particles.snapshot(),
+            "ghosts": {"chunks": sorted(self.streamed), "ghosts": self.ghosts.snapshot()},
+            "memory": self.memory.snapshot(),
+        }
+
+    def _on_saved(self, slot_id, ok):
+        # Llamado desde el hilo escritor: solo se cambian flags
+        self.save_ok = ok
+        self.save_pending = False
+        self.saving_timer = 60
+
+    def music_mix(self):
+        mix = dict(music.MIXES["explore"])
+        if self.player.char_type == "sombra":
+            mix["shadow"] = 0.8
+            mix["drone"] = 0.3
+        if self.ghosts.hunting():
+            mix["pulse"] = 0.8
+        if self.punishment_mode > 0:
+            mix["tension"] = 1.0
+        return mix
+
     def trigger_punishment(self):
         """Reduce la visión y crea un efecto de sacudida"""
         self.punishment_mode = 60
@@ -229,27 +377,39 @@ class DemoScene(Scene):
     def update(self):
         self.update_fade()
         
-        while not self.command_queue.empty():
-            self.execute_command(self.command_queue.get())
+        for cmd in self.take_commands():
+            self.execute_command(cmd)
         
         # Mensajes de guardado
         if self.saving_timer > 0:
             self.saving_timer -= 1
+
+        # Autoguardado silencioso: solo se escriben las secciones que han cambiado
+        self.autosave_timer -= 1
+        if self.autosave_timer <= 0:
+            self.autosave_timer = config.AUTOSAVE_FRAMES
+            if CURRENT_SESSION["autosave"] and not self.save_pending:
+                database.save_state_async(CURRENT_SESSION["slot"], config.DEMO_PROGRESS, self.capture_state())
             
-        self.player.update()
+        self.player.update(self.world_width, self.world_height)
         
-        # Lógica de Fantasmas
+        # Lógica de Fantasmas (todos a la vez, en columnas)
         if self.player.char_type == "sombra":
-            for g in self.ghosts:
-                dist = math.hypot(g["x"] - self.player.x, g["y"] - self.player.y)
-                if dist < 250:
-                    if g["phrase"] == "" or g["timer"] <= 0:
-                        g["phrase"] = random.choice(self.lore_phrases)
-                        g["timer"] = 180
-                    else:
-                        g["timer"] -= 1
-                else:
-                    g["phrase"] = ""
+            self.ghosts.update(self.player.x, self.player.y, self.rng)
+
+        # Fantasmas hostiles: hablar alto los alerta; persiguen por el campo de flujo compartido,
+        # que solo se recalcula cuando el jugador cambia de celda
+        db = replay.active.level(self.db_level) if replay.active is not None else self.db_level
+        if db > config.LOUD_DB:
+            self.ghosts.hear(self.player.x, self.player.y, config.HEAR_RADIUS * (db - config.LOUD_DB) / -config.LOUD_DB)
+        if self.ghosts.hunting():
+            self.flow.update(self.player.x, self.player.y)
+            caught = self.ghosts.hunt(self.flow, config.SPEED_HUNT, self.player.x, self.player.y)
+            # Un perseguidor que entra en un chunk no cargado no se descargaría nunca
+            self.ghosts.retain_chunks(self.streamed)
+            if caught and self.punishment_mode == 0:
+                self.trigger_punishment()
+                self.last_cmd_display = "¡TE ENCONTRARON!"
         
         # Lógica de Luz y Visión
         if self.light_timer > 0:
@@ -259,63 +419,83 @@ class DemoScene(Scene):
             if self.vision_radius > self.base_vision: self.vision_radius -= 2
             if self.vision_radius < self.base_vision: self.vision_radius = self.base_vision
         
+        # La memoria recuerda lo que ilumina la visión (solo las celdas del círculo)
+        self.memory.tick()
+        self.memory.reveal_circle(self.player.x, self.player.y, self.vision_radius, 200)
+        
         # Modo Castigo (Sacudida de cámara)
         if self.punishment_mode > 0: self.punishment_mode -= 1
         
-        # Cámara Suave
-        target_cam_x = self.player.x - config.SCREEN_WIDTH // 2
-        target_cam_y = self.player.y - config.SCREEN_HEIGHT // 2
+        # Cámara Suave (clamp a los límites del mundo)
+        target_cam_x, target_cam_y = self._camera_target()
         
-        shake = random.randint(-20, 20) if self.punishment_mode > 0 else 0
-        
-        # Clamp camera a los límites del mundo
-        target_cam_x = max(0, min(target_cam_x, self.world_width - config.SCREEN_WIDTH)) + shake
-        target_cam_y = max(0, min(target_cam_y, self.world_height - config.SCREEN_HEIGHT)) + shake
+        shake = self.rng.randint(-20, 20) if self.punishment_mode > 0 else 0
+        target_cam_x += shake
+        target_cam_y += shake
         
+        self.prev_camera_x, self.prev_camera_y = self.camera_x, self.camera_y
         self.camera_x += (target_cam_x - self.camera_x) * 0.1
         self.camera_y += (target_cam_y - self.camera_y) * 0.1
         
+        # Streaming de chunks alrededor de la cámara
+        self._apply_chunks(*self.streamer.update(self.camera_x, self.camera_y, config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        
         # Actualizar Partículas
-        for p in self.particles: 
-            p["x"] += p["vx"]
-            p["y"] += p["vy"]
-            p["life"] -= 2
-            if p["type"] == "fire":
-                p["size"] *= 0.95
-                p["vy"] -= 0.1 
-        self.particles = [p for p in self.particles if p["life"] > 0]
-
-    def draw_world_text_glitch(self, font, text, world_x, world_y, cam_x, cam_y, color, intensity=1.0):
+        self.particles.update()
+
+        # Expansión de las ondas de eco y reproducción de sus retornos
+        for p in self.pulses:
+            p["radius"] += config.ECHO_SPEED
+            p["age"] += 1
+            # Solo el anillo que la onda acaba de recorrer
+            self.memory.reveal_echo(p["echo"], p["radius"] - config.ECHO_SPEED, p["radius"])
+            while p["taps"] and p["taps"][0][0] <= p["age"]:
+                _, (vol_left, vol_right) = p["taps"].pop(0)
+                channel = self.echo_sound.play()
+                if channel: channel.set_volume(vol_left, vol_right)
+        self.pulses = [p for p in self.pulses if p["radius"] < p["max_radius"]]
+
+    def draw_world_text_glitch(self, font, text, world_x, world_y, cam_x, cam_y, color, intensity=1.0, surf=None):
         """Dibuja texto glitcheado en coordenadas del mundo"""
         screen_x = world_x - cam_x
         screen_y = world_y - cam_y
-        self.draw_text_glitch(font, text, screen_x, screen_y, color, intensity)
+        self.draw_text_glitch(font, text, screen_x, screen_y, color, intensity, surf)
 
-    def _draw_ghost(self, g, cam_x, cam_y):
-        x, y = g["x"], g["y"]
-        t = pygame.time.get_ticks() * 0.005
-        off_x = math.sin(t * 10) * 3
-        
-        points = [(x - 20 + off_x, y - 50), (x + 20 + off_x, y - 50), (x + 5, y + 40), (x - 5, y + 40)]
-        
-        s = pygame.Surface((150, 150), pygame.SRCALPHA)
-        # Dibujar silueta fantasmal
-        pygame.draw.polygon(s, (150, 255, 200, 80), [(p[0]-x+75, p[1]-y+75) for p in points])
-        pygame.draw.circle(s, (150, 255, 200, 100), (75 + int(off_x), 40), 25)
-        
-        # Ojos vacíos
-        pygame.draw.circle(s, (0, 0, 0, 150), (75 + int(off_x) - 10, 35), 4)
-        pygame.draw.circle(s, (0, 0, 0, 150), (75 + int(off_x) + 10, 35), 4)
-        pygame.draw.ellipse(s, (0, 0, 0, 150), (75 + int(off_x) - 5, 50, 10, 20)) # Boca grito
-        
-        self.screen.blit(s, (x - cam_x - 75, y - cam_y - 75), special_flags=pygame.BLEND_RGB_ADD)
-        
-        if g["phrase"]:
-            self.draw_world_text_glitch(self.font_small, g["phrase"], x, y - 80, cam_x, cam_y, (150, 255, 150), intensity=0.8)
+    @staticmethod
+    def _ghost_sprite(off):
+        """Silueta fantasmal para el vaivén `off` (px enteros); se cachea en _ghost_sprites."""
+        sprite = DemoScene._ghost_sprites.get(off)
+        if sprite is None:
+            sprite = pygame.Surface((150, 150), pygame.SRCALPHA)
+            points = [(55 + off, 25), (95 + off, 25), (80, 115), (70, 115)]
+            pygame.draw.polygon(sprite, (150, 255, 200, 80), points)
+            pygame.draw.circle(sprite, (150, 255, 200, 100), (75 + off, 40), 25)
+            # Ojos vacíos
+            pygame.draw.circle(sprite, (0, 0, 0, 150), (75 + off - 10, 35), 4)
+            pygame.draw.circle(sprite, (0, 0, 0, 150), (75 + off + 10, 35), 4)
+            pygame.draw.ellipse(sprite, (0, 0, 0, 150), (75 + off - 5, 50, 10, 20)) # Boca grito
+            DemoScene._ghost_sprites[off] = sprite
+        return sprite
+
+    def _phrase_surf(self, row, phrase):
+        # Las frases solo se rasterizan cuando cambian (GhostSystem.take_changed)
+        surf = self.phrase_surfs.get(row)
+        if surf is None:
+            surf = self.font_small.render(self.ghosts.phrase_text(phrase), True, (150, 255, 150))
+            self.phrase_surfs[row] = surf
+        return surf
 
-    def draw(self):
+    def _draw_ghost(self, row, x, y, phrase, sprite, cam_x, cam_y):
+        self.screen.blit(sprite, (x - cam_x - 75, y - cam_y - 75), special_flags=pygame.BLEND_RGB_ADD)
+        if phrase >= 0:
+            self.draw_world_text_glitch(self.font_small, None, x, y - 80, cam_x, cam_y, (150, 255, 150),
+                                        intensity=0.8, surf=self._phrase_surf(row, phrase))
+
+    def draw(self, alpha=1.0):
         self.screen.fill(config.BLACK)
-        cam_x, cam_y = int(self.camera_x), int(self.camera_y)
+        # Cámara interpolada entre los dos últimos pasos de simulación
+        cam_x = int(self.prev_camera_x + (self.camera_x - self.prev_camera_x) * alpha)
+        cam_y = int(self.prev_camera_y + (self.camera_y - self.prev_camera_y) * alpha)
         
         # Grid Holográfico de fondo
         grid_size = 100
@@ -327,71 +507,106 @@ class DemoScene(Scene):
         for y in range(start_y, cam_y + config.SCREEN_HEIGHT + grid_size, grid_size):
             pygame.draw.line(self.screen, (30, 30, 40), (0, y - cam_y), (config.SCREEN_WIDTH, y - cam_y))
             
-        # Muros del mundo
-        border_rect = pygame.Rect(0 - cam_x, 0 - cam_y, self.world_width, self.world_height)
-        pygame.draw.rect(self.screen, config.WALL_COLOR, border_rect, 20)
-        
-        # Dibujar Fantasmas (Solo si Sombra)
+        # Tiles de los chunks cargados (superficies pre-rasterizadas)
+        cs = self.level.chunk_size
+        for (ccx, ccy), layer in self.tile_layers.items():
+            self.screen.blit(layer, (ccx * cs - cam_x, ccy * cs - cam_y))
+
+        # Muros de los chunks cargados
+        view_right, view_bottom = cam_x + config.SCREEN_WIDTH, cam_y + config.SCREEN_HEIGHT
+        for _, x1, y1, x2, y2, _ in self.walls.values():
+            if max(x1, x2) < cam_x - 20 or min(x1, x2) > view_right + 20 or max(y1, y2) < cam_y - 20 or min(y1, y2) > view_bottom + 20:
+                continue
+            pygame.draw.line(self.screen, config.WALL_COLOR, (x1 - cam_x, y1 - cam_y), (x2 - cam_x, y2 - cam_y), 20)
+        
+        # Culling: solo fantasmas dentro de la cámara (con margen para sprite y frase)
+        margin = 400
+        visible_ghosts = []
+        moved, changed = self.ghosts.take_changed()
+        if moved:
+            self.phrase_surfs.clear()
+        else:
+            for row in changed:
+                self.phrase_surfs.pop(row, None)
         if self.player.char_type == "sombra":
-            for g in self.ghosts: self._draw_ghost(g, cam_x, cam_y)
+            visible = self.ghosts.in_rect(
+                cam_x - margin, cam_y - margin, cam_x + config.SCREEN_WIDTH + margin, cam_y + config.SCREEN_HEIGHT + margin)
+            visible_ghosts = [(row, *values) for row, values in zip(visible, self.ghosts.rows("x", "y", "phrase", indices=visible))]
+
+        # Dibujar Fantasmas (Solo si Sombra); todos comparten el vaivén del frame
+        sprite = self._ghost_sprite(int(math.sin(pygame.time.get_ticks() * 0.05) * 3))
+        for row, gx, gy, phrase in visible_ghosts: self._draw_ghost(row, gx, gy, phrase, sprite, cam_x, cam_y)
             
-        # Dibujar Partículas
-        for p in self.particles:
-            color = p["color"]
-            if p["type"] == "fire":
-                if p["life"] > 60: color = (255, 255, 100) 
-                elif p["life"] > 30: color = (255, 100, 0)
+        # Dibujar Partículas (las partículas viven poco y se mueven cada frame: basta un test de límites)
+        visible_particles = list(self.particles.rows(self.particles.visible(
+            cam_x - 100, cam_y - 100, cam_x + config.SCREEN_WIDTH + 100, cam_y + config.SCREEN_HEIGHT + 100)))
+        for px, py, size, life, kind, r, g, b in visible_particles:
+            color = (r, g, b)
+            if kind == PARTICLE_FIRE:
+                if life > 60: color = (255, 255, 100) 
+                elif life > 30: color = (255, 100, 0)
                 else: color = (80, 0, 0) 
             
-            surf = pygame.Surface((int(p["size"])*2, int(p["size"])*2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, (*color, 200), (int(p["size"]), int(p["size"])), int(p["size"]))
-            self.screen.blit(surf, (p["x"] - cam_x - p["size"], p["y"] - cam_y - p["size"]), special_flags=pygame.BLEND_RGB_ADD)
+            surf = pygame.Surface((int(size)*2, int(size)*2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (*color, 200), (int(size), int(size)), int(size))
+            self.screen.blit(surf, (px - cam_x - size, py - cam_y - size), special_flags=pygame.BLEND_RGB_ADD)
             
         # Dibujar Jugador
-        self.player.draw(self.screen, cam_x, cam_y)
+        self.player.draw(self.screen, cam_x, cam_y, alpha)
         
-        # Efecto de Castigo (Pantalla Roja)
+        # Efecto de Castigo (Pantalla Roja): destello del post-procesado sobre el frame entero
         if self.punishment_mode > 0 and self.punishment_mode % 4 < 2:
-            self.screen.fill(config.RED_BLOOD) 
+            self.post_fx.flash = 0.85
+            self.post_fx.flash_color = config.RED_BLOOD
         else:
             # --- SISTEMA DE ILUMINACIÓN ACÚSTICA ---
             darkness = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.SRCALPHA)
             darkness.fill((0, 0, 0, 250)) # Casi oscuridad total
             
+            # Lo recordado queda en penumbra: una sola capa escalada desde el mapa de memoria
+            memory_layer, memory_pos = self.memory.layer(cam_x, cam_y, config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+            darkness.blit(memory_layer, memory_pos, special_flags=pygame.BLEND_RGBA_MIN)
+            
             # Recortar visión del jugador
             pygame.draw.circle(darkness, (0, 0, 0, 0), (int(self.player.x - cam_x), int(self.player.y - cam_y)), int(self.vision_radius))
             
             # Recortar luz de fuego
-            for p in self.particles:
-                if p["type"] == "fire":
-                    pygame.draw.circle(darkness, (0, 0, 0, 0), (int(p["x"] - cam_x), int(p["y"] - cam_y)), int(p["size"] * 2.5))
+            for px, py, size, life, kind, r, g, b in visible_particles:
+                if kind == PARTICLE_FIRE:
+                    pygame.draw.circle(darkness, (0, 0, 0, 0), (int(px - cam_x), int(py - cam_y)), int(size * 2.5))
             
-            # Recortar pulsos de eco
-            for p in self.pulses:
-                pygame.draw.circle(darkness, (0, 0, 0, 0), (int(p["x"] - cam_x), int(p["y"] - cam_y)), int(p["radius"]))
+            # Recortar pulsos de eco (solo hasta donde el sonido llega, sin atravesar muros)
+            pulse_outlines = [[(px - cam_x, py - cam_y) for px, py in p["echo"].outline(p["radius"])] for p in self.pulses]
+            for outline in pulse_outlines:
+                pygame.draw.polygon(darkness, (0, 0, 0, 0), outline)
                 
             # Sombra ve fantasmas en la oscuridad
-            if self.player.char_type == "sombra":
-                for g in self.ghosts:
-                    pygame.draw.circle(darkness, (0, 0, 0, 0), (g["x"]-cam_x, g["y"]-cam_y), 30)
+            for _, gx, gy, _ in visible_ghosts:
+                pygame.draw.circle(darkness, (0, 0, 0, 0), (gx - cam_x, gy - cam_y), 30)
             
             self.screen.blit(darkness, (0, 0))
         
         # Dibujar las ondas de Eco sobre la oscuridad
         for p in self.pulses:
-            p["radius"] += 10
             surf = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.SRCALPHA)
             # Desvanecer borde
-            alpha = max(0, 200 - int(p["radius"] * 0.5))
-            pygame.draw.circle(surf, (*p["color"], alpha), (int(p["x"] - cam_x), int(p["y"] - cam_y)), int(p["radius"]), 5)
+            edge_alpha = max(0, 200 - int(p["radius"] * 0.5))
+            outline = [(px - cam_x, py - cam_y) for px, py in p["echo"].outline(p["radius"])]
+            pygame.draw.polygon(surf, (*p["color"], edge_alpha), outline, 5)
+            # Superficies tocadas por la onda, coloreadas por material
+            for hx, hy, mat in p["echo"].reached_hits(p["radius"]):
+                pygame.draw.circle(surf, (*MATERIAL_COLORS.get(mat, p["color"]), edge_alpha), (int(hx - cam_x), int(hy - cam_y)), 3)
             self.screen.blit(surf, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
-            
-        self.pulses = [p for p in self.pulses if p["radius"] < p["max_radius"]]
         
         # UI
         self.draw_text_shadow(self.font_small, f"COMANDO: {self.last_cmd_display}", config.LIGHT_BLUE, 10, 10)
-        if self.saving_timer > 0:
+        if self.save_pending:
              self.draw_centered_text(self.font_medium, "GUARDANDO...", config.YELLOW_ICON, config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT - 50)
+        elif self.saving_timer > 0:
+             if self.save_ok:
+                 self.draw_centered_text(self.font_medium, "JUEGO GUARDADO", config.YELLOW_ICON, config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT - 50)
+             else:
+                 self.draw_centered_text(self.font_medium, "ERROR AL GUARDAR", config.RED_BLOOD, config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT - 50)
              
         self.screen.blit(self.vignette_surf, (0, 0))
         self.draw_fade()
\ No newline at end of file
@@ -0,0 +1,280 @@
+# echo_memory.py
+# Memoria de lo revelado por el eco y la luz: un mapa de baja resolución de todo el mundo que
+# se va olvidando. Cada celda guarda la intensidad con la que se reveló y el paso en que ocurrió;
+# el olvido se calcula al leerla, así que nada recorre el mapa entero por paso.
+import array
+import math
+import sys
+import pygame
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MEMORY_CELL = 16               # Píxeles del mundo por celda de memoria
+MEMORY_FADE_STEPS = 60 * 90    # Pasos hasta olvidar por completo una celda revelada al máximo
+MEMORY_MIN_ALPHA = 170         # Oscuridad sobre una celda recordada al máximo (la normal es 250)
+MEMORY_DARK_ALPHA = 250
+MEMORY_REDRAW_STEPS = 4        # Lo revelado se repinta en la capa como mucho cada tantos pasos
+# La capa entera se recalcula cada tantos pasos (lo que tarda el olvido en mover un punto de
+# alfa); entre medias solo se repinta lo revelado y lo que entra por el borde al mover la cámara
+MEMORY_REFRESH_STEPS = 64
+DIRTY_TILE = 4                 # Celdas por lado de las baldosas con que se apunta lo revelado
+
+
+class EchoMemory:
+    """Mapa de exploración con olvido. Solo se tocan las celdas dentro del pulso o la visión."""
+    def __init__(self, world_width, world_height, cell=MEMORY_CELL):
+        self.cell = cell
+        self.cols = int(math.ceil(world_width / cell))
+        self.rows = int(math.ceil(world_height / cell))
+        self.step = 0
+        self.rate = 255.0 / MEMORY_FADE_STEPS
+        n = self.cols * self.rows
+        if NUMPY_AVAILABLE:
+            self.level = np.zeros((self.rows, self.cols), dtype=np.float32)
+            self.stamp = np.zeros((self.rows, self.cols), dtype=np.int32)
+        else:
+            self.level = array.array('f', bytes(4 * n))
+            self.stamp = array.array('i', bytes(4 * n))
+        self._layer = None  # Con NumPy: {"origin", "size", "step", "painted", "surf"}; sin NumPy: (clave, superficie)
+        self._dirty = set() # Baldosas (tx, ty) con celdas reveladas desde el último repintado
+
+    def tick(self):
+        self.step += 1
+
+    def _window(self, x, y, radius):
+        # Celdas (c0, r0, c1, r1) que pueden quedar dentro del círculo, recortadas al mundo
+        c0 = max(0, int((x - radius) // self.cell))
+        r0 = max(0, int((y - radius) // self.cell))
+        c1 = min(self.cols, int((x + radius) // self.cell) + 1)
+        r1 = min(self.rows, int((y + radius) // self.cell) + 1)
+        return c0, r0, c1, r1
+
+    def _current(self, level, stamp):
+        return np.maximum(level - (self.step - stamp) * self.rate, 0.0)
+
+    def reveal_circle(self, x, y, radius, strength=255):
+        """Recuerda el círculo (la visión del jugador)."""
+        self._reveal(x, y, 0.0, radius, strength)
+
+    def reveal_echo(self, echo, inner, outer, strength=255):
+        """Recuerda el anillo [inner, outer] de un pulso de eco, sin pasar de donde chocó cada rayo."""
+        self._reveal(echo.x, echo.y, inner, outer, strength, echo)
+
+    def _reveal(self, x, y, inner, outer, strength, echo=None):
+        if outer <= 0:
+            return
+        c0, r0, c1, r1 = self._window(x, y, outer)
+        if c0 >= c1 or r0 >= r1:
+            return
+        cell = self.cell
+        if NUMPY_AVAILABLE:
+            cx = (np.arange(c0, c1) + 0.5) * cell - x
+            cy = (np.arange(r0, r1) + 0.5) * cell - y
+            d = np.hypot(cx[None, :], cy[:, None])
+            mask = (d >= inner) & (d <= outer)
+            if echo is not None:
+                n = len(echo.dist)
+                ray = np.rint(np.arctan2(cy[:, None], cx[None, :]) * n / (2 * math.pi)).astype(np.int64) % n
+                mask &= d <= np.asarray(echo.dist)[ray] + cell
+            if not mask.any():
+                return
+            # Solo las baldosas tocadas: el anillo de un eco no marca todo su recuadro
+            t = DIRTY_TILE
+            tiles = np.logical_or.reduceat(mask, np.r_[0, t - r0 % t:r1 - r0:t], axis=0)
+            tiles = np.logical_or.reduceat(tiles, np.r_[0, t - c0 % t:c1 - c0:t], axis=1)
+            ty, tx = np.nonzero(tiles)
+            self._dirty.update(zip((tx + c0 // t).tolist(), (ty + r0 // t).tolist()))
+            level = self.level[r0:r1, c0:c1]
+            stamp = self.stamp[r0:r1, c0:c1]
+            level[mask] = np.maximum(self._current(level[mask], stamp[mask]), strength)
+            stamp[mask] = self.step
+            return
+        n = len(echo.dist) if echo is not None else 0
+        for r in range(r0, r1):
+            py = (r + 0.5) * cell - y
+            for c in range(c0, c1):
+                px = (c + 0.5) * cell - x
+                d = math.hypot(px, py)
+                if d < inner or d > outer:
+                    continue
+                if echo is not None and d > echo.dist[int(round(math.atan2(py, px) * n / (2 * math.pi))) % n] + cell:
+                    continue
+                i = r * self.cols + c
+                current = max(0.0, self.level[i] - (self.step - self.stamp[i]) * self.rate)
+                self.level[i] = max(current, strength)
+                self.stamp[i] = self.step
+
+    def intensity(self, c0, r0, c1, r1):
+        """Intensidad actual (0..255) de la ventana de celdas; fuera del mundo vale 0.
+        Con NumPy devuelve un array (filas, columnas); sin NumPy, una lista de filas."""
+        w, h = c1 - c0, r1 - r0
+        vc0, vr0 = max(0, c0), max(0, r0)
+        vc1, vr1 = min(self.cols, c1), min(self.rows, r1)
+        if NUMPY_AVAILABLE:
+            out = np.zeros((h, w), dtype=np.float32)
+            if vc0 < vc1 and vr0 < vr1:
+                out[vr0 - r0:vr1 - r0, vc0 - c0:vc1 - c0] = self._current(
+                    self.level[vr0:vr1, vc0:vc1], self.stamp[vr0:vr1, vc0:vc1])
+            return out
+        out = [[0.0] * w for _ in range(h)]
+        for r in range(vr0, vr1):
+            row = out[r - r0]
+            for c in range(vc0, vc1):
+                i = r * self.cols + c
+                row[c - c0] = max(0.0, self.level[i] - (self.step - self.stamp[i]) * self.rate)
+        return out
+
+    def _dirty_windows(self):
+        """Baldosas pendientes agrupadas en tramos horizontales: [(c0, r0, c1, r1)] en celdas."""
+        windows = []
+        for tx, ty in sorted(self._dirty, key=lambda t: (t[1], t[0])):
+            if windows and windows[-1][1] == ty * DIRTY_TILE and windows[-1][2] == tx * DIRTY_TILE:
+                windows[-1][2] += DIRTY_TILE
+            else:
+                windows.append([tx * DIRTY_TILE, ty * DIRTY_TILE, (tx + 1) * DIRTY_TILE, (ty + 1) * DIRTY_TILE])
+        return windows
+
+    def _alpha(self, c0, r0, c1, r1):
+        """Alfa (filas * cell, columnas * cell) de la ventana, interpolada entre centros de celda.
+
+        Se lee una celda más por cada lado, así un trozo repintado coincide exactamente con
+        la misma zona de la capa completa (no hay costuras).
+        """
+        span = (MEMORY_DARK_ALPHA - MEMORY_MIN_ALPHA) / 255.0
+        padded = (MEMORY_DARK_ALPHA - self.intensity(c0 - 1, r0 - 1, c1 + 1, r1 + 1) * span).astype(np.float32)
+        # Primero las columnas sobre la ventana pequeña; las filas, ya a tamaño completo, al final
+        by_cols = np.ascontiguousarray(self._upsample(padded.T).T)
+        return self._upsample(by_cols)
+
+    def _upsample(self, values):
+        # Interpola el eje 0 (con una celda de margen a cada lado): `cell` muestras por celda,
+        # las de la primera mitad entre la celda anterior y esta, las demás entre esta y la siguiente
+        cell = self.cell
+        half = cell // 2
+        s = (np.arange(cell, dtype=np.float32) + 0.5) / cell - 0.5
+        t = np.where(s < 0, s + 1.0, s)[:, None]
+        prev, cur, nxt = values[:-2], values[1:-1], values[2:]
+        out = np.empty((len(cur), cell) + values.shape[1:], dtype=np.float32)
+        # Sin temporales del tamaño de la salida
+        np.multiply((cur - prev)[:, None], t[:half], out=out[:, :half])
+        out[:, :half] += prev[:, None]
+        np.multiply((nxt - cur)[:, None], t[half:], out=out[:, half:])
+        out[:, half:] += cur[:, None]
+        return out.reshape((len(cur) * cell,) + values.shape[1:])
+
+    def _paint(self, layer, x0, y0, x1, y1):
+        # Repinta las celdas [x0, x1) x [y0, y1) de la capa (coordenadas de la ventana)
+        c0, r0 = layer["origin"]
+        cell = self.cell
+        alpha = pygame.surfarray.pixels_alpha(layer["surf"]).T  # [y, x]: se escribe por filas
+        alpha[y0 * cell:y1 * cell, x0 * cell:x1 * cell] = self._alpha(c0 + x0, r0 + y0, c0 + x1, r0 + y1)
+        del alpha  # Libera el bloqueo de la superficie
+
+    def layer(self, cam_x, cam_y, width, height):
+        """(superficie, posición en pantalla) con la oscuridad que dejan los recuerdos.
+
+        Es una capa de la ventana visible, escalada de celdas a píxeles; se combina con la
+        máscara de oscuridad con BLEND_RGBA_MIN. Con NumPy se conserva entre frames: al mover
+        la cámara se desplaza y solo se calculan las celdas que entran y las reveladas.
+        """
+        cell = self.cell
+        c0, r0 = int(cam_x // cell), int(cam_y // cell)
+        # Tamaño fijo (cubre la pantalla con cualquier desplazamiento): la capa no cambia de tamaño
+        c1, r1 = c0 + int(width // cell) + 2, r0 + int(height // cell) + 2
+        pos = (c0 * cell - cam_x, r0 * cell - cam_y)
+        if not NUMPY_AVAILABLE:
+            self._dirty.clear()
+            return self._layer_fallback(c0, r0, c1, r1), pos
+        w, h = c1 - c0, r1 - r0
+        layer = self._layer
+        if layer is not None:
+            dc, dr = c0 - layer["origin"][0], r0 - layer["origin"][1]
+        if (layer is None or layer["size"] != (w, h) or self.step - layer["step"] >= MEMORY_REFRESH_STEPS
+                or abs(dc) >= w or abs(dr) >= h):
+            surf = pygame.Surface((w * cell, h * cell), pygame.SRCALPHA)
+            layer = self._layer = {"origin": (c0, r0), "size": (w, h), "step": self.step,
+                                   "painted": self.step, "surf": surf}
+            self._paint(layer, 0, 0, w, h)
+            self._dirty.clear()
+            return surf, pos
+        if dc or dr:
+            layer["surf"].scroll(-dc * cell, -dr * cell)
+            layer["origin"] = (c0, r0)
+            # Franjas que entran por los bordes
+            if dc:
+                self._paint(layer, *((w - dc, 0, w, h) if dc > 0 else (0, 0, -dc, h)))
+            if dr:
+                self._paint(layer, *((0, h - dr, w, h) if dr > 0 else (0, 0, w, -dr)))
+        if self.step - layer["painted"] < MEMORY_REDRAW_STEPS:
+            return layer["surf"], pos
+        layer["painted"] = self.step
+        patches = []
+        for wc0, wr0, wc1, wr1 in self._dirty_windows():
+            x0, y0 = max(0, wc0 - c0), max(0, wr0 - r0)
+            x1, y1 = min(w, wc1 - c0), min(h, wr1 - r0)
+            if x0 < x1 and y0 < y1:
+                # Una celda de margen: la interpolación de las vecinas también cambia
+                patches.append((max(0, x0 - 1), max(0, y0 - 1), min(w, x1 + 1), min(h, y1 + 1)))
+        self._dirty.clear()
+        if sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in patches) * 2 > w * h:
+            patches = [(0, 0, w, h)]  # Con medio recuadro revuelto (p. ej. un eco) sale más barato entero
+        for patch in patches:
+            self._paint(layer, *patch)
+        return layer["surf"], pos
+
+    def _layer_fallback(self, c0, r0, c1, r1):
+        # Sin NumPy: capa completa con smoothscale, cada MEMORY_REDRAW_STEPS o al mover la ventana
+        cell = self.cell
+        key = (c0, r0, c1, r1, self.step // MEMORY_REDRAW_STEPS)
+        if self._layer is None or self._layer[0] != key:
+            values = self.intensity(c0, r0, c1, r1)
+            small = pygame.Surface((c1 - c0, r1 - r0), pygame.SRCALPHA)
+            small.fill((0, 0, 0, MEMORY_DARK_ALPHA))
+            span = (MEMORY_DARK_ALPHA - MEMORY_MIN_ALPHA) / 255.0
+            for r, row in enumerate(values):
+                for c, v in enumerate(row):
+                    if v > 0:
+                        small.set_at((c, r), (0, 0, 0, int(MEMORY_DARK_ALPHA - v * span)))
+            scaled = pygame.transform.smoothscale(small, ((c1 - c0) * cell, (r1 - r0) * cell))
+            self._layer = (key, scaled)
+        return self._layer[1]
+
+    def snapshot(self):
+        """Nivel (un byte) y paso de cada celda, más el paso actual, para guardar partida.
+
+        Se guarda sin olvidar: solo cambian las celdas reveladas desde el último guardado, y el
+        olvido se vuelve a calcular al cargar a partir de los pasos.
+        """
+        if NUMPY_AVAILABLE:
+            level = self.level.astype(np.uint8).tobytes()
+            stamp = self.stamp.astype("<i4").tobytes()
+        else:
+            level = bytes(int(v) for v in self.level)
+            stamps = array.array('i', self.stamp)
+            if sys.byteorder == "big":
+                stamps.byteswap()
+            stamp = stamps.tobytes()
+        return {"cell": self.cell, "cols": self.cols, "rows": self.rows, "step": self.step,
+                "level": level, "stamp": stamp}
+
+    def restore(self, saved):
+        """Recupera un snapshot(); se ignora si el mapa guardado tiene otras dimensiones."""
+        if (saved["cell"], saved["cols"], saved["rows"]) != (self.cell, self.cols, self.rows):
+            return
+        self.step = saved["step"]
+        if NUMPY_AVAILABLE:
+            self.level[:] = np.frombuffer(saved["level"], dtype=np.uint8).reshape(self.rows, self.cols)
+            self.stamp[:] = np.frombuffer(saved["stamp"], dtype="<i4").reshape(self.rows, self.cols)
+        else:
+            stamps = array.array('i')
+            stamps.frombytes(saved["stamp"])
+            if sys.byteorder == "big":
+                stamps.byteswap()
+            self.level[:] = array.array('f', list(saved["level"]))  # Con bytes, array() los leería como floats
+            self.stamp[:] = stamps
+        self._layer = None
+        self._dirty.clear()
@@ -0,0 +1,103 @@
+# echo_synth.py
+# Síntesis del ping de ecolocalización con la acústica del entorno: retardo de ida y vuelta,
+# eco repetido (filtro peine) y cola de reverberación según la distancia a lo más cercano.
+# Las variantes se renderizan una vez por tramo de distancia y se cachean.
+import array
+import math
+import threading
+import pygame
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SAMPLE_RATE = 44100
+PX_PER_METRE = 32        # Un tile = 1 m
+SPEED_OF_SOUND = 343.0   # m/s
+BUCKET_PX = 40           # Ancho de cada tramo de distancia cacheado
+PING_FREQ = 800
+PING_SECONDS = 0.5
+
+
+class EchoSynth:
+    """Ping seco + variantes con eco por tramos de distancia (hasta `max_distance` px)."""
+    def __init__(self, max_distance=600, bucket=BUCKET_PX):
+        init = pygame.mixer.get_init()
+        self.rate = init[0] if init else SAMPLE_RATE
+        self.channels = init[2] if init else 1
+        self.bucket = bucket
+        self.max_distance = max_distance
+        self.max_bucket = int(max_distance // bucket)
+        self.cache = {}
+        self.lock = threading.Lock()
+        n = int(self.rate * PING_SECONDS)
+        ping = [math.sin(2 * math.pi * PING_FREQ * i / self.rate) * math.exp(-6 * i / self.rate) for i in range(n)]
+        self.ping = np.array(ping) if NUMPY_AVAILABLE else ping
+        self.dry = self._to_sound(self.ping)
+
+    def bucket_of(self, distance):
+        return max(0, min(int(distance // self.bucket), self.max_bucket))
+
+    def sound(self, distance):
+        """Variante para un obstáculo a `distance` px (lo más lejano = campo abierto, casi seco)."""
+        key = self.bucket_of(distance)
+        with self.lock:
+            sound = self.cache.get(key)
+            if sound is None:
+                sound = self._to_sound(self._render(key))
+                self.cache[key] = sound
+        return sound
+
+    def prepare(self):
+        """Renderiza todos los tramos (la precarga lo llama en segundo plano)."""
+        for key in range(self.max_bucket + 1):
+            self.sound(key * self.bucket)
+
+    def acoustics(self, key):
+        """(retardo en muestras, ganancia por rebote, rebotes, RT60 en s) del tramo `key`."""
+        distance = (key + 0.5) * self.bucket
+        closeness = max(0.0, 1.0 - distance / self.max_distance)
+        delay = max(1, int(2 * distance / PX_PER_METRE / SPEED_OF_SOUND * self.rate))
+        gain = 0.1 + 0.55 * closeness  # Paredes cercanas: eco fuerte y repetido (flutter)
+        bounces = max(1, int(math.log(0.02) / math.log(gain)))
+        rt60 = 0.2 + 1.0 * distance / self.max_distance  # Espacios grandes: cola más larga
+        return delay, gain, bounces, rt60
+
+    def _render(self, key):
+        delay, gain, bounces, rt60 = self.acoustics(key)
+        if not NUMPY_AVAILABLE:
+            # Sin NumPy: solo el peine (sin cola difusa)
+            out = [0.0] * (len(self.ping) + delay * bounces)
+            for k in range(bounces + 1):
+                g = gain ** k
+                offset = k * delay
+                for i, v in enumerate(self.ping):
+                    out[offset + i] += v * g
+            return out
+        # Respuesta al impulso: directo + rebotes del peine + cola de ruido con caída exponencial
+        tail = int(rt60 * self.rate)
+        ir = np.zeros(delay * bounces + tail + 1)
+        ir[0] = 1.0
+        ir[delay * np.arange(1, bounces + 1)] += gain ** np.arange(1, bounces + 1)
+        rng = np.random.default_rng(key)  # Misma cola para el mismo tramo
+        t = np.arange(tail) / self.rate
+        ir[delay:delay + tail] += rng.uniform(-1, 1, tail) * np.exp(-6.9 * t / rt60) * 0.08 * gain
+        # Convolución por FFT
+        n = len(self.ping) + len(ir) - 1
+        size = 1 << (n - 1).bit_length()
+        return np.fft.irfft(np.fft.rfft(self.ping, size) * np.fft.rfft(ir, size), size)[:n]
+
+    def _to_sound(self, samples):
+        if NUMPY_AVAILABLE:
+            samples = np.asarray(samples, dtype=np.float64)
+            peak = max(1.0, float(np.abs(samples).max()))
+            pcm = (samples * (32767 * 0.9 / peak)).astype(np.int16)
+            if self.channels > 1:
+                pcm = np.repeat(pcm, self.channels)
+            return pygame.mixer.Sound(buffer=pcm.tobytes())
+        peak = max(1.0, max(abs(v) for v in samples))
+        scale = 32767 * 0.9 / peak
+        pcm = array.array('h', (int(v * scale) for v in samples for _ in range(self.channels)))
+        return pygame.mixer.Sound(buffer=pcm)
@@ -0,0 +1,182 @@
+# echolocation.py
+# Motor de ecolocalización: rayos desde el jugador contra los segmentos de muro del nivel.
+import math
+import levels
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Fracción de energía que devuelve cada material
+MATERIAL_REFLECTION = {
+    levels.MATERIAL_STONE: 0.8,
+    levels.MATERIAL_METAL: 0.95,
+    levels.MATERIAL_WOOD: 0.5,
+    levels.MATERIAL_FLESH: 0.2,
+}
+
+MATERIAL_COLORS = {
+    levels.MATERIAL_STONE: (100, 200, 255),
+    levels.MATERIAL_METAL: (240, 240, 240),
+    levels.MATERIAL_WOOD: (255, 180, 0),
+    levels.MATERIAL_FLESH: (180, 0, 0),
+}
+
+
+class EchoResult:
+    """Resultado de un barrido: por rayo, distancia al impacto (o max_range), punto y material (-1 = nada)."""
+    __slots__ = ("x", "y", "dx", "dy", "dist", "hit", "hit_x", "hit_y", "material", "max_range")
+
+    def __init__(self, x, y, dx, dy, dist, hit, material, max_range):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.dist = dist
+        self.hit = hit
+        self.material = material
+        self.max_range = max_range
+        if NUMPY_AVAILABLE:
+            self.hit_x = x + dx * dist
+            self.hit_y = y + dy * dist
+        else:
+            self.hit_x = [x + a * d for a, d in zip(dx, dist)]
+            self.hit_y = [y + b * d for b, d in zip(dy, dist)]
+
+    def __len__(self):
+        return len(self.dist)
+
+    def outline(self, radius):
+        """Polígono de lo que la onda ha alcanzado con este radio (recortado por los muros)."""
+        if NUMPY_AVAILABLE:
+            reach = np.minimum(self.dist, radius)
+            return np.column_stack((self.x + self.dx * reach, self.y + self.dy * reach)).tolist()
+        return [(self.x + a * min(d, radius), self.y + b * min(d, radius)) for a, b, d in zip(self.dx, self.dy, self.dist)]
+
+    def reached_hits(self, radius):
+        """(x, y, material) de los impactos que la onda ya ha tocado."""
+        if NUMPY_AVAILABLE:
+            idx = np.flatnonzero(self.hit & (self.dist <= radius))
+            return zip(self.hit_x[idx].tolist(), self.hit_y[idx].tolist(), self.material[idx].tolist())
+        return [(hx, hy, m) for hx, hy, m, h, d in zip(self.hit_x, self.hit_y, self.material, self.hit, self.dist)
+                if h and d <= radius]
+
+    def nearest_hit(self):
+        """(distancia, ángulo) del impacto más cercano, o None si ningún rayo chocó."""
+        if NUMPY_AVAILABLE:
+            if not self.hit.any():
+                return None
+            i = int(np.argmin(np.where(self.hit, self.dist, np.inf)))
+        else:
+            hits = [i for i, h in enumerate(self.hit) if h]
+            if not hits:
+                return None
+            i = min(hits, key=lambda j: self.dist[j])
+        return float(self.dist[i]), math.atan2(float(self.dy[i]), float(self.dx[i]))
+
+    def returns(self, sectors=8):
+        """Ecos agrupados por sector angular: [(distancia, ángulo, reflexión)] del impacto más cercano de cada sector."""
+        n = len(self.dist)
+        per_sector = max(1, n // sectors)
+        out = []
+        for s in range(0, n, per_sector):
+            best = None
+            for i in range(s, min(n, s + per_sector)):
+                if self.hit[i] and (best is None or self.dist[i] < self.dist[best]):
+                    best = i
+            if best is not None:
+                angle = math.atan2(float(self.dy[best]), float(self.dx[best]))
+                out.append((float(self.dist[best]), angle, MATERIAL_REFLECTION.get(int(self.material[best]), 0.5)))
+        return out
+
+
+class EchoCaster:
+    """Lanza un abanico de rayos en un solo lote NumPy contra todos los muros cercanos."""
+    def __init__(self, num_rays=360, max_range=600):
+        if not NUMPY_AVAILABLE:
+            # Sin NumPy el barrido es un bucle Python: menos rayos para mantener el coste
+            num_rays = min(num_rays, 48)
+        self.num_rays = num_rays
+        self.max_range = max_range
+        angles = [2 * math.pi * i / num_rays for i in range(num_rays)]
+        if NUMPY_AVAILABLE:
+            self.dx = np.cos(np.array(angles))
+            self.dy = np.sin(np.array(angles))
+            self.segments = np.zeros((0, 4))
+            self.materials = np.zeros(0, dtype=np.int16)
+        else:
+            self.dx = [math.cos(a) for a in angles]
+            self.dy = [math.sin(a) for a in angles]
+            self.segments = []
+            self.materials = []
+
+    def set_walls(self, walls):
+        """walls: [(id, x1, y1, x2, y2, material)] tal como los entrega levels.Chunk."""
+        if NUMPY_AVAILABLE:
+            if walls:
+                self.segments = np.array([w[1:5] for w in walls], dtype=np.float64)
+                self.materials = np.array([w[5] for w in walls], dtype=np.int16)
+            else:
+                self.segments = np.zeros((0, 4))
+                self.materials = np.zeros(0, dtype=np.int16)
+        else:
+            self.segments = [w[1:5] for w in walls]
+            self.materials = [w[5] for w in walls]
+
+    def cast(self, x, y):
+        if NUMPY_AVAILABLE:
+            return self._cast_numpy(x, y)
+        return self._cast_python(x, y)
+
+    def _cast_numpy(self, x, y):
+        n = self.num_rays
+        dist = np.full(n, float(self.max_range))
+        material = np.full(n, -1, dtype=np.int16)
+        seg = self.segments
+        if len(seg):
+            # Descartar muros cuyo rectángulo envolvente queda fuera del alcance
+            r = self.max_range
+            near = ((np.minimum(seg[:, 0], seg[:, 2]) <= x + r) & (np.maximum(seg[:, 0], seg[:, 2]) >= x - r) &
+                    (np.minimum(seg[:, 1], seg[:, 3]) <= y + r) & (np.maximum(seg[:, 1], seg[:, 3]) >= y - r))
+            seg = seg[near]
+            mats = self.materials[near]
+        if len(seg):
+            px, py = seg[:, 0] - x, seg[:, 1] - y          # (S,) origen del muro relativo al jugador
+            sx, sy = seg[:, 2] - seg[:, 0], seg[:, 3] - seg[:, 1]
+            dx, dy = self.dx[:, None], self.dy[:, None]    # (R, 1)
+            # o + t·d = p + u·s  ->  t = (p × s) / (d × s),  u = (p × d) / (d × s)
+            denom = dx * sy - dy * sx                      # (R, S)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = (px * sy - py * sx) / denom
+                u = (px * dy - py * dx) / denom
+            valid = (denom != 0) & (t > 0) & (u >= 0) & (u <= 1) & (t < self.max_range)
+            t = np.where(valid, t, np.inf)
+            nearest = np.argmin(t, axis=1)
+            best = t[np.arange(n), nearest]
+            hit = np.isfinite(best)
+            dist[hit] = best[hit]
+            material[hit] = mats[nearest[hit]]
+        else:
+            hit = np.zeros(n, dtype=bool)
+        return EchoResult(x, y, self.dx, self.dy, dist, hit, material, self.max_range)
+
+    def _cast_python(self, x, y):
+        dist, hit, material = [], [], []
+        for dx, dy in zip(self.dx, self.dy):
+            best, best_mat = self.max_range, -1
+            for (x1, y1, x2, y2), mat in zip(self.segments, self.materials):
+                sx, sy = x2 - x1, y2 - y1
+                denom = dx * sy - dy * sx
+                if denom == 0:
+                    continue
+                px, py = x1 - x, y1 - y
+                t = (px * sy - py * sx) / denom
+                u = (px * dy - py * dx) / denom
+                if 0 < t < best and 0 <= u <= 1:
+                    best, best_mat = t, mat
+            dist.append(best)
+            hit.append(best_mat >= 0)
+            material.append(best_mat)
+        return EchoResult(x, y, self.dx, self.dy, dist, hit, material, self.max_range)
@@ -2,12 +2,28 @@
 import pygame
 import math
 import random
+import array
 import config
+from spatial_hash import SpatialHash
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 class Player:
+    # Sin __dict__ por instancia: acceso a atributos más rápido y menos memoria
+    __slots__ = ("x", "y", "prev_x", "prev_y", "vx", "vy", "facing_x", "facing_y",
+                 "speed_mode", "is_crouching", "is_moving", "pulse_timer", "char_type",
+                 "anim_frame", "anim_timer", "fx_rng")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        # Posición del paso de simulación anterior (para interpolar el render)
+        self.prev_x = x
+        self.prev_y = y
         self.vx = 0
         self.vy = 0
         
@@ -26,6 +42,12 @@ class Player:
         # Animación
         self.anim_frame = 0
         self.anim_timer = 0
+        self.fx_rng = random  # La escena puede darle su stream de efectos
+
+    def set_position(self, x, y):
+        """Teletransporte: coloca al jugador sin interpolar desde la posición previa."""
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
 
     def set_direction(self, dx, dy):
         self.vx = dx
@@ -57,7 +79,7 @@ class Player:
     def set_character(self, char_type):
         self.char_type = char_type
 
-    def update(self):
+    def update(self, world_width=config.WORLD_WIDTH, world_height=config.WORLD_HEIGHT):
         # Velocidad base
         speed = config.SPEED_WALK
         if self.speed_mode == "correr": speed = config.SPEED_RUN
@@ -66,20 +88,24 @@ class Player:
         if self.is_crouching: speed = config.SPEED_SLOW
 
         # Movimiento
+        self.prev_x, self.prev_y = self.x, self.y
         self.x += self.vx * speed
         self.y += self.vy * speed
 
         # Límites del mundo
-        self.x = max(50, min(self.x, config.WORLD_WIDTH - 50))
-        self.y = max(50, min(self.y, config.WORLD_HEIGHT - 50))
+        self.x = max(50, min(self.x, world_width - 50))
+        self.y = max(50, min(self.y, world_height - 50))
 
         # Animación (Pulsación del implante / Glitch de sombra)
         self.pulse_timer += 0.1
         if self.is_moving:
             self.anim_timer += 1
         
-    def draw(self, surface, cam_x, cam_y):
-        cx, cy = int(self.x - cam_x), int(self.y - cam_y)
+    def draw(self, surface, cam_x, cam_y, alpha=1.0):
+        # alpha: fracción del paso de simulación transcurrida desde el último update
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        cx, cy = int(x - cam_x), int(y - cam_y)
         
         if self.char_type == "cero":
             self._draw_zero(surface, cx, cy)
@@ -128,16 +154,16 @@ class Player:
         
         # Efecto Glitch: Dibujar copias desplazadas con baja opacidad
         for i in range(3):
-            off_x = random.randint(-5, 5)
-            off_y = random.randint(-5, 5)
+            off_x = self.fx_rng.randint(-5, 5)
+            off_y = self.fx_rng.randint(-5, 5)
             
             # Silueta distorsionada
             ghost_surf = pygame.Surface((50, 80), pygame.SRCALPHA)
             points = [
-                (25, 0 + random.randint(0,5)), 
+                (25, 0 + self.fx_rng.randint(0,5)), 
                 (50, 20), 
-                (40 + random.randint(-5,5), 80), 
-                (10 + random.randint(-5,5), 80), 
+                (40 + self.fx_rng.randint(-5,5), 80), 
+                (10 + self.fx_rng.randint(-5,5), 80), 
                 (0, 20)
             ]
             # Color rojo oscuro semi-transparente para el glitch
@@ -157,13 +183,402 @@ class Player:
         # Ojos (Dos puntos rojos brillantes)
         eye_y = cy - 35
         # Parpadeo random
-        if random.random() > 0.05:
+        if self.fx_rng.random() > 0.05:
             pygame.draw.circle(surface, (255, 0, 0), (cx - 5, eye_y), 2)
             pygame.draw.circle(surface, (255, 0, 0), (cx + 5, eye_y), 2)
             
         # Aura de distorsión (Líneas horizontales)
         for _ in range(5):
-            ly = random.randint(cy - 40, cy + 40)
-            lx = random.randint(cx - 30, cx + 30)
-            w = random.randint(5, 20)
-            pygame.draw.line(surface, config.GLITCH_COLOR, (lx, ly), (lx + w, ly), 1)
\ No newline at end of file
+            ly = self.fx_rng.randint(cy - 40, cy + 40)
+            lx = self.fx_rng.randint(cx - 30, cx + 30)
+            w = self.fx_rng.randint(5, 20)
+            pygame.draw.line(surface, config.GLITCH_COLOR, (lx, ly), (lx + w, ly), 1)
+
+
+# --- ALMACENAMIENTO COLUMNAR DE ENTIDADES MASIVAS ---
+class EntityStore:
+    """Una columna tipada por campo en vez de un dict por entidad.
+
+    Tipos de campo: 'd' float64, 'i' int32, 'b' int8, 'B' uint8, None = objeto Python.
+    Con NumPy las columnas numéricas son buffers con capacidad y `store.campo` devuelve
+    una vista de las filas vivas (operable en bloque); sin NumPy son array.array.
+    """
+    def __init__(self, fields, capacity=64):
+        self.fields = dict(fields)
+        self.count = 0
+        self.capacity = capacity
+        self.columns = {}
+        for name, code in self.fields.items():
+            if code is None:
+                self.columns[name] = []
+            elif NUMPY_AVAILABLE:
+                self.columns[name] = np.zeros(capacity, dtype=np.dtype(code))
+            else:
+                self.columns[name] = array.array(code)
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns")
+        if columns is not None and name in columns:
+            col = columns[name]
+            if NUMPY_AVAILABLE and self.fields[name] is not None:
+                return col[:self.count]
+            return col
+        raise AttributeError(name)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, code in self.fields.items():
+            if code is not None:
+                col = np.zeros(self.capacity, dtype=np.dtype(code))
+                col[:self.count] = self.columns[name][:self.count]
+                self.columns[name] = col
+
+    def add(self, **values):
+        """Añade una fila y devuelve su índice."""
+        i = self.count
+        if NUMPY_AVAILABLE and i >= self.capacity:
+            self._grow()
+        for name, code in self.fields.items():
+            col = self.columns[name]
+            if code is None:
+                col.append(values.get(name))
+            elif NUMPY_AVAILABLE:
+                col[i] = values.get(name, 0)
+            else:
+                col.append(values.get(name, 0))
+        self.count += 1
+        return i
+
+    def filter(self, keep):
+        """Conserva solo las filas donde `keep` es verdadero (compactando las columnas)."""
+        if NUMPY_AVAILABLE:
+            idx = np.flatnonzero(keep)
+            kept = len(idx)
+            for name, code in self.fields.items():
+                col = self.columns[name]
+                if code is None:
+                    self.columns[name] = [col[j] for j in idx.tolist()]
+                else:
+                    col[:kept] = col[:self.count][idx]
+        else:
+            kept = 0
+            for name, code in self.fields.items():
+                values = [v for v, k in zip(self.columns[name], keep) if k]
+                self.columns[name] = values if code is None else array.array(code, values)
+                kept = len(values)
+        self.count = kept
+
+    def clear(self):
+        self.filter([False] * self.count)
+
+    def rows(self, *names, indices=None):
+        """Itera tuplas con valores Python nativos (sin escalares NumPy) de las columnas pedidas."""
+        cols = []
+        for name in names:
+            col = getattr(self, name)
+            if indices is not None:
+                if NUMPY_AVAILABLE and self.fields[name] is not None:
+                    col = col[indices]
+                else:
+                    col = [col[i] for i in indices]
+            cols.append(col.tolist() if hasattr(col, "tolist") else col)
+        return zip(*cols)
+
+
+PARTICLE_FIRE = 0
+PARTICLE_MORPH = 1
+
+class ParticleSystem:
+    """Partículas de fuego/transformación en columnas; se actualizan en bloque cuando hay NumPy."""
+    def __init__(self):
+        self.store = EntityStore({
+            "x": 'd', "y": 'd', "vx": 'd', "vy": 'd', "size": 'd',
+            "life": 'i', "kind": 'b', "r": 'B', "g": 'B', "b": 'B'
+        }, capacity=256)
+
+    def __len__(self):
+        return len(self.store)
+
+    def spawn(self, x, y, vx, vy, life, size, color, kind=PARTICLE_FIRE):
+        r, g, b = color
+        self.store.add(x=x, y=y, vx=vx, vy=vy, life=life, size=size, kind=kind, r=r, g=g, b=b)
+
+    def clear(self):
+        self.store.clear()
+
+    def update(self):
+        s = self.store
+        if not s.count:
+            return
+        x, y, vx, vy, size, life, kind = s.x, s.y, s.vx, s.vy, s.size, s.life, s.kind
+        if NUMPY_AVAILABLE:
+            # Vistas sobre los buffers: las operaciones in-place escriben en la columna
+            x += vx
+            y += vy
+            life -= 2
+            fire = kind == PARTICLE_FIRE
+            size[fire] *= 0.95
+            vy[fire] -= 0.1
+            alive = life > 0
+            if not alive.all():
+                s.filter(alive)
+        else:
+            for i in range(s.count):
+                x[i] += vx[i]
+                y[i] += vy[i]
+                life[i] -= 2
+                if kind[i] == PARTICLE_FIRE:
+                    size[i] *= 0.95
+                    vy[i] -= 0.1
+            if min(life) <= 0:
+                s.filter([l > 0 for l in life])
+
+    def visible(self, left, top, right, bottom):
+        """Índices de las partículas dentro del rectángulo de cámara."""
+        s = self.store
+        if NUMPY_AVAILABLE:
+            x, y = s.x, s.y
+            return np.flatnonzero((x >= left) & (x <= right) & (y >= top) & (y <= bottom))
+        return [i for i, (px, py) in enumerate(zip(s.x, s.y)) if left <= px <= right and top <= py <= bottom]
+
+    def rows(self, indices=None):
+        """Tuplas (x, y, size, life, kind, r, g, b)."""
+        return self.store.rows("x", "y", "size", "life", "kind", "r", "g", "b", indices=indices)
+
+    SNAPSHOT_FIELDS = ("x", "y", "vx", "vy", "size", "life", "kind", "r", "g", "b")
+
+    def snapshot(self):
+        """Lista de tuplas con todas las columnas (para guardar partida)."""
+        return list(self.store.rows(*self.SNAPSHOT_FIELDS))
+
+    def restore(self, records):
+        self.store.clear()
+        for rec in records:
+            self.store.add(**dict(zip(self.SNAPSHOT_FIELDS, rec)))
+
+
+GHOST_TALK_RADIUS = 250     # Distancia a la que un fantasma empieza a hablar (solo para Sombra)
+GHOST_PHRASE_STEPS = 180    # Pasos que dura cada frase antes de repetirse o cambiar
+GHOST_AWARE_RISE = 1 / 30   # Atención ganada por paso cerca del jugador
+GHOST_AWARE_DECAY = 1 / 120 # Atención perdida por paso lejos
+GHOST_ALERT_STEPS = 300     # Pasos que un fantasma alertado sigue persiguiendo tras oír al jugador
+GHOST_CATCH_RADIUS = 30     # Distancia a la que un perseguidor atrapa al jugador
+
+class GhostSystem:
+    """Fantasmas de lore en columnas: distancia al jugador, frases y atención se avanzan en bloque.
+
+    La frase es un índice en `phrases` (-1 = callado). `take_changed()` entrega al renderer
+    solo las filas cuya frase cambió, para que no vuelva a rasterizar el resto.
+    Las consultas por radio, rectángulo y vecino más cercano van por un SpatialHash cuyas
+    claves son ids estables (las filas se compactan al descargar chunks).
+    """
+    SNAPSHOT_FIELDS = ("chunk", "x", "y", "timer", "lore", "phrase")
+
+    def __init__(self, phrases, world_width=config.WORLD_WIDTH, world_height=config.WORLD_HEIGHT,
+                 talk_radius=GHOST_TALK_RADIUS, chunk_grid=None):
+        self.phrases = list(phrases)
+        self.lore_count = len(self.phrases)  # Las frases aleatorias salen solo del lore del nivel
+        self.talk_radius = talk_radius
+        self.store = EntityStore({
+            "x": 'd', "y": 'd', "timer": 'i', "phrase": 'i', "lore": 'i', "chunk": 'i', "awareness": 'd',
+            "alert": 'i', "id": 'i'
+        }, capacity=256)
+        self.index = SpatialHash(world_width, world_height)
+        # (tamaño de chunk, chunks en X, chunks en Y): los perseguidores cambian de chunk al moverse
+        self.chunk_grid = chunk_grid
+        self.row_of = {}  # id -> fila actual
+        self.next_id = 0
+        self.changed = set()
+        self.rows_moved = True
+
+    def __len__(self):
+        return len(self.store)
+
+    def _phrase_index(self, text):
+        if not text:
+            return -1
+        if text not in self.phrases:
+            self.phrases.append(text)  # Frase de una partida guardada que ya no está en el nivel
+        return self.phrases.index(text)
+
+    def add(self, x, y, lore=-1, chunk=0, timer=0, phrase=""):
+        key = self.next_id
+        self.next_id += 1
+        self.row_of[key] = self.store.add(x=x, y=y, timer=timer, phrase=self._phrase_index(phrase),
+                                          lore=lore, chunk=chunk, id=key)
+        self.index.insert(key, x, y)
+        self.rows_moved = True
+
+    def remove_chunks(self, chunk_ids):
+        """Retira los fantasmas de los chunks descargados (las filas se compactan)."""
+        self._filter([c not in chunk_ids for c in self.store.chunk])
+
+    def retain_chunks(self, chunk_ids):
+        """Retira los fantasmas que están fuera de `chunk_ids` (un perseguidor que salió del área cargada)."""
+        keep = [c in chunk_ids for c in self.store.chunk]
+        if not all(keep):
+            self._filter(keep)
+
+    def _filter(self, keep):
+        for key, kept in zip(self.store.id, keep):
+            if not kept:
+                self.index.remove(int(key))
+        self.store.filter(keep)
+        self.row_of = {int(key): row for row, key in enumerate(self.store.id)}
+        self.rows_moved = True
+
+    def _rows(self, keys):
+        # Filas ordenadas: el orden de recorrido no depende del orden interno del índice
+        return sorted(self.row_of[key] for key in keys)
+
+    def near(self, px, py, radius):
+        """Filas de los fantasmas a distancia <= radius de (px, py)."""
+        return self._rows(self.index.query_radius(px, py, radius))
+
+    def take_changed(self):
+        """(filas_reordenadas, filas con frase nueva) desde la última llamada."""
+        moved, changed = self.rows_moved, self.changed
+        self.rows_moved, self.changed = False, set()
+        return moved, changed
+
+    def phrase_text(self, index):
+        return self.phrases[index] if index >= 0 else ""
+
+    def _pick_phrase(self, lore, rng):
+        return lore if 0 <= lore < self.lore_count else rng.randrange(self.lore_count)
+
+    def update(self, px, py, rng):
+        """Un paso de simulación con el jugador (Sombra) en (px, py)."""
+        s = self.store
+        if not s.count or not self.lore_count:
+            return
+        timer, phrase, lore, aware = s.timer, s.phrase, s.lore, s.awareness
+        nearby = self.near(px, py, self.talk_radius)
+        if NUMPY_AVAILABLE:
+            near = np.zeros(s.count, dtype=bool)
+            near[nearby] = True
+            aware[near] += GHOST_AWARE_RISE
+            aware[~near] -= GHOST_AWARE_DECAY
+            np.clip(aware, 0.0, 1.0, out=aware)
+            # Los que salen del radio se callan
+            silenced = np.flatnonzero(~near & (phrase >= 0))
+            phrase[silenced] = -1
+            starting = near & ((phrase < 0) | (timer <= 0))
+            timer[near & ~starting] -= 1
+            self.changed.update(silenced.tolist())
+            for i in np.flatnonzero(starting).tolist():
+                new = self._pick_phrase(int(lore[i]), rng)
+                if new != phrase[i]:
+                    phrase[i] = new
+                    self.changed.add(i)
+                timer[i] = GHOST_PHRASE_STEPS
+        else:
+            nearby = set(nearby)
+            for i in range(s.count):
+                if i not in nearby:
+                    aware[i] = max(0.0, aware[i] - GHOST_AWARE_DECAY)
+                    if phrase[i] >= 0:
+                        phrase[i] = -1
+                        self.changed.add(i)
+                    continue
+                aware[i] = min(1.0, aware[i] + GHOST_AWARE_RISE)
+                if phrase[i] < 0 or timer[i] <= 0:
+                    new = self._pick_phrase(lore[i], rng)
+                    if new != phrase[i]:
+                        phrase[i] = new
+                        self.changed.add(i)
+                    timer[i] = GHOST_PHRASE_STEPS
+                else:
+                    timer[i] -= 1
+
+    def hear(self, px, py, radius):
+        """El jugador ha hablado alto en (px, py): alerta a los fantasmas a menos de `radius`."""
+        alert = self.store.alert
+        for i in self.near(px, py, radius):
+            alert[i] = GHOST_ALERT_STEPS
+
+    def hunt(self, flow, speed, px, py):
+        """Mueve a los alertados por el campo de flujo compartido. Devuelve cuántos atraparon
+        al jugador (esos dejan de perseguir). Su columna chunk sigue a su posición, así que
+        se descargan con el chunk en el que están y no con el de aparición."""
+        s = self.store
+        if not s.count:
+            return 0
+        x, y, alert = s.x, s.y, s.alert
+        r2 = GHOST_CATCH_RADIUS * GHOST_CATCH_RADIUS
+        if NUMPY_AVAILABLE:
+            hunters = np.flatnonzero(alert > 0)
+            if not len(hunters):
+                return 0
+            dx, dy = flow.steer(x[hunters], y[hunters])
+            x[hunters] += dx * speed
+            y[hunters] += dy * speed
+            alert[hunters] -= 1
+            if self.chunk_grid is not None:
+                size, cols, rows = self.chunk_grid
+                cx = np.clip(x[hunters] // size, 0, cols - 1).astype(np.int32)
+                cy = np.clip(y[hunters] // size, 0, rows - 1).astype(np.int32)
+                s.chunk[hunters] = cy * cols + cx
+            self._reindex(hunters.tolist())
+            caught = hunters[(x[hunters] - px) ** 2 + (y[hunters] - py) ** 2 <= r2]
+            alert[caught] = 0
+            return len(caught)
+        hunters = [i for i in range(s.count) if alert[i] > 0]
+        if not hunters:
+            return 0
+        dx, dy = flow.steer([x[i] for i in hunters], [y[i] for i in hunters])
+        caught = 0
+        for i, sx, sy in zip(hunters, dx, dy):
+            x[i] += sx * speed
+            y[i] += sy * speed
+            alert[i] -= 1
+            if self.chunk_grid is not None:
+                s.chunk[i] = self.chunk_of(x[i], y[i])
+            if (x[i] - px) ** 2 + (y[i] - py) ** 2 <= r2:
+                alert[i] = 0
+                caught += 1
+        self._reindex(hunters)
+        return caught
+
+    def chunk_of(self, x, y):
+        """Chunk que contiene (x, y) según chunk_grid (0 si no hay rejilla)."""
+        if self.chunk_grid is None:
+            return 0
+        size, cols, rows = self.chunk_grid
+        return min(max(int(y // size), 0), rows - 1) * cols + min(max(int(x // size), 0), cols - 1)
+
+    def _reindex(self, rows):
+        # Los que se han movido actualizan su celda del índice
+        for key, gx, gy in self.rows("id", "x", "y", indices=rows):
+            self.index.move(key, gx, gy)
+
+    def hunting(self):
+        """True si algún fantasma persigue al jugador."""
+        alert = self.store.alert
+        if NUMPY_AVAILABLE:
+            return bool((alert > 0).any())
+        return any(a > 0 for a in alert)
+
+    def in_rect(self, left, top, right, bottom):
+        """Índices de los fantasmas dentro del rectángulo."""
+        return self._rows(self.index.query_rect(left, top, right - left, bottom - top))
+
+    def nearest(self, px, py):
+        """(índice, distancia) del fantasma más cercano, o (None, inf)."""
+        key, dist = self.index.nearest(px, py)
+        if key is None:
+            return None, dist
+        return self.row_of[key], dist
+
+    def position(self, i):
+        return float(self.store.x[i]), float(self.store.y[i])
+
+    def rows(self, *names, indices=None):
+        return self.store.rows(*names, indices=indices)
+
+    def snapshot(self):
+        """[(chunk, x, y, timer, lore, texto de la frase)] para guardar partida."""
+        return [(c, x, y, t, l, self.phrase_text(p)) for c, x, y, t, l, p in self.store.rows(*self.SNAPSHOT_FIELDS)]
@@ -0,0 +1,340 @@
+# keyword_spotter.py
+# Detector ligero de palabras clave para gramáticas de muy pocas palabras ("confirmar"):
+# MFCC con la misma configuración que el modelo (model/conf/mfcc.conf) y comparación por DTW
+# contra plantillas grabadas de cada palabra. Un detector de energía corta el audio en
+# locuciones; cada locución se compara entera. Cuesta una fracción de la memoria y la CPU de
+# Vosk. Las plantillas se graban solas: cuando Vosk reconoce una de estas palabras se guarda
+# el audio (voice_templates/<palabra>.<n>.wav) y desde entonces basta con el detector.
+import json
+import math
+import os
+import threading
+import wave
+
+import config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+TEMPLATES_PER_WORD = 3       # Plantillas que se guardan por palabra
+MIN_SPEECH_SECONDS = 0.15    # Locuciones más cortas se descartan (golpes, clics)
+MAX_SPEECH_SECONDS = 2.0
+END_SILENCE_SECONDS = 0.3    # Silencio que cierra una locución
+PREROLL_SECONDS = 0.1        # Audio anterior al arranque de la voz que se incluye
+SPEECH_MARGIN_DB = 12        # Voz = energía del frame por encima del ruido de fondo + margen
+DEFAULT_THRESHOLD = 5.0      # Distancia DTW máxima cuando solo hay una plantilla de la palabra
+TOLERANCE = 1.2              # Con varias plantillas: umbral = distancia media entre ellas * tolerancia
+
+
+def read_conf(path):
+    """Opciones '--clave=valor' de un .conf de Kaldi -> {clave_con_guiones_bajos: valor}."""
+    options = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line.startswith("--") and "=" in line:
+                    key, value = line[2:].split("=", 1)
+                    options[key.replace("-", "_").replace(".", "_")] = value
+    except OSError:
+        pass
+    return options
+
+
+def grammar_words(grammar):
+    """Palabras de una gramática JSON de Vosk, sin "[unk]"."""
+    try:
+        words = json.loads(grammar)
+    except (TypeError, ValueError):
+        return []
+    return [w for w in words if w != "[unk]"]
+
+
+class Mfcc:
+    """MFCC al estilo de compute-mfcc-feats de Kaldi (ventana povey, preénfasis, lifter)."""
+    def __init__(self, conf_path=None):
+        opts = read_conf(conf_path or os.path.join(config.VOICE_MODEL_PATH, "conf", "mfcc.conf"))
+        self.rate = int(float(opts.get("sample_frequency", SAMPLE_RATE)))
+        self.frame_length = int(self.rate * float(opts.get("frame_length", 25)) / 1000)
+        self.frame_shift = int(self.rate * float(opts.get("frame_shift", 10)) / 1000)
+        self.preemphasis = float(opts.get("preemphasis_coefficient", 0.97))
+        self.num_bins = int(opts.get("num_mel_bins", 23))
+        self.num_ceps = int(opts.get("num_ceps", 13))
+        self.use_energy = opts.get("use_energy", "true") == "true"
+        low = float(opts.get("low_freq", 20))
+        high = float(opts.get("high_freq", 0))
+        if high <= 0:
+            high += self.rate / 2
+        lifter = float(opts.get("cepstral_lifter", 22))
+        self.fft_size = 1 << (self.frame_length - 1).bit_length()
+        n = np.arange(self.frame_length)
+        self.window = (0.5 - 0.5 * np.cos(2 * math.pi * n / (self.frame_length - 1))) ** 0.85
+        self.mel_banks = self._mel_banks(low, high)
+        # DCT-II ortonormal y lifter sinusoidal, como Kaldi
+        k = np.arange(self.num_bins)
+        dct = np.cos(math.pi / self.num_bins * (k[None, :] + 0.5) * np.arange(self.num_ceps)[:, None])
+        dct *= math.sqrt(2.0 / self.num_bins)
+        dct[0] = math.sqrt(1.0 / self.num_bins)
+        self.dct = dct.T
+        self.lifter = 1 + 0.5 * lifter * np.sin(math.pi * np.arange(self.num_ceps) / lifter) if lifter else None
+
+    def _mel_banks(self, low, high):
+        mel = lambda f: 1127.0 * np.log(1 + f / 700.0)
+        fft_bins = self.fft_size // 2 + 1
+        freqs = mel(np.arange(fft_bins) * self.rate / self.fft_size)
+        edges = np.linspace(mel(low), mel(high), self.num_bins + 2)
+        left, center, right = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+        up = (freqs[None, :] - left) / (center - left)
+        down = (right - freqs[None, :]) / (right - center)
+        return np.maximum(0.0, np.minimum(up, down)).T  # (bins FFT, bancos)
+
+    def frames(self, samples):
+        """Matriz (frames, frame_length) con los frames de `samples` (snip-edges)."""
+        count = 1 + (len(samples) - self.frame_length) // self.frame_shift
+        if count <= 0:
+            return np.zeros((0, self.frame_length))
+        idx = np.arange(self.frame_length)[None, :] + self.frame_shift * np.arange(count)[:, None]
+        return np.asarray(samples, dtype=np.float64)[idx]
+
+    def compute(self, samples):
+        """Coeficientes (frames, num_ceps) de un array de muestras PCM16."""
+        frames = self.frames(samples)
+        if not len(frames):
+            return np.zeros((0, self.num_ceps))
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        log_energy = np.log(np.maximum((frames ** 2).sum(axis=1), 1e-10))
+        frames[:, 1:] -= self.preemphasis * frames[:, :-1]
+        frames[:, 0] *= 1 - self.preemphasis
+        power = np.abs(np.fft.rfft(frames * self.window, self.fft_size)) ** 2
+        feats = np.log(np.maximum(power @ self.mel_banks, 1e-10)) @ self.dct
+        if self.lifter is not None:
+            feats *= self.lifter
+        if self.use_energy:
+            feats[:, 0] = log_energy
+        return feats
+
+
+def dtw_distance(a, b):
+    """Distancia DTW media por frame entre dos secuencias de rasgos (frames, dim).
+
+    Pasos (1,0), (1,1) y (1,2): cada fila solo depende de la anterior y se vectoriza entera.
+    """
+    if not len(a) or not len(b) or len(b) > 2 * len(a) or len(a) > 2 * len(b):
+        return math.inf  # Duraciones demasiado distintas: no puede ser la misma palabra
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)) / math.sqrt(a.shape[1])
+    acc = np.full(len(b), np.inf)
+    acc[0] = cost[0, 0]
+    for i in range(1, len(a)):
+        prev = acc
+        best = prev.copy()
+        best[1:] = np.minimum(best[1:], prev[:-1])
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        acc = best + cost[i]
+    return float(acc[-1] / len(a))
+
+
+def normalize(feats):
+    # Normalización de media cepstral: quita la coloración del micrófono
+    return feats - feats.mean(axis=0, keepdims=True)
+
+
+class Segmenter:
+    """Corta el audio en locuciones por energía con un suelo de ruido adaptativo."""
+    def __init__(self, rate=SAMPLE_RATE):
+        self.rate = rate
+        self.hop = rate // 100   # Frames de 10 ms
+        self.floor = None
+        self.pending = b""
+        self.buffer = []          # Frames de la locución en curso (o del preroll)
+        self.speech = 0           # Frames con voz de la locución en curso
+        self.silence = 0
+        self.active = False
+        self.preroll = int(PREROLL_SECONDS * 100)
+        self.end_frames = int(END_SILENCE_SECONDS * 100)
+        self.max_frames = int(MAX_SPEECH_SECONDS * 100)
+
+    def feed(self, data):
+        """Añade PCM16 mono; devuelve la lista de locuciones terminadas (arrays int16)."""
+        data = self.pending + data
+        usable = len(data) // (2 * self.hop) * 2 * self.hop
+        self.pending = data[usable:]
+        if not usable:
+            return []
+        frames = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, self.hop)
+        energy = 10 * np.log10(np.maximum((frames.astype(np.float64) ** 2).mean(axis=1), 1.0))
+        done = []
+        for frame, e in zip(frames, energy):
+            if self.floor is None:
+                self.floor = e
+            is_speech = e > self.floor + SPEECH_MARGIN_DB
+            if not is_speech:
+                # El suelo baja enseguida y sube despacio
+                self.floor = e if e < self.floor else self.floor * 0.98 + e * 0.02
+            self.buffer.append(frame)
+            if not self.active:
+                if is_speech:
+                    self.active, self.speech, self.silence = True, 1, 0
+                else:
+                    del self.buffer[:-self.preroll]
+                continue
+            if is_speech:
+                self.speech += 1
+                self.silence = 0
+            else:
+                self.silence += 1
+            if self.silence >= self.end_frames or len(self.buffer) >= self.max_frames:
+                if self.speech >= MIN_SPEECH_SECONDS * 100:
+                    done.append(np.concatenate(self.buffer[:len(self.buffer) - self.silence]))
+                self.buffer, self.active = [], False
+        return done
+
+
+def trim(samples, rate=SAMPLE_RATE):
+    """Recorta `samples` a la última zona con voz (para guardar plantillas); None si no hay."""
+    hop = rate // 100
+    count = len(samples) // hop
+    if count == 0:
+        return None
+    frames = np.asarray(samples[:count * hop], dtype=np.float64).reshape(count, hop)
+    energy = 10 * np.log10(np.maximum((frames ** 2).mean(axis=1), 1.0))
+    voiced = np.flatnonzero(energy > max(energy.max() - 30, np.percentile(energy, 10) + SPEECH_MARGIN_DB))
+    if not len(voiced):
+        return None
+    # La última racha de voz (se permiten huecos cortos entre sílabas)
+    end = start = voiced[-1]
+    for idx in voiced[::-1]:
+        if start - idx > 25:
+            break
+        start = idx
+    start = max(0, start - int(PREROLL_SECONDS * 100))
+    length = (end + 1 - start) / 100
+    if not MIN_SPEECH_SECONDS <= length <= MAX_SPEECH_SECONDS:
+        return None
+    return np.asarray(samples[start * hop:(end + 1) * hop], dtype=np.int16)
+
+
+def _slug(word):
+    return word.replace(" ", "_")
+
+
+class KeywordSpotter:
+    """Plantillas MFCC por palabra y clasificación de locuciones por DTW."""
+    def __init__(self, template_dir=None):
+        self.template_dir = template_dir or config.KWS_TEMPLATE_DIR
+        self.mfcc = Mfcc()
+        self.templates = {}   # palabra -> [rasgos normalizados]
+        self.thresholds = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _path(self, word, n):
+        return os.path.join(self.template_dir, f"{_slug(word)}.{n}.wav")
+
+    def _load(self):
+        for word, path in template_files(self.template_dir):
+            try:
+                with wave.open(path, "rb") as w:
+                    if w.getframerate() != self.mfcc.rate or w.getnchannels() != 1 or w.getsampwidth() != 2:
+                        continue
+                    samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+            except (OSError, wave.Error, EOFError):
+                continue
+            self._add(word, samples)
+
+    def _add(self, word, samples):
+        with self.lock:
+            self.templates.setdefault(word, []).append(normalize(self.mfcc.compute(samples)))
+            self._calibrate(word)
+
+    def _calibrate(self, word):
+        # Umbral por palabra a partir de lo que se parecen sus propias plantillas
+        feats = self.templates[word]
+        pairs = [dtw_distance(a, b) for i, a in enumerate(feats) for b in feats[i + 1:]]
+        pairs = [d for d in pairs if math.isfinite(d)]
+        self.thresholds[word] = sum(pairs) / len(pairs) * TOLERANCE if pairs else DEFAULT_THRESHOLD
+
+    def covers(self, words):
+        """True si cada palabra tiene ya sus TEMPLATES_PER_WORD plantillas.
+
+        Con menos, el umbral no está calibrado (DEFAULT_THRESHOLD) y el detector no se usa.
+        """
+        return bool(words) and all(self.count(w) >= TEMPLATES_PER_WORD for w in words)
+
+    def count(self, word):
+        return len(self.templates.get(word, ()))
+
+    def enroll(self, word, samples):
+        """Guarda como plantilla de `word` la última zona con voz de `samples` (PCM16, 16 kHz).
+        Devuelve True si se guardó."""
+        if self.count(word) >= TEMPLATES_PER_WORD:
+            return False
+        samples = trim(samples, self.mfcc.rate)
+        if samples is None:
+            return False
+        try:
+            os.makedirs(self.template_dir, exist_ok=True)
+            with wave.open(self._path(word, self.count(word)), "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(self.mfcc.rate)
+                w.writeframes(samples.astype("<i2").tobytes())
+        except OSError as e:
+            print(f"[VOZ] No se pudo guardar la plantilla de '{word}': {e}")
+            return False
+        self._add(word, samples)
+        return True
+
+    def classify(self, samples, words):
+        """Palabra de `words` que corresponde a la locución, o None si ninguna se parece bastante.
+        Devuelve (palabra, distancia)."""
+        feats = normalize(self.mfcc.compute(samples))
+        best, best_dist = None, math.inf
+        with self.lock:
+            for word in words:
+                for template in self.templates.get(word, ()):
+                    d = dtw_distance(feats, template)
+                    if d < best_dist:
+                        best, best_dist = word, d
+            if best is None or best_dist > self.thresholds.get(best, DEFAULT_THRESHOLD):
+                return None, best_dist
+        return best, best_dist
+
+
+def template_files(template_dir=None):
+    """[(palabra, ruta)] de las plantillas grabadas, sin leerlas."""
+    template_dir = template_dir or config.KWS_TEMPLATE_DIR
+    if not os.path.isdir(template_dir):
+        return []
+    files = []
+    for name in sorted(os.listdir(template_dir)):
+        parts = name.rsplit(".", 2)
+        if len(parts) == 3 and parts[2] == "wav":
+            files.append((parts[0].replace("_", " "), os.path.join(template_dir, name)))
+    return files
+
+
+def has_complete_words(template_dir=None):
+    """True si alguna palabra tiene todas sus plantillas en disco (no calcula MFCC)."""
+    counts = {}
+    for word, _ in template_files(template_dir):
+        counts[word] = counts.get(word, 0) + 1
+    return any(n >= TEMPLATES_PER_WORD for n in counts.values())
+
+
+_spotter = None
+_spotter_lock = threading.Lock()
+
+
+def get_spotter():
+    """Detector compartido (las plantillas se cargan una vez); None sin NumPy."""
+    global _spotter
+    if not NUMPY_AVAILABLE:
+        return None
+    with _spotter_lock:
+        if _spotter is None:
+            _spotter = KeywordSpotter()
+        return _spotter
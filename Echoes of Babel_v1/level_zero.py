@@ -1,20 +1,17 @@
 # level_zero.py
 import pygame
 import config
-import threading
 import queue
 import time
 import random
 import json
 import math
-from scenes import Scene, CURRENT_SESSION, AUDIO_AVAILABLE
+import database
+import scenes
+from scenes import Scene, CURRENT_SESSION
 from entities import Player
-
-try:
-    import pyaudio
-    from vosk import Model, KaldiRecognizer
-except ImportError:
-    pass
+from voice import AUDIO_AVAILABLE, VoiceListener
+from typewriter import Typewriter
 
 class LevelZeroScene(Scene):
     def __init__(self, screen):
@@ -22,6 +19,7 @@ class LevelZeroScene(Scene):
         # ESTADO DEL PRÓLOGO
         self.phase = "SETUP" 
         self.dialogue_queue = [] 
+        self.scheduled_dialogues = [] # [pasos restantes, texto, hablante, duración]
         
         # Configuración Visual: LABORATORIO LIMPIO (Antes del accidente)
         self.lab_color = (200, 200, 220) # Gris clínico brillante
@@ -32,7 +30,7 @@ class LevelZeroScene(Scene):
         self.player.set_character("cero") 
         
         self.command_queue = queue.Queue()
-        self.audio_running = True
+        self.audio_running = False
         
         # Efectos
         self.glitch_intensity = 0.0
@@ -40,55 +38,61 @@ class LevelZeroScene(Scene):
         self.energy_pulse = 0
         self.blackout = False
         self.end_timer = 0
-        
-        # Iniciar secuencia narrativa
-        self.start_prologue()
-        
+        # La fase guardada se lee al precargar (hilo del cargador), no al activar la escena
+        self.saved_phase = self._saved_phase() if CURRENT_SESSION["should_load"] else None
+
+    # Progreso que muestra la ranura mientras se está en el prólogo
+    PHASE_PROGRESS = {"CALIBRATION": 0, "ARGUMENT": 5, "THE_EVENT": 10}
+
+    def enter(self):
+        # Micrófono y secuencia narrativa arrancan al activarse, no al precargar
         if AUDIO_AVAILABLE:
-            threading.Thread(target=self.listener, daemon=True).start()
+            self.audio_running = True
+            self.start_listening()
+        if self.saved_phase in ("ARGUMENT", "THE_EVENT"):
+            self.resume_argument()
+        else:
+            self.start_prologue()
+
+    # Mezcla de música de cada fase (el colapso y el final van en silencio)
+    PHASE_MUSIC = {"SETUP": "calm", "CALIBRATION": "calm", "ARGUMENT": "argument", "THE_EVENT": "event"}
+
+    def music_mix(self):
+        return self.PHASE_MUSIC.get(self.phase, "silence")
+
+    def _saved_phase(self):
+        data = database.load_game(CURRENT_SESSION["slot"])
+        return data.get("state", {}).get("prologue", {}).get("phase")
+
+    def set_phase(self, phase):
+        self.phase = phase
+        # Guardado incremental: solo cambia la sección del prólogo
+        if CURRENT_SESSION["autosave"] and phase in self.PHASE_PROGRESS:
+            database.save_state_async(CURRENT_SESSION["slot"], self.PHASE_PROGRESS[phase],
+                                      {"prologue": {"scene": "level_zero", "phase": phase}})
+
+    def resume_argument(self):
+        # Partida cargada a mitad del prólogo: se retoma justo antes del evento
+        self.phase = "ARGUMENT"
+        self.trigger_dialogue("Calibración al 100%. Resonancia estable.", "elena")
+        self.trigger_dialogue("Diga 'INICIAR SECUENCIA' para activar el Núcleo.", "elena", delay=120)
 
     def start_prologue(self):
         # Fase 1: Calibración
-        self.phase = "CALIBRATION"
+        self.set_phase("CALIBRATION")
         self.trigger_dialogue("Dr. Thorne, iniciemos la prueba de voz del Vox Dei.", "elena", 300)
         self.trigger_dialogue("Por favor, diga 'SINTAXIS' para calibrar el emisor.", "elena", 300, delay=120)
 
-    def listener(self):
-        while self.audio_running:
-            stream = None
-            p = None
-            try:
-                model = Model("model")
-                # Gramática específica para el prólogo
-                grammar = '["sintaxis", "iniciar", "secuencia", "detener", "abortar", "elena", "hola", "[unk]"]'
-                rec = KaldiRecognizer(model, 16000, grammar)
-                p = pyaudio.PyAudio()
-                stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=4096)
-                stream.start_stream()
-                
-                while self.audio_running:
-                    data = stream.read(4096, exception_on_overflow=False)
-                    if rec.AcceptWaveform(data): pass
-                    else:
-                        partial = json.loads(rec.PartialResult()).get("partial", "")
-                        if partial:
-                            words = partial.split()
-                            for w in words:
-                                self.command_queue.put(w)
-                            rec.Reset()
-            except Exception: time.sleep(0.5)
-            finally:
-                if stream: 
-                    try: stream.stop_stream(); stream.close()
-                    except: pass
-                if p:
-                    try: p.terminate()
-                    except: pass
+    def start_listening(self):
+        # Gramática específica para el prólogo; cada palabra del parcial es un comando
+        grammar = '["sintaxis", "iniciar", "secuencia", "detener", "abortar", "elena", "hola", "[unk]"]'
+        VoiceListener(self, grammar, lambda partial: partial.split()).start()
 
     def trigger_dialogue(self, text, speaker="elena", duration=240, delay=0):
         """Sistema de diálogo con delay opcional"""
         if delay > 0:
-            threading.Timer(delay / 60.0, lambda: self._add_dialogue(text, speaker, duration)).start()
+            # Se cuenta en pasos de simulación (no en tiempo real) para que la grabación sea reproducible
+            self.scheduled_dialogues.append([delay, text, speaker, duration])
         else:
             self._add_dialogue(text, speaker, duration)
 
@@ -96,15 +100,15 @@ class LevelZeroScene(Scene):
         color = config.LIGHT_BLUE if speaker == "elena" else config.DARK_GRAY
         label = "DRA. ELENA VANCE" if speaker == "elena" else "DR. ARIS THORNE"
         
-        # Audio feedback simulado
-        import scenes
-        if scenes.voice_engine: scenes.voice_engine.speak(text, speaker)
+        # Voz sintetizada de la línea (se va generando por bloques en update)
+        if scenes.voice_engine: scenes.voice_engine.speak(text, speaker, duration / config.SIM_FPS)
             
         self.dialogue_queue.append({
             "text": text, 
             "color": color, 
             "timer": duration, 
-            "speaker": label
+            "speaker": label,
+            "typer": Typewriter(self.font_sub, [(text, (10, 10, 10))])
         })
 
     def update(self):
@@ -114,24 +118,34 @@ class LevelZeroScene(Scene):
         self.energy_pulse = (math.sin(pygame.time.get_ticks() * 0.005) + 1) * 0.5
         
         # Gestión de diálogos
+        if self.scheduled_dialogues:
+            due = []
+            for entry in self.scheduled_dialogues:
+                entry[0] -= 1
+                if entry[0] <= 0:
+                    due.append(entry)
+            for entry in due:
+                self.scheduled_dialogues.remove(entry)
+                self._add_dialogue(*entry[1:])
+        if scenes.voice_engine: scenes.voice_engine.pump()
         if self.dialogue_queue:
+            self.dialogue_queue[0]["typer"].step()
             self.dialogue_queue[0]["timer"] -= 1
             if self.dialogue_queue[0]["timer"] <= 0:
                 self.dialogue_queue.pop(0)
 
         # Procesar Comandos de Voz Narrativos
-        while not self.command_queue.empty():
-            cmd = self.command_queue.get()
+        for cmd in self.take_commands():
             
             if self.phase == "CALIBRATION" and cmd == "sintaxis":
-                self.phase = "ARGUMENT"
+                self.set_phase("ARGUMENT")
                 self.trigger_dialogue("Calibración al 100%. Resonancia estable.", "elena")
                 self.trigger_dialogue("Aris... los escáneres del Sector 9 muestran anomalías graves.", "elena", delay=180)
                 self.trigger_dialogue("No importa. Estamos a punto de reescribir la historia.", "aris", delay=360)
                 self.trigger_dialogue("Diga 'INICIAR SECUENCIA' para activar el Núcleo.", "elena", delay=540)
             
             elif self.phase == "ARGUMENT" and (cmd == "iniciar" or cmd == "secuencia"):
-                self.phase = "THE_EVENT"
+                self.set_phase("THE_EVENT")
                 # Inicio del Caos
                 self.trigger_dialogue("Activando Vox Dei... ¡Espera! ¡La lectura es infinita!", "elena")
                 self.trigger_dialogue("¡ARIS, DETENLO! ¡VA A ESTALLAR!", "elena", delay=120)
@@ -147,7 +161,7 @@ class LevelZeroScene(Scene):
 
         # Lógica de Colapso Visual
         if self.phase == "THE_EVENT":
-            if random.random() < 0.05:
+            if self.rng.random() < 0.05:
                 self.trigger_dialogue("ERROR CRÍTICO. CONTENCIÓN FALLIDA.", "sistema", 60)
             if self.shake_screen < 50:
                 self.shake_screen += 0.1
@@ -158,6 +172,11 @@ class LevelZeroScene(Scene):
             self.blackout = True
             self.end_timer += 1
             if self.end_timer > 180: # 3 segundos de oscuridad
+                self.audio_running = False
+                if CURRENT_SESSION["autosave"]:
+                    # El prólogo queda superado: al cargar se continúa en el nivel
+                    database.save_state_async(CURRENT_SESSION["slot"], config.DEMO_PROGRESS, {"prologue": {"scene": "demo", "phase": "DONE"}})
+                self.phase = "DONE"
                 self.change_scene(config.STATE_DEMO) # Transición al juego real (despertar ciego)
 
     def draw_lab_environment(self, cx, cy):
@@ -181,13 +200,13 @@ class LevelZeroScene(Scene):
         
         # Núcleo
         core_color = (0, 200, 255) if self.phase != "THE_EVENT" else (255, 255, 255)
-        if self.phase == "THE_EVENT" and random.random() < 0.5: core_color = (0, 0, 0) # Parpadeo
+        if self.phase == "THE_EVENT" and self.fx_rng.random() < 0.5: core_color = (0, 0, 0) # Parpadeo
         pygame.draw.circle(self.screen, core_color, (machine_x, machine_y), 50)
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         # Shake effect
-        off_x = random.randint(-int(self.shake_screen), int(self.shake_screen))
-        off_y = random.randint(-int(self.shake_screen), int(self.shake_screen))
+        off_x = self.fx_rng.randint(-int(self.shake_screen), int(self.shake_screen))
+        off_y = self.fx_rng.randint(-int(self.shake_screen), int(self.shake_screen))
         
         bg_surf = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
         
@@ -208,14 +227,11 @@ class LevelZeroScene(Scene):
             self.screen.fill((0,0,0))
             self.screen.blit(screen_copy, (off_x, off_y))
             
-        # Glitch overlay
-        if self.glitch_intensity > 0:
-            for _ in range(int(self.glitch_intensity * 10)):
-                gx = random.randint(0, config.SCREEN_WIDTH)
-                gy = random.randint(0, config.SCREEN_HEIGHT)
-                gw = random.randint(10, 100)
-                gh = random.randint(2, 10)
-                pygame.draw.rect(self.screen, (random.randint(0,255), 0, 0), (gx, gy, gw, gh))
+        # Glitch: bandas desplazadas y aberración cromática en el post-procesado
+        if self.glitch_intensity > 0 and not self.blackout:
+            self.post_fx.tear_lines = int(self.glitch_intensity * 10)
+            self.post_fx.tear_shift = 60
+            self.post_fx.rgb_offset = int(self.glitch_intensity * 6)
 
         # UI de Diálogo (Estilo limpio/futurista)
         if self.dialogue_queue:
@@ -236,9 +252,8 @@ class LevelZeroScene(Scene):
             name_surf = self.font_medium.render(d["speaker"], True, (0, 50, 100))
             self.screen.blit(name_surf, (bx + 20, by - 30))
             
-            # Texto
-            text_surf = self.font_sub.render(d["text"], True, (10, 10, 10))
-            self.screen.blit(text_surf, (bx + 30, by + 50))
+            # Texto (letra a letra)
+            d["typer"].draw(self.screen, bx + 30, by + 50)
 
         # Blackout final
         if self.blackout:
@@ -0,0 +1,339 @@
+# levels.py
+# Formato de nivel por chunks (.lvl) y streaming de chunks alrededor de la cámara.
+#
+# Estructura del archivo (little-endian):
+#   Cabecera: magic "EBLV", versión, tamaño de chunk, tamaño de tile, ancho/alto del mundo,
+#             chunks en X/Y y punto de aparición del jugador.
+#   Frases de lore: u16 cantidad + (u16 longitud + UTF-8) por frase.
+#   Tabla de chunks: (offset, longitud) por chunk en orden fila-mayor; longitud 0 = chunk vacío.
+#   Chunk (zlib): tiles u8 + muros (id, x1, y1, x2, y2, material) + fantasmas (x, y, frase).
+import io
+import os
+import queue
+import struct
+import threading
+import zlib
+import config
+
+MAGIC = b"EBLV"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHHIIHHff")
+CHUNK_ENTRY = struct.Struct("<II")
+WALL = struct.Struct("<IffffB")
+GHOST = struct.Struct("<ffh")
+COUNT = struct.Struct("<H")
+
+# Tipos de tile
+TILE_EMPTY = 0
+TILE_FLOOR = 1
+TILE_SOLID = 2
+
+# Materiales de muro (afectan al eco)
+MATERIAL_STONE = 0
+MATERIAL_METAL = 1
+MATERIAL_WOOD = 2
+MATERIAL_FLESH = 3
+
+DEFAULT_LORE = ["No es aire... es vibración.", "Elena... ¿dónde estás?", "El Pozo nos traga a todos.", "Silencio... ellos escuchan.", "La frecuencia de Dios duele."]
+
+
+class Chunk:
+    __slots__ = ("cx", "cy", "tiles", "walls", "ghosts")
+
+    def __init__(self, cx, cy, tiles=b"", walls=None, ghosts=None):
+        self.cx = cx
+        self.cy = cy
+        self.tiles = tiles            # bytes, tiles_per_side^2 (vacío = todo TILE_EMPTY)
+        self.walls = walls or []      # [(id, x1, y1, x2, y2, material)]
+        self.ghosts = ghosts or []    # [(x, y, índice de frase o -1 = aleatoria)]
+
+    @property
+    def key(self):
+        return (self.cx, self.cy)
+
+
+# --- ESCRITURA ---
+class LevelBuilder:
+    """Construye un nivel en memoria y lo serializa al formato por chunks."""
+    def __init__(self, world_width, world_height, chunk_size=512, tile_size=32):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.chunk_size = chunk_size
+        self.tile_size = tile_size
+        self.chunks_x = (world_width + chunk_size - 1) // chunk_size
+        self.chunks_y = (world_height + chunk_size - 1) // chunk_size
+        self.tiles_per_side = chunk_size // tile_size
+        self.spawn = (world_width / 2, world_height / 2)
+        self.phrases = []
+        self.tiles = {}    # (tx, ty) -> tipo
+        self.walls = []    # (x1, y1, x2, y2, material)
+        self.ghosts = []   # (x, y, frase)
+
+    def set_tile(self, tx, ty, kind):
+        self.tiles[(tx, ty)] = kind
+
+    def add_wall(self, x1, y1, x2, y2, material=MATERIAL_STONE):
+        self.walls.append((x1, y1, x2, y2, material))
+
+    def add_ghost(self, x, y, phrase=-1):
+        self.ghosts.append((x, y, phrase))
+
+    def _chunk_range(self, x0, y0, x1, y1):
+        cs = self.chunk_size
+        c0 = max(0, int(min(x0, x1) // cs)); c1 = min(self.chunks_x - 1, int(max(x0, x1) // cs))
+        r0 = max(0, int(min(y0, y1) // cs)); r1 = min(self.chunks_y - 1, int(max(y0, y1) // cs))
+        return c0, r0, c1, r1
+
+    def _encode_chunk(self, cx, cy, walls, ghosts):
+        tps = self.tiles_per_side
+        tiles = bytearray(tps * tps)
+        has_tiles = False
+        for ty in range(tps):
+            for tx in range(tps):
+                kind = self.tiles.get((cx * tps + tx, cy * tps + ty), TILE_EMPTY)
+                if kind:
+                    tiles[ty * tps + tx] = kind
+                    has_tiles = True
+        if not has_tiles and not walls and not ghosts:
+            return b""
+        out = io.BytesIO()
+        out.write(bytes(tiles) if has_tiles else b"")
+        out.write(COUNT.pack(len(walls)))
+        for w in walls:
+            out.write(WALL.pack(*w))
+        out.write(COUNT.pack(len(ghosts)))
+        for g in ghosts:
+            out.write(GHOST.pack(*g))
+        # Un byte de cabecera indica si el chunk trae la capa de tiles
+        return zlib.compress(bytes([1 if has_tiles else 0]) + out.getvalue())
+
+    def to_bytes(self):
+        per_chunk_walls = {}
+        for wall_id, (x1, y1, x2, y2, mat) in enumerate(self.walls):
+            c0, r0, c1, r1 = self._chunk_range(x1, y1, x2, y2)
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    per_chunk_walls.setdefault((c, r), []).append((wall_id, x1, y1, x2, y2, mat))
+        per_chunk_ghosts = {}
+        for x, y, phrase in self.ghosts:
+            c0, r0, _, _ = self._chunk_range(x, y, x, y)
+            per_chunk_ghosts.setdefault((c0, r0), []).append((x, y, phrase))
+
+        head = io.BytesIO()
+        head.write(HEADER.pack(MAGIC, VERSION, self.chunk_size, self.tile_size,
+                               self.world_width, self.world_height, self.chunks_x, self.chunks_y,
+                               self.spawn[0], self.spawn[1]))
+        head.write(COUNT.pack(len(self.phrases)))
+        for phrase in self.phrases:
+            data = phrase.encode("utf-8")
+            head.write(COUNT.pack(len(data)))
+            head.write(data)
+
+        payloads = []
+        for cy in range(self.chunks_y):
+            for cx in range(self.chunks_x):
+                payloads.append(self._encode_chunk(cx, cy, per_chunk_walls.get((cx, cy), []),
+                                                   per_chunk_ghosts.get((cx, cy), [])))
+        offset = head.tell() + CHUNK_ENTRY.size * len(payloads)
+        for data in payloads:
+            head.write(CHUNK_ENTRY.pack(offset if data else 0, len(data)))
+            offset += len(data)
+        for data in payloads:
+            head.write(data)
+        return head.getvalue()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def build_demo_level():
+    """El nivel 1 original: caja vacía de WORLD_WIDTH x WORLD_HEIGHT con dos fantasmas."""
+    b = LevelBuilder(config.WORLD_WIDTH, config.WORLD_HEIGHT)
+    w, h = config.WORLD_WIDTH, config.WORLD_HEIGHT
+    b.phrases = list(DEFAULT_LORE)
+    for x1, y1, x2, y2 in [(10, 10, w - 10, 10), (w - 10, 10, w - 10, h - 10),
+                           (w - 10, h - 10, 10, h - 10), (10, h - 10, 10, 10)]:
+        b.add_wall(x1, y1, x2, y2)
+    b.add_ghost(w // 2 + 300, h // 2 - 200)
+    b.add_ghost(w // 2 - 300, h // 2 + 300)
+    return b
+
+
+# --- LECTURA ---
+class LevelFile:
+    """Nivel abierto: lee cabecera y tabla; los chunks se leen bajo demanda (thread-safe)."""
+    def __init__(self, source):
+        # source: ruta a un .lvl o bytes ya en memoria
+        if isinstance(source, (bytes, bytearray)):
+            self.file = io.BytesIO(source)
+        else:
+            self.file = open(source, "rb")
+        self.lock = threading.Lock()
+        f = self.file
+        (magic, version, self.chunk_size, self.tile_size, self.world_width, self.world_height,
+         self.chunks_x, self.chunks_y, sx, sy) = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("No es un archivo de nivel de Echoes of Babel")
+        if version > VERSION:
+            raise ValueError(f"Versión de nivel {version} no soportada")
+        self.spawn = (sx, sy)
+        self.tiles_per_side = self.chunk_size // self.tile_size
+        self.phrases = []
+        for _ in range(COUNT.unpack(f.read(COUNT.size))[0]):
+            length = COUNT.unpack(f.read(COUNT.size))[0]
+            self.phrases.append(f.read(length).decode("utf-8"))
+        n = self.chunks_x * self.chunks_y
+        table = f.read(CHUNK_ENTRY.size * n)
+        self.table = [CHUNK_ENTRY.unpack_from(table, i * CHUNK_ENTRY.size) for i in range(n)]
+
+    def close(self):
+        self.file.close()
+
+    def chunk_id(self, cx, cy):
+        return cy * self.chunks_x + cx
+
+    def read_chunk(self, cx, cy):
+        offset, length = self.table[self.chunk_id(cx, cy)]
+        if not length:
+            return Chunk(cx, cy)
+        with self.lock:
+            self.file.seek(offset)
+            raw = zlib.decompress(self.file.read(length))
+        pos = 1
+        tiles = b""
+        if raw[0]:
+            size = self.tiles_per_side * self.tiles_per_side
+            tiles = raw[pos:pos + size]
+            pos += size
+        walls = []
+        (count,) = COUNT.unpack_from(raw, pos); pos += COUNT.size
+        for _ in range(count):
+            walls.append(WALL.unpack_from(raw, pos)); pos += WALL.size
+        ghosts = []
+        (count,) = COUNT.unpack_from(raw, pos); pos += COUNT.size
+        for _ in range(count):
+            ghosts.append(GHOST.unpack_from(raw, pos)); pos += GHOST.size
+        return Chunk(cx, cy, tiles, walls, ghosts)
+
+
+_demo_bytes = None
+_demo_lock = threading.Lock()
+
+
+def demo_level_bytes():
+    """Nivel de demo serializado; se genera una sola vez (la precarga lo hace durante el arranque)."""
+    global _demo_bytes
+    with _demo_lock:
+        if _demo_bytes is None:
+            _demo_bytes = build_demo_level().to_bytes()
+        return _demo_bytes
+
+
+def prepare_level(path):
+    """Deja listo lo costoso de open_level(path) sin abrir el archivo."""
+    if not (path and os.path.exists(path)):
+        demo_level_bytes()
+
+
+def open_level(path):
+    """Abre `path`; si no existe, usa el nivel de demo generado en memoria."""
+    if path and os.path.exists(path):
+        return LevelFile(path)
+    return LevelFile(demo_level_bytes())
+
+
+# --- STREAMING ---
+class ChunkStreamer:
+    """Mantiene cargados solo los chunks alrededor de la cámara, leyéndolos en un hilo."""
+    def __init__(self, level, margin=1, synchronous=False):
+        self.level = level
+        self.margin = margin
+        self.synchronous = synchronous
+        self.loaded = {}       # (cx, cy) -> Chunk
+        self.pending = set()
+        self.view = None
+        self.keep = None
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def _range(self, x, y, w, h, margin):
+        cs = self.level.chunk_size
+        c0 = max(0, int(x // cs) - margin)
+        r0 = max(0, int(y // cs) - margin)
+        c1 = min(self.level.chunks_x - 1, int((x + w) // cs) + margin)
+        r1 = min(self.level.chunks_y - 1, int((y + h) // cs) + margin)
+        return c0, r0, c1, r1
+
+    @staticmethod
+    def _keys(rng):
+        c0, r0, c1, r1 = rng
+        return {(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+
+    def prime(self, x, y, w, h):
+        """Carga síncrona de la vista inicial (evita que el mundo aparezca a trozos)."""
+        loaded = []
+        for key in self._keys(self._range(x, y, w, h, self.margin)):
+            if key not in self.loaded:
+                chunk = self.level.read_chunk(*key)
+                self.loaded[key] = chunk
+                loaded.append(chunk)
+        return loaded
+
+    def _work(self):
+        while True:
+            with self.lock:
+                try:
+                    key = self.requests.get_nowait()
+                except queue.Empty:
+                    self.worker = None
+                    return
+            try:
+                self.results.put(self.level.read_chunk(*key))
+            except Exception as e:
+                print(f"[NIVEL] Error leyendo chunk {key}: {e}")
+                self.results.put(Chunk(*key))
+
+    def update(self, x, y, w, h):
+        """Pide los chunks que entran en vista y devuelve (chunks cargados, chunks descargados)."""
+        evicted = []
+        rng = self._range(x, y, w, h, self.margin)
+        if rng != self.view:
+            self.view = rng
+            wanted = self._keys(rng)
+            missing = wanted - self.loaded.keys() - self.pending
+            if missing and self.synchronous:
+                for key in missing:
+                    self.pending.add(key)
+                    self.results.put(self.level.read_chunk(*key))
+            elif missing:
+                with self.lock:
+                    for key in missing:
+                        self.pending.add(key)
+                        self.requests.put(key)
+                    if self.worker is None:
+                        self.worker = threading.Thread(target=self._work, daemon=True)
+                        self.worker.start()
+            # Histéresis: se conserva un anillo extra para no recargar al oscilar en un borde
+            self.keep = self._range(x, y, w, h, self.margin + 1)
+            keep = self._keys(self.keep)
+            for key in [k for k in self.loaded if k not in keep]:
+                evicted.append(self.loaded.pop(key))
+
+        loaded = []
+        while True:
+            try:
+                chunk = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(chunk.key)
+            c0, r0, c1, r1 = self.keep
+            if not (c0 <= chunk.cx <= c1 and r0 <= chunk.cy <= r1):
+                continue  # La cámara ya se alejó mientras se leía
+            if chunk.key not in self.loaded:
+                self.loaded[chunk.key] = chunk
+                loaded.append(chunk)
+        return loaded, evicted
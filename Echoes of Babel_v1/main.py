@@ -1,15 +1,37 @@
 # main.py
 import pygame
 import sys
-import os
+import time
+import argparse
+import random
 import config
 import database
-# Importamos escenas desde sus archivos respectivos
-from scenes import BootSequence, WarningScene, MenuScene
-from level_zero import LevelZeroScene
-from demo_level import DemoScene
+# Las escenas se importan bajo demanda a través del registro del SceneLoader
+from scene_loader import SceneLoader
+import replay
+# postfx y music solo dependen de pygame y se usan en cada frame desde el primero;
+# voice se importa en la precarga (warmup) o al abrir el micrófono, no aquí
+import postfx
+import music
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=config.TITLE)
+    parser.add_argument("--record", metavar="ARCHIVO", help="graba la entrada (voz + teclado) para reproducirla")
+    parser.add_argument("--replay", metavar="ARCHIVO", help="reproduce una grabación paso a paso")
+    parser.add_argument("--seed", type=int, help="semilla fija para el azar de las escenas")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    # Entrada determinista: la semilla viaja en la grabación para que la reproducción sea idéntica
+    if args.replay:
+        replay.active = replay.InputReplayer(args.replay)
+        replay.seed_scenes(replay.active.seed)
+    elif args.record or args.seed is not None:
+        seed = args.seed if args.seed is not None else random.getrandbits(32)
+        replay.seed_scenes(seed)
+        if args.record:
+            replay.active = replay.InputRecorder(args.record, seed)
     database.init_db()
     
     # Inicializar Pygame y Audio
@@ -17,63 +39,101 @@ def main():
     pygame.mixer.pre_init(44100, -16, 2, 2048)
     pygame.init()
     pygame.mixer.init()
+    pygame.mixer.set_num_channels(config.MIXER_CHANNELS)
 
     screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
     pygame.display.set_caption(config.TITLE)
     clock = pygame.time.Clock()
 
-    music_file = "menu_theme.mp3" 
-    if not os.path.exists(music_file): music_file = "menu_theme.ogg"
-    if os.path.exists(music_file):
-        try:
-            pygame.mixer.music.load(music_file)
-            pygame.mixer.music.set_volume(0.6)
-        except Exception as e: print(f"Error musica: {e}")
-
-    # Diccionario de Escenas
-    scenes_dict = {
-        config.STATE_BOOT: BootSequence,      
-        config.STATE_WARNING: WarningScene,
-        config.STATE_MENU: MenuScene,
-        config.STATE_LEVEL_ZERO: LevelZeroScene, # Viene de level_zero.py
-        config.STATE_DEMO: DemoScene             # Viene de demo_level.py
-    }
-
+    loader = SceneLoader()
     current_state = config.STATE_BOOT 
-    active_scene = scenes_dict[current_state](screen)
+    active_scene = loader.take(current_state)
+
+    # Simulación a paso fijo: update() siempre avanza 1/SIM_FPS s; el render va aparte
+    sim_dt = 1.0 / config.SIM_FPS
+    accumulator = 0.0
+    render_fps = config.FPS
+    frame_cost = 0.0 # Media móvil del coste real de cada frame (s)
 
     running = True
     while running:
+        # El render se limita a render_fps; el tiempo real transcurrido alimenta el acumulador
+        frame_time = min(clock.tick(render_fps) / 1000.0, config.MAX_FRAME_TIME)
+        accumulator += frame_time
+        frame_start = time.perf_counter()
+        replaying = replay.active is not None and replay.active.replaying
+        if replaying:
+            # Un paso por vuelta: así las teclas grabadas se entregan justo antes de su paso
+            accumulator = sim_dt
+            if replay.active.finished():
+                running = False
+
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
 
-        # Música dinámica
-        if (current_state == config.STATE_DEMO or current_state == config.STATE_LEVEL_ZERO) and pygame.mixer.music.get_busy():
-            pygame.mixer.music.fadeout(1500)
+        # Música dinámica: la escena elige la mezcla y el motor hace el crossfade
+        mix = active_scene.music_mix()
+        if mix is not None:
+            music.engine.set_mix(mix)
+        music.engine.update(frame_time)
+
+        # Una escena que ya terminó su fade-out no recibe más entrada
+        if active_scene.next_state is None:
+            if replay.active is not None:
+                events = replay.active.events(events)
+            active_scene.process_events(events)
+        steps = 0
+        while accumulator >= sim_dt and active_scene.next_state is None:
+            active_scene.update()
+            if replay.active is not None:
+                replay.active.step()
+            accumulator -= sim_dt
+            steps += 1
+            if steps >= config.MAX_SIM_STEPS:
+                # Máquina saturada: se descarta el atraso en vez de entrar en espiral
+                accumulator = 0.0
+                break
 
-        active_scene.process_events(events)
-        active_scene.update()
+        # Precarga: la siguiente escena se construye en un hilo durante el fade-out
+        if active_scene.fade_state == "OUT" and active_scene.target_state is not None:
+            loader.preload(active_scene.target_state)
 
         if active_scene.next_state is not None:
             if active_scene.next_state == config.STATE_QUIT:
                 running = False
                 continue
 
-            # Gestión de música al volver al menú
-            if (current_state == config.STATE_DEMO or current_state == config.STATE_LEVEL_ZERO) and active_scene.next_state == config.STATE_MENU:
-                if os.path.exists(music_file):
-                     try: pygame.mixer.music.play(loops=-1, fade_ms=1000)
-                     except: pass
+            # Si el fade terminó antes que la precarga, mostrar la pantalla de carga
+            if loader.is_pending(active_scene.next_state):
+                active_scene.draw_loading_screen()
+                pygame.display.flip()
+                continue
 
             current_state = active_scene.next_state
-            active_scene = scenes_dict[current_state](screen)
+            active_scene = loader.take(current_state)
+            accumulator = 0.0
 
-        active_scene.draw()
+        # Factor de interpolación entre el estado anterior y el actual (0..1)
+        active_scene.draw(accumulator / sim_dt)
+        postfx.apply(pygame.display.get_surface(), active_scene.post_fx, active_scene.fx_rng)
         pygame.display.flip()
-        clock.tick(config.FPS)
 
+        # Throttle del render: bajar los FPS de dibujo si el frame no cabe en su presupuesto
+        frame_cost = frame_cost * 0.9 + (time.perf_counter() - frame_start) * 0.1
+        if frame_cost > 0.9 / render_fps and render_fps > config.MIN_RENDER_FPS:
+            render_fps = max(config.MIN_RENDER_FPS, render_fps // 2)
+        elif frame_cost < 0.4 / render_fps and render_fps < config.FPS:
+            render_fps = min(config.FPS, render_fps * 2)
+
+    if replay.active is not None:
+        replay.active.close()
+    voice = sys.modules.get("voice")
+    if voice is not None:  # Sin importar no hay reconocedor que cerrar
+        voice.shutdown()
+    database.close()
+    music.engine.stop()
     pygame.mixer.quit()
     pygame.quit()
     sys.exit()
@@ -0,0 +1,194 @@
+# music.py
+# Música adaptativa por capas. Cada capa (stem) se decodifica una sola vez a un Sound en la
+# precarga (nunca en el hilo principal), todas suenan en bucle desde el mismo instante en sus
+# canales reservados y la escena solo elige la mezcla: el motor hace el crossfade de volúmenes.
+# Si falta el archivo de una capa se sintetiza un bucle procedural (requiere NumPy).
+import math
+import os
+import threading
+import pygame
+import config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+LOOP_SECONDS = 8          # Duración común de las capas del juego (se recortan o rellenan a ella)
+CROSSFADE_SECONDS = 1.5   # Tiempo de 0 a 1 de una capa
+
+
+# --- CAPAS PROCEDURALES (bucles sin costura: frecuencias con ciclos enteros por bucle) ---
+def _tone(t, freq):
+    return np.sin(2 * math.pi * (round(freq * LOOP_SECONDS) / LOOP_SECONDS) * t)
+
+
+def _smooth_noise(rng, n, width):
+    kernel = np.ones(width) / width
+    return np.convolve(rng.uniform(-1, 1, n), kernel, mode="same") * math.sqrt(width)
+
+
+def _synth_theme(t, rng):
+    # Pad en La menor con campanas cada 2 s
+    pad = (_tone(t, 110) + 0.7 * _tone(t, 130.81) + 0.6 * _tone(t, 164.81)) * (0.6 + 0.4 * _tone(t, 0.125))
+    bell_t = t % 2.0
+    bell = _tone(t, 880) * np.exp(-3 * bell_t) * 0.5
+    return pad * 0.4 + bell
+
+
+def _synth_drone(t, rng):
+    return (_tone(t, 55) + 0.6 * _tone(t, 82.5)) * (0.7 + 0.3 * _tone(t, 0.25)) + 0.15 * _smooth_noise(rng, len(t), 64)
+
+
+def _synth_pulse(t, rng):
+    # Latido: dos golpes graves por segundo
+    beat = t % 1.0
+    thump = np.exp(-30 * beat) + 0.6 * np.exp(-30 * np.clip(beat - 0.25, 0, None)) * (beat >= 0.25)
+    return _tone(t, 48) * thump
+
+
+def _synth_tension(t, rng):
+    # Segunda menor aguda con trémolo
+    return (_tone(t, 880) + _tone(t, 932.33)) * (0.5 + 0.5 * _tone(t, 6)) * 0.5
+
+
+def _synth_shadow(t, rng):
+    swell = np.sin(math.pi * t / LOOP_SECONDS * 2) ** 2
+    return _smooth_noise(rng, len(t), 16) * swell + 0.3 * _tone(t, 36.71) * swell
+
+
+# (nombre, archivos candidatos, síntesis si no hay archivo, alinear al bucle común)
+STEMS = [
+    ("theme", ["menu_theme.ogg", "menu_theme.mp3"], _synth_theme, False),
+    ("drone", [os.path.join(config.MUSIC_DIR, "drone.ogg")], _synth_drone, True),
+    ("pulse", [os.path.join(config.MUSIC_DIR, "pulse.ogg")], _synth_pulse, True),
+    ("tension", [os.path.join(config.MUSIC_DIR, "tension.ogg")], _synth_tension, True),
+    ("shadow", [os.path.join(config.MUSIC_DIR, "shadow.ogg")], _synth_shadow, True),
+]
+
+# Mezclas con nombre: capa -> volumen (las que no aparecen van a 0)
+MIXES = {
+    "silence": {},
+    "menu": {"theme": 0.6},
+    "calm": {"drone": 0.5},
+    "argument": {"drone": 0.7, "pulse": 0.5},
+    "event": {"drone": 1.0, "pulse": 1.0, "tension": 0.9},
+    "explore": {"drone": 0.6, "pulse": 0.2},
+}
+
+
+class MusicEngine:
+    def __init__(self):
+        self.stems = {}          # nombre -> Sound (publicado entero al terminar load())
+        self.channels = {}       # nombre -> Channel
+        self.volumes = {}        # volumen actual de cada capa (0..1)
+        self.target = {}
+        self.master = 1.0
+        self.playing = False
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+
+    # --- CARGA (hilo de precarga) ---
+    def load(self):
+        """Decodifica o sintetiza todas las capas. Se llama desde la precarga, nunca en una transición."""
+        if self.loaded.is_set() or not pygame.mixer.get_init():
+            return
+        freq, size, channels = pygame.mixer.get_init()
+        frame_bytes = abs(size) // 8 * channels
+        loop_bytes = int(LOOP_SECONDS * freq) * frame_bytes
+        stems = {}
+        for name, files, synth, aligned in STEMS:
+            sound = None
+            for path in files:
+                if os.path.exists(path):
+                    try:
+                        sound = pygame.mixer.Sound(path)
+                    except Exception as e:
+                        print(f"Error musica ({path}): {e}")
+                    break
+            if sound is None and NUMPY_AVAILABLE:
+                sound = self._synthesize(synth, freq, channels, size, seed=len(stems))
+            if sound is None:
+                continue
+            if aligned:
+                sound = self._align(sound, loop_bytes)
+            stems[name] = sound
+        with self.lock:
+            self.stems = stems
+        self.loaded.set()
+
+    @staticmethod
+    def _synthesize(synth, freq, channels, size, seed):
+        if abs(size) != 16:
+            return None
+        t = np.arange(int(LOOP_SECONDS * freq)) / freq
+        samples = synth(t, np.random.default_rng(seed))
+        peak = float(np.abs(samples).max()) or 1.0
+        pcm = (samples * (0.5 * 32767 / peak)).astype(np.int16)
+        if channels > 1:
+            pcm = np.repeat(pcm, channels)
+        return pygame.mixer.Sound(buffer=pcm.tobytes())
+
+    @staticmethod
+    def _align(sound, loop_bytes):
+        # Mismo número de muestras que el bucle común: las capas siguen alineadas al repetirse
+        raw = sound.get_raw()
+        if len(raw) == loop_bytes:
+            return sound
+        if len(raw) < loop_bytes:
+            raw = raw * (loop_bytes // max(1, len(raw)) + 1)
+        return pygame.mixer.Sound(buffer=raw[:loop_bytes])
+
+    # --- REPRODUCCIÓN (hilo principal) ---
+    def _start(self):
+        # Todas las capas arrancan en la misma llamada con el mezclador en pausa: quedan alineadas
+        with self.lock:
+            stems = dict(self.stems)
+        first = config.VOICE_CHANNELS
+        pygame.mixer.set_reserved(config.RESERVED_CHANNELS)
+        pygame.mixer.pause()
+        for i, (name, _, _, _) in enumerate(STEMS):
+            if name not in stems:
+                continue
+            channel = pygame.mixer.Channel(first + i)
+            channel.set_volume(0.0)
+            channel.play(stems[name], loops=-1)
+            self.channels[name] = channel
+            self.volumes[name] = 0.0
+        pygame.mixer.unpause()
+        self.playing = True
+
+    def set_mix(self, mix):
+        """Mezcla objetivo: nombre de MIXES o {capa: volumen}."""
+        self.target = MIXES.get(mix, {}) if isinstance(mix, str) else mix
+
+    def set_volume(self, volume):
+        self.master = max(0.0, min(1.0, volume))
+        for name in self.channels:
+            self.channels[name].set_volume(self.volumes[name] * self.master)
+
+    def update(self, dt):
+        """Avanza los crossfades `dt` segundos (una vez por frame)."""
+        if not self.playing:
+            if not self.loaded.is_set():
+                return
+            self._start()
+        step = dt / CROSSFADE_SECONDS
+        for name, channel in self.channels.items():
+            current = self.volumes[name]
+            goal = self.target.get(name, 0.0)
+            if current == goal:
+                continue
+            current = min(goal, current + step) if goal > current else max(goal, current - step)
+            self.volumes[name] = current
+            channel.set_volume(current * self.master)
+
+    def stop(self):
+        for channel in self.channels.values():
+            channel.stop()
+        self.channels.clear()
+        self.playing = False
+
+
+engine = MusicEngine()
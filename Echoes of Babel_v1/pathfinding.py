@@ -0,0 +1,209 @@
+# pathfinding.py
+# Campo de flujo compartido: un BFS desde la celda del jugador da a cada celda la dirección
+# hacia él. Se recalcula solo cuando el jugador cambia de celda (o cambian los obstáculos) y
+# todos los perseguidores lo consultan, en vez de un A* por fantasma y por paso.
+import math
+from collections import deque
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FLOW_RANGE = 40  # Radio del campo en celdas; más allá los perseguidores pierden el rastro
+
+DIAG = math.sqrt(0.5)
+# Vecinos (dx, dy); las diagonales exigen que las dos ortogonales estén libres
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+class FlowField:
+    """Distancias BFS (4-conexas) alrededor del jugador sobre una rejilla de `cell` px.
+
+    Solo se calcula una ventana de FLOW_RANGE celdas alrededor del objetivo; fuera de ella
+    (o en celdas inalcanzables) la dirección es nula.
+    """
+    def __init__(self, world_width, world_height, cell=32, max_range=FLOW_RANGE):
+        self.cell = cell
+        self.cols = int(math.ceil(world_width / cell))
+        self.rows = int(math.ceil(world_height / cell))
+        self.max_range = max_range
+        self.blocked = bytearray(self.cols * self.rows)
+        self.target = None          # Celda del jugador para la que vale el campo
+        self.target_pos = (0.0, 0.0)
+        self.dirty = True
+        self.recomputes = 0
+        # Ventana calculada: origen (celdas) y tamaño; dist -1 = sin alcanzar
+        self.origin = (0, 0)
+        self.size = (0, 0)
+        self.dist = None
+        self.flow_x = self.flow_y = None
+
+    def cell_of(self, x, y):
+        return int(x // self.cell), int(y // self.cell)
+
+    def set_obstacles(self, walls, solid_cells=(), thickness=20):
+        """Marca como bloqueadas las celdas que tocan los muros [(id, x1, y1, x2, y2, material)]
+        y las celdas sólidas [(col, fila)] dadas."""
+        blocked = bytearray(self.cols * self.rows)
+        half = thickness / 2
+        step = self.cell / 2
+        for _, x1, y1, x2, y2, _ in walls:
+            length = math.hypot(x2 - x1, y2 - y1)
+            n = int(length / step) + 1
+            for k in range(n + 1):
+                t = k / n
+                px, py = x1 + (x2 - x1) * t, y1 + (y2 - y1) * t
+                c0, r0 = self.cell_of(px - half, py - half)
+                c1, r1 = self.cell_of(px + half, py + half)
+                for r in range(max(0, r0), min(self.rows - 1, r1) + 1):
+                    for c in range(max(0, c0), min(self.cols - 1, c1) + 1):
+                        blocked[r * self.cols + c] = 1
+        for c, r in solid_cells:
+            if 0 <= c < self.cols and 0 <= r < self.rows:
+                blocked[r * self.cols + c] = 1
+        if blocked != self.blocked:
+            self.blocked = blocked
+            self.dirty = True
+
+    def update(self, px, py):
+        """Sigue al jugador en (px, py). Devuelve True si el campo se recalculó."""
+        self.target_pos = (px, py)
+        target = self.cell_of(px, py)
+        target = (min(max(target[0], 0), self.cols - 1), min(max(target[1], 0), self.rows - 1))
+        if target == self.target and not self.dirty:
+            return False
+        self.target = target
+        self.dirty = False
+        self.recomputes += 1
+        tc, tr = target
+        c0, r0 = max(0, tc - self.max_range), max(0, tr - self.max_range)
+        c1, r1 = min(self.cols, tc + self.max_range + 1), min(self.rows, tr + self.max_range + 1)
+        self.origin = (c0, r0)
+        self.size = (c1 - c0, r1 - r0)
+        if NUMPY_AVAILABLE:
+            self._compute_numpy(c0, r0, c1, r1)
+        else:
+            self._compute_python(c0, r0, c1, r1)
+        return True
+
+    def _compute_numpy(self, c0, r0, c1, r1):
+        grid = np.frombuffer(bytes(self.blocked), dtype=np.uint8).reshape(self.rows, self.cols)
+        free = grid[r0:r1, c0:c1] == 0
+        tc, tr = self.target[0] - c0, self.target[1] - r0
+        free[tr, tc] = True  # El jugador puede estar pegado a un muro
+        dist = np.full(free.shape, -1, dtype=np.int32)
+        frontier = np.zeros(free.shape, dtype=bool)
+        frontier[tr, tc] = True
+        dist[tr, tc] = 0
+        # BFS por frentes de onda: cada iteración expande todo el frente a la vez
+        for d in range(1, self.max_range * 4):
+            grow = np.zeros_like(frontier)
+            grow[1:, :] |= frontier[:-1, :]
+            grow[:-1, :] |= frontier[1:, :]
+            grow[:, 1:] |= frontier[:, :-1]
+            grow[:, :-1] |= frontier[:, 1:]
+            grow &= free & (dist < 0)
+            if not grow.any():
+                break
+            dist[grow] = d
+            frontier = grow
+        self.dist = dist
+
+        # Dirección por celda: hacia el vecino con menor distancia
+        h, w = dist.shape
+        padded = np.full((h + 2, w + 2), np.inf)
+        padded[1:-1, 1:-1] = np.where(dist >= 0, dist, np.inf)
+        candidates = []
+        for dx, dy in NEIGHBOURS:
+            nd = padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+            if dx and dy:
+                corner_free = np.isfinite(padded[1:1 + h, 1 + dx:1 + dx + w]) & np.isfinite(padded[1 + dy:1 + dy + h, 1:1 + w])
+                nd = np.where(corner_free, nd, np.inf)
+            candidates.append(nd)
+        stack = np.stack(candidates)
+        best = np.argmin(stack, axis=0)
+        improves = np.take_along_axis(stack, best[None], axis=0)[0] < padded[1:-1, 1:-1]
+        steps = np.array([(dx, dy) if not (dx and dy) else (dx * DIAG, dy * DIAG) for dx, dy in NEIGHBOURS])
+        self.flow_x = np.where(improves, steps[best, 0], 0.0)
+        self.flow_y = np.where(improves, steps[best, 1], 0.0)
+
+    def _compute_python(self, c0, r0, c1, r1):
+        w, h = c1 - c0, r1 - r0
+        tc, tr = self.target[0] - c0, self.target[1] - r0
+        dist = [-1] * (w * h)
+        dist[tr * w + tc] = 0
+        blocked, cols = self.blocked, self.cols
+        pending = deque([(tc, tr)])
+        while pending:
+            c, r = pending.popleft()
+            d = dist[r * w + c] + 1
+            for dx, dy in NEIGHBOURS[:4]:
+                nc, nr = c + dx, r + dy
+                if 0 <= nc < w and 0 <= nr < h and dist[nr * w + nc] < 0 and not blocked[(nr + r0) * cols + nc + c0]:
+                    dist[nr * w + nc] = d
+                    pending.append((nc, nr))
+        self.dist = dist
+        self.flow_x = self.flow_y = None  # Sin NumPy la dirección se busca al consultar
+
+    def _dist_at(self, c, r):
+        # Distancia en coordenadas de ventana (None = fuera o sin alcanzar)
+        w, h = self.size
+        if not (0 <= c < w and 0 <= r < h):
+            return None
+        d = self.dist[r * w + c]
+        return d if d >= 0 else None
+
+    def _step_python(self, c, r):
+        here = self._dist_at(c, r)
+        if here is None:
+            return 0.0, 0.0
+        best, step = here, (0.0, 0.0)
+        for dx, dy in NEIGHBOURS:
+            d = self._dist_at(c + dx, r + dy)
+            if d is None or d >= best:
+                continue
+            if dx and dy and (self._dist_at(c + dx, r) is None or self._dist_at(c, r + dy) is None):
+                continue
+            best, step = d, ((dx, dy) if not (dx and dy) else (dx * DIAG, dy * DIAG))
+        return step
+
+    def steer(self, xs, ys):
+        """Direcciones unitarias (dx, dy) hacia el jugador para las posiciones dadas.
+
+        Con NumPy recibe y devuelve arrays; sin NumPy, listas. En la celda del jugador la
+        dirección apunta directamente a él.
+        """
+        if self.dist is None:
+            zeros = np.zeros(len(xs)) if NUMPY_AVAILABLE else [0.0] * len(xs)
+            return zeros, zeros.copy()
+        px, py = self.target_pos
+        c0, r0 = self.origin
+        w, h = self.size
+        if NUMPY_AVAILABLE:
+            c = (xs // self.cell).astype(np.int64) - c0
+            r = (ys // self.cell).astype(np.int64) - r0
+            inside = (c >= 0) & (c < w) & (r >= 0) & (r < h)
+            ci, ri = np.where(inside, c, 0), np.where(inside, r, 0)
+            dx = np.where(inside, self.flow_x[ri, ci], 0.0)
+            dy = np.where(inside, self.flow_y[ri, ci], 0.0)
+            at_target = inside & (self.dist[ri, ci] == 0)
+            if at_target.any():
+                tx, ty = px - xs[at_target], py - ys[at_target]
+                norm = np.maximum(np.hypot(tx, ty), 1e-6)
+                dx[at_target] = tx / norm
+                dy[at_target] = ty / norm
+            return dx, dy
+        out_x, out_y = [], []
+        for x, y in zip(xs, ys):
+            c, r = int(x // self.cell) - c0, int(y // self.cell) - r0
+            if self._dist_at(c, r) == 0:
+                tx, ty = px - x, py - y
+                norm = max(math.hypot(tx, ty), 1e-6)
+                step = (tx / norm, ty / norm)
+            else:
+                step = self._step_python(c, r)
+            out_x.append(step[0])
+            out_y.append(step[1])
+        return out_x, out_y
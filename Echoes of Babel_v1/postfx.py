@@ -0,0 +1,127 @@
+# postfx.py
+# Post-procesado de pantalla completa: se aplica una sola vez al frame terminado, después de
+# Scene.draw(). Las escenas solo fijan intensidades; el coste ya no crece con cada texto
+# glitcheado o rectángulo de interferencia. El fundido a negro va al final, encima del grano
+# y las scanlines, para que una escena fundida llegue a negro puro.
+import pygame
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MAX_BANDS = 16  # Bandas de glitch por frame (las que sobran se ignoran)
+
+
+class PostFX:
+    """Intensidades del post-procesado de una escena.
+
+    Valen para un solo frame: la escena las fija en draw() y apply() las pone a cero al terminar.
+    """
+    def __init__(self):
+        self.noise_frames = []      # Frames de grano pregenerados (OverlayCache)
+        self.flash_color = (255, 255, 255)
+        self.bands = []             # [(rect, rgb_offset, desplazamiento)]
+        self._scanline_surf = None
+        self._veil = None
+        self.reset()
+
+    def reset(self):
+        self.grain = 0              # Capas de grano (0 = sin grano)
+        self.scanlines = 0.0        # Oscurecimiento de una de cada dos líneas (0..1)
+        self.rgb_offset = 0         # Separación rojo/cian de todo el frame (px)
+        self.tear_lines = 0         # Bandas horizontales desplazadas al azar
+        self.tear_shift = 0         # Desplazamiento máximo de esas bandas (px)
+        self.flash = 0.0            # Mezcla con flash_color (0..1)
+        self.fade = 0               # Fundido a negro (0..255), lo último que se aplica
+        self.bands.clear()
+
+    def add_band(self, rect, rgb_offset, shift=0):
+        """Aberración y desplazamiento limitados a `rect` (p. ej. el de un texto glitcheado)."""
+        if len(self.bands) < MAX_BANDS:
+            rgb_offset, shift = int(rgb_offset), int(shift)
+            # Margen para que el texto desplazado y los canales separados no se corten
+            margin = abs(shift) + rgb_offset
+            self.bands.append((pygame.Rect(rect).inflate(margin * 2, 0), rgb_offset, shift))
+
+    def _scanlines(self, size):
+        # Superficie de multiplicación: filas impares a 255, pares oscurecidas
+        level = int(255 * (1.0 - self.scanlines))
+        if self._scanline_surf is None or self._scanline_surf[0] != (size, level):
+            surf = pygame.Surface(size)
+            surf.fill((255, 255, 255))
+            for y in range(0, size[1], 2):
+                surf.fill((level, level, level), (0, y, size[0], 1))
+            self._scanline_surf = ((size, level), surf)
+        return self._scanline_surf[1]
+
+    def _black_veil(self, size):
+        if self._veil is None or self._veil.get_size() != size:
+            self._veil = pygame.Surface(size)
+        return self._veil
+
+
+def _split_channels(surface, rect, offset):
+    """Desplaza el rojo `offset` px a la derecha y el azul a la izquierda dentro de `rect`."""
+    rect = rect.clip(surface.get_rect())
+    if offset <= 0 or rect.width <= offset * 2 or rect.height <= 0:
+        return
+    if NUMPY_AVAILABLE:
+        px = pygame.surfarray.pixels3d(surface)
+        region = px[rect.left:rect.right, rect.top:rect.bottom]
+        region[offset:, :, 0] = region[:-offset, :, 0]
+        region[:-offset, :, 2] = region[offset:, :, 2]
+        del px, region  # Libera el bloqueo de la superficie
+    else:
+        area = surface.subsurface(rect)
+        red = area.copy()
+        red.fill((255, 0, 0), special_flags=pygame.BLEND_RGB_MULT)
+        cyan = area.copy()
+        cyan.fill((0, 255, 255), special_flags=pygame.BLEND_RGB_MULT)
+        area.fill((0, 0, 0))
+        area.blit(cyan, (-offset, 0))
+        area.blit(red, (offset, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+
+def _shift_rows(surface, rect, shift):
+    rect = rect.clip(surface.get_rect())
+    if shift and rect.height > 0:
+        area = surface.subsurface(rect)
+        area.blit(area.copy(), (shift, 0))  # Recortado al propio recuadro
+
+
+def apply(surface, fx, rng):
+    """Aplica `fx` sobre el frame ya dibujado. `rng` es el azar de efectos de la escena."""
+    w, h = surface.get_size()
+    # Bandas desplazadas (interferencia) y las de los textos glitcheados
+    for _ in range(fx.tear_lines):
+        band = pygame.Rect(0, rng.randrange(h), w, rng.randint(2, 12))
+        _shift_rows(surface, band, rng.randint(-fx.tear_shift, fx.tear_shift))
+    for rect, offset, shift in fx.bands:
+        _shift_rows(surface, rect, shift)
+        _split_channels(surface, rect, offset)
+    if fx.rgb_offset > 0:
+        _split_channels(surface, surface.get_rect(), fx.rgb_offset)
+
+    # Grano animado: rota entre frames pregenerados con un desplazamiento al azar
+    if fx.noise_frames:
+        first = pygame.time.get_ticks() // 80
+        for i in range(fx.grain):
+            noise = fx.noise_frames[(first + i) % len(fx.noise_frames)]
+            surface.blit(noise, (rng.randint(-50, 50), rng.randint(-50, 50)), special_flags=pygame.BLEND_RGBA_ADD)
+
+    if fx.scanlines > 0:
+        surface.blit(fx._scanlines((w, h)), (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+
+    if fx.flash > 0:
+        veil = pygame.Surface((w, h))
+        veil.fill(fx.flash_color)
+        veil.set_alpha(int(255 * min(1.0, fx.flash)))
+        surface.blit(veil, (0, 0))
+
+    if fx.fade > 0:
+        veil = fx._black_veil((w, h))
+        veil.set_alpha(min(255, int(fx.fade)))
+        surface.blit(veil, (0, 0))
+    fx.reset()
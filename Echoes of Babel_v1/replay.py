@@ -0,0 +1,172 @@
+# replay.py
+# Grabación y reproducción determinista de la entrada (voz + teclado) por paso de simulación.
+# Formato .ebr: cabecera "<4sBI" (magia, versión, semilla) + cuerpo zlib con registros
+# "<IB" (paso, tipo) seguidos del comando (longitud + utf-8), de la tecla ("<iH" key, mod) o
+# del nivel de voz en dB ("<h", solo cuando cambia).
+import random
+import struct
+import threading
+import zlib
+import pygame
+
+MAGIC = b"EBRP"
+VERSION = 2
+HEADER = struct.Struct("<4sBI")
+RECORD = struct.Struct("<IB")
+KEY = struct.Struct("<iH")
+STR_LEN = struct.Struct("<H")
+LEVEL = struct.Struct("<h")
+
+KIND_COMMAND = 0
+KIND_KEYDOWN = 1
+KIND_KEYUP = 2
+KIND_LEVEL = 3
+
+# Semilla base de la sesión: None = cada escena usa una semilla aleatoria (juego normal)
+base_seed = None
+# InputRecorder o InputReplayer en uso (None = entrada en vivo sin registrar)
+active = None
+
+_counters = {}
+_lock = threading.Lock()
+
+
+def seed_scenes(seed):
+    """Fija la semilla base y reinicia los contadores: la n-ésima escena de cada clase tendrá siempre el mismo RNG."""
+    global base_seed
+    with _lock:
+        base_seed = seed
+        _counters.clear()
+
+
+def scene_rngs(name):
+    """(rng de simulación, rng de efectos) para una escena nueva.
+
+    El de efectos solo se usa al dibujar: el número de frames renderizados varía con la
+    máquina y no debe desplazar la secuencia de la simulación.
+    """
+    if base_seed is None:
+        return random.Random(), random.Random()
+    with _lock:
+        n = _counters.get(name, 0)
+        _counters[name] = n + 1
+    seed = zlib.crc32(f"{name}:{n}".encode("utf-8"), base_seed)
+    return random.Random(seed), random.Random(seed ^ 0x5EED)
+
+
+def deterministic():
+    """True al grabar o reproducir: los sistemas asíncronos deben comportarse de forma síncrona."""
+    return active is not None
+
+
+class InputRecorder:
+    """Registra, por paso de simulación, los comandos de voz consumidos y las teclas procesadas."""
+    replaying = False
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.frame = 0
+        self.records = []
+        self.last_level = None
+
+    def commands(self, live):
+        for cmd in live:
+            self.records.append((self.frame, KIND_COMMAND, cmd))
+        return live
+
+    def level(self, live):
+        """Nivel de voz (dB enteros) que ve la simulación en este paso."""
+        db = int(round(live))
+        if db != self.last_level:
+            self.records.append((self.frame, KIND_LEVEL, db))
+            self.last_level = db
+        return db
+
+    def events(self, live):
+        for e in live:
+            if e.type == pygame.KEYDOWN:
+                self.records.append((self.frame, KIND_KEYDOWN, (e.key, e.mod)))
+            elif e.type == pygame.KEYUP:
+                self.records.append((self.frame, KIND_KEYUP, (e.key, e.mod)))
+        return live
+
+    def step(self):
+        self.frame += 1
+
+    def close(self):
+        body = []
+        for frame, kind, payload in self.records:
+            body.append(RECORD.pack(frame, kind))
+            if kind == KIND_COMMAND:
+                raw = payload.encode("utf-8")
+                body.append(STR_LEN.pack(len(raw)) + raw)
+            elif kind == KIND_LEVEL:
+                body.append(LEVEL.pack(max(-32768, min(32767, payload))))
+            else:
+                body.append(KEY.pack(*payload))
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed))
+            f.write(zlib.compress(b"".join(body), 9))
+        print(f"[REPLAY] {len(self.records)} entradas grabadas en {self.path} ({self.frame} pasos)")
+
+
+class InputReplayer:
+    """Sustituye la entrada en vivo por la grabada, paso a paso."""
+    replaying = True
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, self.seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"{path} no es una grabación compatible")
+        body = zlib.decompress(data[HEADER.size:])
+        self.by_frame = {}
+        self.last_frame = 0
+        offset = 0
+        while offset < len(body):
+            frame, kind = RECORD.unpack_from(body, offset)
+            offset += RECORD.size
+            if kind == KIND_COMMAND:
+                (n,) = STR_LEN.unpack_from(body, offset)
+                offset += STR_LEN.size
+                payload = body[offset:offset + n].decode("utf-8")
+                offset += n
+            elif kind == KIND_LEVEL:
+                (payload,) = LEVEL.unpack_from(body, offset)
+                offset += LEVEL.size
+            else:
+                payload = KEY.unpack_from(body, offset)
+                offset += KEY.size
+            self.by_frame.setdefault(frame, []).append((kind, payload))
+            self.last_frame = frame
+        self.frame = 0
+        self.last_level = -60
+
+    def commands(self, live):
+        return [p for k, p in self.by_frame.get(self.frame, ()) if k == KIND_COMMAND]
+
+    def level(self, live):
+        for kind, payload in self.by_frame.get(self.frame, ()):
+            if kind == KIND_LEVEL:
+                self.last_level = payload
+        return self.last_level
+
+    def events(self, live):
+        out = []
+        for kind, payload in self.by_frame.get(self.frame, ()):
+            if kind == KIND_KEYDOWN:
+                out.append(pygame.event.Event(pygame.KEYDOWN, key=payload[0], mod=payload[1]))
+            elif kind == KIND_KEYUP:
+                out.append(pygame.event.Event(pygame.KEYUP, key=payload[0], mod=payload[1]))
+        return out
+
+    def step(self):
+        self.frame += 1
+
+    def finished(self):
+        return self.frame > self.last_frame
+
+    def close(self):
+        print(f"[REPLAY] Reproducción terminada en el paso {self.frame}")
@@ -0,0 +1,68 @@
+# scene_loader.py
+import importlib
+import threading
+import pygame
+import config
+
+# Estado -> "modulo:Clase". Los módulos se importan al construir la escena (o en la precarga),
+# así la ventana se abre sin cargar antes todos los niveles
+SCENE_REGISTRY = {
+    config.STATE_BOOT: "scenes:BootSequence",
+    config.STATE_WARNING: "scenes:WarningScene",
+    config.STATE_MENU: "scenes:MenuScene",
+    config.STATE_LEVEL_ZERO: "level_zero:LevelZeroScene",
+    config.STATE_DEMO: "demo_level:DemoScene",
+}
+
+
+def resolve(target):
+    """Clase de escena a partir de "modulo:Clase" (o la propia clase)."""
+    if isinstance(target, str):
+        module, name = target.split(":")
+        return getattr(importlib.import_module(module), name)
+    return target
+
+
+class SceneLoader:
+    """Construye la siguiente escena en un hilo mientras la actual hace fade-out."""
+    def __init__(self, scenes_dict=None):
+        self.scenes_dict = SCENE_REGISTRY if scenes_dict is None else scenes_dict
+        self.job = None
+
+    def preload(self, state):
+        """Empieza a preparar `state` en segundo plano (ignora repeticiones y estados desconocidos)."""
+        if state not in self.scenes_dict:
+            return
+        if self.job is not None and self.job["state"] == state:
+            return
+        job = {"state": state, "scene": None, "error": None}
+        job["thread"] = threading.Thread(target=self._build, args=(job,), daemon=True)
+        self.job = job
+        job["thread"].start()
+
+    def _create(self, state):
+        return resolve(self.scenes_dict[state])(pygame.display.get_surface())
+
+    def _build(self, job):
+        try:
+            job["scene"] = self._create(job["state"])
+        except Exception as e:
+            job["error"] = e
+
+    def is_pending(self, state):
+        """True si `state` se está construyendo todavía en el hilo."""
+        return self.job is not None and self.job["state"] == state and self.job["thread"].is_alive()
+
+    def take(self, state):
+        """Entrega la escena preparada; si no se precargó (o falló) la construye en el acto."""
+        job, self.job = self.job, None
+        scene = None
+        if job is not None and job["state"] == state:
+            job["thread"].join()
+            if job["error"] is not None:
+                print(f"[SISTEMA] Error precargando escena '{state}': {job['error']}")
+            scene = job["scene"]
+        if scene is None:
+            scene = self._create(state)
+        scene.enter()
+        return scene
@@ -11,68 +11,158 @@ import math
 import array
 import os 
 import database 
+import replay
+import warmup
+# postfx, babble y music solo dependen de pygame: el arranque ya los usa (velo, voces, mezcla)
+import postfx
+import babble
+import music
+from typewriter import Typewriter
 from entities import Player
+from command_decoder import find_phrases
 
 try:
-    import pyaudio
-    from vosk import Model, KaldiRecognizer
-    AUDIO_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    AUDIO_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+def audio_available():
+    """Hay micrófono y reconocedor. voice (multiprocessing, memoria compartida, detector) se
+    importa aquí la primera vez, normalmente ya en la precarga, no antes de abrir la ventana."""
+    import voice
+    return voice.AUDIO_AVAILABLE
+
 
 # --- MOTOR DE AUDIO HÍBRIDO ---
 class VoiceEngine:
+    """Voces de los personajes: cada línea se sintetiza por bloques (babble) y se encola en su canal."""
+    # Canal reservado de cada personaje (los secundarios comparten)
+    CHANNELS = {"sombra": 0, "elena": 1, "aris": 2, "sistema": 2}
+
     def __init__(self):
         self.channels = {}
         try:
-            pygame.mixer.set_reserved(2)
-            self.channels['sombra'] = pygame.mixer.Channel(0)
-            self.channels['elena'] = pygame.mixer.Channel(1)
+            if pygame.mixer.get_num_channels() < config.MIXER_CHANNELS:
+                pygame.mixer.set_num_channels(config.MIXER_CHANNELS)
+            pygame.mixer.set_reserved(config.RESERVED_CHANNELS)
+            by_index = {}  # Un solo objeto por canal: streams se indexa por canal
+            for character, index in self.CHANNELS.items():
+                self.channels[character] = by_index.setdefault(index, pygame.mixer.Channel(index))
         except:
             print("Error inicializando canales de voz")
+        init = pygame.mixer.get_init()
+        self.rate = init[0] if init else babble.SAMPLE_RATE
+        self.out_channels = init[2] if init else 1
+        self.streams = {}  # canal -> (Babble, volumen)
 
-        self.sound_cache = {}
+    def speak(self, text, character, max_seconds=None):
+        """Empieza a decir `text` ya; el resto de la línea se genera en pump()."""
+        channel = self.channels.get(character)
+        if channel is None:
+            return
+        vol_var = random.uniform(0.8, 1.0)
+        voice = babble.VOICES.get(character, babble.VOICES["aris"])
+        self.streams[channel] = (babble.Babble(text, character, self.rate, max_seconds), voice["volume"] * vol_var)
+        channel.stop()
+        self._feed(channel)
 
-    def _generate_noise_sound(self, duration=1.5, pitch=100, volume=0.5, style="shadow"):
-        sample_rate = 44100
-        n_samples = int(sample_rate * duration)
-        buf = array.array('h', [0] * n_samples)
-        
-        for i in range(n_samples):
-            t = i / sample_rate
-            if style == "shadow":
-                envelope = 1.0 + 0.5 * math.sin(t * 10) 
-                raw_noise = random.uniform(-1, 1)
-                saw_wave = (i % int(sample_rate/pitch)) / (sample_rate/pitch) * 2 - 1
-                val = (raw_noise * 0.8 + saw_wave * 0.2) * envelope
-                val = int(val * 32767 * volume * 0.8) 
+    def _feed(self, channel):
+        # Un bloque sonando y otro en cola; se generan solo cuando hacen falta
+        stream, volume = self.streams[channel]
+        while not (channel.get_busy() and channel.get_queue() is not None):
+            samples = stream.next_chunk()
+            if samples is None:
+                del self.streams[channel]
+                return
+            sound = babble.to_sound(samples, volume, self.out_channels)
+            if channel.get_busy():
+                channel.queue(sound)
             else:
-                freq = 400 + math.sin(t * 5) * 50
-                sine_wave = math.sin(2 * math.pi * freq * t)
-                digital_break = 1.0 if (i % 4000) < 3500 else 0.0
-                val = int(sine_wave * 32767 * volume * 0.6 * digital_break)
-            buf[i] = max(-32767, min(32767, val))
-        return pygame.mixer.Sound(buffer=buf)
+                channel.play(sound)
 
-    def speak(self, text, character):
-        cache_key = f"{character}_generic"
-        if cache_key not in self.sound_cache:
-            if character == "sombra":
-                self.sound_cache[cache_key] = self._generate_noise_sound(1.5, 60, 0.8, "shadow")
-            else:
-                self.sound_cache[cache_key] = self._generate_noise_sound(0.8, 440, 0.4, "elena")
-        
-        sound = self.sound_cache[cache_key]
-        if character in self.channels:
-            vol_var = random.uniform(0.8, 1.0)
-            self.channels[character].set_volume(vol_var)
-            self.channels[character].play(sound)
+    def pump(self):
+        """Rellena las colas de los canales que están hablando (una vez por paso)."""
+        for channel in list(self.streams):
+            self._feed(channel)
 
 voice_engine = None
 
+# --- CACHÉ DE CAPAS DE PANTALLA (Viñeta y grano) ---
+class OverlayCache:
+    """Genera la viñeta y los frames de ruido una sola vez por resolución y los comparte entre escenas."""
+    NOISE_FRAMES = 4
+    NOISE_DOTS = 3000
+
+    def __init__(self):
+        self.vignettes = {}
+        self.noise = {}
+        # Las escenas pueden construirse en el hilo del SceneLoader
+        self.lock = threading.Lock()
+
+    def get_vignette(self, size):
+        with self.lock:
+            if size not in self.vignettes:
+                self.vignettes[size] = self._build_vignette(size)
+            return self.vignettes[size]
+
+    def get_noise_frames(self, size):
+        with self.lock:
+            if size not in self.noise:
+                self.noise[size] = [self._build_noise(size) for _ in range(self.NOISE_FRAMES)]
+            return self.noise[size]
+
+    def _prepare(self, surf):
+        # Con la ventana abierta, convertir al formato de pantalla acelera los blits
+        if pygame.display.get_surface() is not None:
+            return surf.convert_alpha()
+        return surf
+
+    def _build_vignette(self, size):
+        w, h = size
+        radius = int(h * 0.65)
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 255))
+        if NUMPY_AVAILABLE:
+            xs = np.arange(w) - w // 2
+            ys = np.arange(h) - h // 2
+            inside = (xs[:, None] ** 2 + ys[None, :] ** 2) <= radius * radius
+            alpha = pygame.surfarray.pixels_alpha(surf)
+            alpha[inside] = 0
+            del alpha  # Libera el bloqueo de la superficie
+        else:
+            hole = pygame.Surface(size, pygame.SRCALPHA)
+            hole.fill((0, 0, 0, 0))
+            pygame.draw.circle(hole, (0, 0, 0, 255), (w // 2, h // 2), radius)
+            surf.blit(hole, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
+        return self._prepare(surf)
+
+    def _build_noise(self, size):
+        w, h = size
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 0))
+        if NUMPY_AVAILABLE:
+            xs = np.random.randint(0, w, self.NOISE_DOTS)
+            ys = np.random.randint(0, h, self.NOISE_DOTS)
+            rgb = pygame.surfarray.pixels3d(surf)
+            rgb[xs, ys] = 200
+            del rgb
+            alpha = pygame.surfarray.pixels_alpha(surf)
+            alpha[xs, ys] = np.random.randint(10, 61, self.NOISE_DOTS)
+            del alpha
+        else:
+            for i in range(self.NOISE_DOTS):
+                x = random.randint(0, w - 1)
+                y = random.randint(0, h - 1)
+                surf.set_at((x, y), (200, 200, 200, random.randint(10, 60)))
+        return self._prepare(surf)
+
+overlay_cache = OverlayCache()
+
 CURRENT_SESSION = {
     "slot": 1,
-    "should_load": False
+    "should_load": False,
+    "autosave": False  # Solo con una ranura elegida en el menú (no con el código secreto)
 }
 
 # --- CLASE BASE ---
@@ -83,6 +173,8 @@ class Scene:
             voice_engine = VoiceEngine()
             
         self.screen = screen
+        # Streams de azar propios: `rng` para la simulación, `fx_rng` solo para dibujar
+        self.rng, self.fx_rng = replay.scene_rngs(type(self).__name__)
         self.update_fonts()
         self.next_state = None
         self.alpha = 255
@@ -93,8 +185,10 @@ class Scene:
         for _ in range(40): 
             self.fog_particles.append(self._create_fog())
 
+        # Post-procesado del frame (main.py lo aplica después de draw)
+        self.post_fx = postfx.PostFX()
         self.vignette_surf = None
-        self.noise_surf = None
+        self.noise_frames = []
         self._generate_vignette()
         self._generate_noise()
         self.click_sound = self._generate_mechanical_click()
@@ -108,31 +202,20 @@ class Scene:
 
     def _create_fog(self):
         return {
-            "x": random.randint(-200, config.SCREEN_WIDTH + 200),
-            "y": random.randint(-200, config.SCREEN_HEIGHT + 200),
-            "radius": random.randint(200, 600),
-            "speed_x": random.uniform(-0.2, 0.2),
-            "speed_y": random.uniform(-0.1, 0.1),
-            "alpha": random.randint(2, 8)
+            "x": self.rng.randint(-200, config.SCREEN_WIDTH + 200),
+            "y": self.rng.randint(-200, config.SCREEN_HEIGHT + 200),
+            "radius": self.rng.randint(200, 600),
+            "speed_x": self.rng.uniform(-0.2, 0.2),
+            "speed_y": self.rng.uniform(-0.1, 0.1),
+            "alpha": self.rng.randint(2, 8)
         }
 
     def _generate_vignette(self):
-        self.vignette_surf = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.SRCALPHA)
-        self.vignette_surf.fill((0, 0, 0, 255))
-        hole = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.SRCALPHA)
-        hole.fill((0, 0, 0, 0))
-        pygame.draw.circle(hole, (0, 0, 0, 255), 
-                           (config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2), 
-                           int(config.SCREEN_HEIGHT * 0.65)) 
-        self.vignette_surf.blit(hole, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
+        self.vignette_surf = overlay_cache.get_vignette((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
 
     def _generate_noise(self):
-        self.noise_surf = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.SRCALPHA)
-        for i in range(3000): 
-            x = random.randint(0, config.SCREEN_WIDTH)
-            y = random.randint(0, config.SCREEN_HEIGHT)
-            alpha = random.randint(10, 60)
-            self.noise_surf.set_at((x, y), (200, 200, 200, alpha))
+        self.noise_frames = overlay_cache.get_noise_frames((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+        self.post_fx.noise_frames = self.noise_frames
 
     def _generate_mechanical_click(self):
         sample_rate = 44100
@@ -146,13 +229,14 @@ class Scene:
         return pygame.mixer.Sound(buffer=buf)
 
     def update_atmosphere(self):
+        self.grid_offset_y = (self.grid_offset_y + 0.5) % 40
         for fog in self.fog_particles:
             fog["x"] += fog["speed_x"]
             fog["y"] += fog["speed_y"]
             if fog["x"] < -600 or fog["x"] > config.SCREEN_WIDTH + 600:
-                fog["x"] = random.randint(0, config.SCREEN_WIDTH)
+                fog["x"] = self.rng.randint(0, config.SCREEN_WIDTH)
             if fog["y"] < -600 or fog["y"] > config.SCREEN_HEIGHT + 600:
-                fog["y"] = random.randint(0, config.SCREEN_HEIGHT)
+                fog["y"] = self.rng.randint(0, config.SCREEN_HEIGHT)
 
     def draw_atmosphere(self, color_tint=None):
         bg_color = (5, 5, 8) if not color_tint else color_tint
@@ -163,10 +247,10 @@ class Scene:
             color = (0, 0, 0, fog["alpha"]) if not color_tint else (30, 0, 0, fog["alpha"])
             pygame.draw.circle(surf, color, (fog["radius"], fog["radius"]), fog["radius"])
             self.screen.blit(surf, (fog["x"] - fog["radius"], fog["y"] - fog["radius"]))
-        
-        noise_x = random.randint(-50, 50)
-        noise_y = random.randint(-50, 50)
-        self.screen.blit(self.noise_surf, (noise_x, noise_y), special_flags=pygame.BLEND_RGBA_ADD)
+
+        # Grano y líneas de monitor los pone el post-procesado, una vez sobre el frame entero
+        self.post_fx.grain = 1
+        self.post_fx.scanlines = 0.15
 
     def draw_centered_text(self, font, text, color, cx, cy, shadow=True, glitch=False):
         surf = font.render(text, True, color)
@@ -177,26 +261,23 @@ class Scene:
             shadow_rect = shadow_surf.get_rect(center=(cx+3, cy+3))
             self.screen.blit(shadow_surf, shadow_rect)
         
-        if glitch and random.random() < 0.1:
-            off_x = random.randint(-3, 3)
-            off_y = random.randint(-3, 3)
+        if glitch and self.fx_rng.random() < 0.1:
+            off_x = self.fx_rng.randint(-3, 3)
+            off_y = self.fx_rng.randint(-3, 3)
             self.screen.blit(surf, (rect.x + off_x, rect.y + off_y))
         else:
             self.screen.blit(surf, rect)
 
-    def draw_text_glitch(self, font, text, x, y, color=(255, 255, 255), intensity=1.0):
-        t = pygame.time.get_ticks()
-        offset_x = (random.random() - 0.5) * 15 * intensity if intensity > 0.5 else 0
-        offset_y = (random.random() - 0.5) * 8 * intensity if intensity > 0.5 else 0
+    def draw_text_glitch(self, font, text, x, y, color=(255, 255, 255), intensity=1.0, surf=None):
+        """`surf`: el texto ya rasterizado (evita el render cuando el llamador lo cachea)."""
+        offset_x = (self.fx_rng.random() - 0.5) * 15 * intensity if intensity > 0.5 else 0
+        offset_y = (self.fx_rng.random() - 0.5) * 8 * intensity if intensity > 0.5 else 0
         
+        main_surf = surf if surf is not None else font.render(text, True, color)
+        rect = self.screen.blit(main_surf, (x + offset_x/2, y + offset_y/2))
         if intensity > 0.1:
-            r_surf = font.render(text, True, (255, 0, 0))
-            self.screen.blit(r_surf, (x - 5 + offset_x, y + offset_y))
-            b_surf = font.render(text, True, (0, 255, 255))
-            self.screen.blit(b_surf, (x + 5 - offset_x, y - offset_y))
-        
-        main_surf = font.render(text, True, color)
-        self.screen.blit(main_surf, (x + offset_x/2, y + offset_y/2))
+            # La separación rojo/cian se hace en el post-procesado, solo sobre el recuadro del texto
+            self.post_fx.add_band(rect, 5 + abs(offset_x) // 2, offset_x / 2)
 
     def draw_text_shadow(self, font, text, color, x, y):
         shadow = font.render(text, True, (0, 0, 0))
@@ -205,7 +286,6 @@ class Scene:
         self.screen.blit(main_text, (x, y))
         
     def draw_tech_background(self):
-        self.grid_offset_y = (self.grid_offset_y + 0.5) % 40
         color_grid = (20, 40, 50)
         for x in range(0, config.SCREEN_WIDTH, 40): 
             pygame.draw.line(self.screen, color_grid, (x, 0), (x, config.SCREEN_HEIGHT))
@@ -227,19 +307,58 @@ class Scene:
                 self.next_state = self.target_state
 
     def draw_fade(self):
-        if self.alpha > 0:
-            veil = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
-            veil.fill((0, 0, 0))
-            veil.set_alpha(self.alpha)
-            self.screen.blit(veil, (0, 0))
+        # El velo lo pone postfx.apply después del grano y las scanlines
+        self.post_fx.fade = self.alpha
 
     def change_scene(self, new_state):
         self.target_state = new_state
         self.fade_state = "OUT"
-    
+
+    def draw_loading_bar(self, progress, title="ACCEDIENDO MEMORIA...", status=None):
+        """Barra de carga; con progress=None se dibuja un barrido indeterminado."""
+        cx = config.SCREEN_WIDTH // 2
+        cy = config.SCREEN_HEIGHT // 2
+        self.draw_centered_text(self.font_large, title, config.WHITE, cx, cy - 100, glitch=True)
+        bar_w = 600; bar_h = 30; bar_x = cx - bar_w // 2; bar_y = cy
+        pygame.draw.rect(self.screen, config.DARK_GRAY, (bar_x, bar_y, bar_w, bar_h))
+        if progress is None:
+            sweep_w = bar_w // 4
+            sweep_x = int((pygame.time.get_ticks() * 0.5) % (bar_w - sweep_w))
+            pygame.draw.rect(self.screen, config.LIGHT_BLUE, (bar_x + sweep_x, bar_y, sweep_w, bar_h))
+        else:
+            fill_w = int(bar_w * (progress / 100.0))
+            pygame.draw.rect(self.screen, config.LIGHT_BLUE, (bar_x, bar_y, fill_w, bar_h))
+            self.draw_centered_text(self.font_medium, f"{int(progress)}%", config.WHITE, cx, cy + 50)
+        pygame.draw.rect(self.screen, config.WHITE, (bar_x, bar_y, bar_w, bar_h), 2)
+        if status is not None:
+            self.draw_centered_text(self.font_small, f"> {status}", config.TERMINAL_GREEN, cx, cy + 100)
+
+    def draw_loading_screen(self):
+        """Se muestra tras el fade-out si la siguiente escena aún no está lista."""
+        self.screen.fill(config.BLACK)
+        self.draw_loading_bar(None)
+
+    def enter(self):
+        """Se llama al activar la escena (puede haberse construido antes, en otro hilo)."""
+        pass
+
+    def take_commands(self):
+        """Comandos de voz de este paso de simulación (pasan por el grabador/reproductor si hay uno)."""
+        cmds = []
+        while True:
+            try: cmds.append(self.command_queue.get_nowait())
+            except queue.Empty: break
+        if replay.active is not None:
+            cmds = replay.active.commands(cmds)
+        return cmds
+
+    def music_mix(self):
+        """Mezcla de música que pide la escena (nombre de music.MIXES o {capa: volumen}); None = no cambiarla."""
+        return None
+
     def process_events(self, events): pass
     def update(self): pass
-    def draw(self): pass
+    def draw(self, alpha=1.0): pass
 
 # --- CLASES DE ESCENAS ---
 
@@ -259,9 +378,7 @@ class BootSequence(Scene):
             "NO... NO... NO...",
             "¡¡¡TE ENCONTRÉ!!!"
         ]
-        self.current_lines = [""] * len(self.target_lines)
-        self.line_idx = 0
-        self.char_idx = 0
+        self.typer = Typewriter(self.font_small, [self._line_style(t) for t in self.target_lines], 40)
         self.char_timer = 0
         self.typing_complete = False
         self.finish_timer = 0
@@ -282,6 +399,19 @@ class BootSequence(Scene):
             buf[i] = val
         return pygame.mixer.Sound(buffer=buf)
 
+    @staticmethod
+    def _line_style(text):
+        """(texto, color, temblor) de cada línea del registro."""
+        if "NO ESCUCHES" in text or "TE ENCONTRÉ" in text:
+            return text, config.RED_BLOOD, 3
+        if "REGISTRO" in text or "SUJETO" in text:
+            return text, config.YELLOW_ICON, 0
+        return text, config.WHITE, 0
+
+    def enter(self):
+        # Mientras se escribe el registro se cargan en segundo plano el modelo y los recursos
+        warmup.start()
+
     def update(self):
         self.update_atmosphere()
         self.update_fade()
@@ -290,24 +420,11 @@ class BootSequence(Scene):
                 self.char_timer += 1
                 if self.char_timer >= 2: 
                     self.char_timer = 0
-                    target = self.target_lines[self.line_idx]
-                    if self.char_idx < len(target):
-                        char = target[self.char_idx]
-                        self.current_lines[self.line_idx] += char
-                        if len(self.current_lines[self.line_idx]) > 1:
-                            last_char = self.current_lines[self.line_idx][-2]
-                            if last_char not in target:
-                                correct_char = target[self.char_idx - 1]
-                                self.current_lines[self.line_idx] = self.current_lines[self.line_idx][:-2] + correct_char + char
-                        self.char_idx += 1
-                        if char != " ":
-                            self.click_sound.set_volume(random.uniform(0.6, 0.9))
-                            self.click_sound.play()
-                    else:
-                        self.line_idx += 1
-                        self.char_idx = 0
-                        if self.line_idx >= len(self.target_lines):
-                            self.typing_complete = True
+                    char = self.typer.step()
+                    if char is not None and char != " ":
+                        self.click_sound.set_volume(self.rng.uniform(0.6, 0.9))
+                        self.click_sound.play()
+                    self.typing_complete = self.typer.done
             else:
                 self.finish_timer += 1
                 if self.finish_timer == 30: 
@@ -321,10 +438,10 @@ class BootSequence(Scene):
 
     def draw_jumpscare_face(self):
         cx, cy = config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2
-        off_x = random.randint(-20, 20)
-        off_y = random.randint(-20, 20)
+        off_x = self.fx_rng.randint(-20, 20)
+        off_y = self.fx_rng.randint(-20, 20)
         
-        if random.random() < 0.5: 
+        if self.fx_rng.random() < 0.5: 
             self.screen.fill((255, 255, 255)) 
         else: 
             self.screen.fill((50, 0, 0)) 
@@ -336,7 +453,7 @@ class BootSequence(Scene):
         pygame.draw.circle(self.screen, config.BLACK, (cx + 150 + off_x, cy - 100 + off_y), 40)
         pygame.draw.ellipse(self.screen, config.RED_BLOOD, (cx - 100 + off_x, cy + 100 + off_y, 200, 400))
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         if self.blackout_active:
             self.screen.fill(config.BLACK)
             return
@@ -346,24 +463,13 @@ class BootSequence(Scene):
         self.draw_atmosphere()
         start_y = config.SCREEN_HEIGHT // 2 - (len(self.target_lines) * 20)
         start_x = config.SCREEN_WIDTH // 2 - 400
-        for i, line in enumerate(self.current_lines):
-            color = config.WHITE
-            if "NO ESCUCHES" in self.target_lines[i] or "TE ENCONTRÉ" in self.target_lines[i]:
-                color = config.RED_BLOOD
-            elif "REGISTRO" in self.target_lines[i] or "SUJETO" in self.target_lines[i]:
-                color = config.YELLOW_ICON
-            offset = 0
-            if "NO ESCUCHES" in line or "TE ENCONTRÉ" in line:
-                offset = random.randint(-3, 3)
-            txt = self.font_small.render(line, True, color)
-            self.screen.blit(txt, (start_x + offset, start_y + i * 40))
+        # Solo se rasterizan los glifos nuevos; lo ya escrito sale de la capa del typewriter
+        self.typer.draw(self.screen, start_x, start_y, self.fx_rng)
         self.draw_fade()
 
 class WarningScene(Scene):
     def __init__(self, screen):
         super().__init__(screen)
-        if pygame.mixer.get_init():
-            pygame.mixer.music.stop()
         self.pulse_val = 0
         self.command_queue = queue.Queue()
         self.audio_running = False
@@ -371,45 +477,27 @@ class WarningScene(Scene):
         self.exit_timer = 0
         self.exiting = False
         self.target_lines = ["EXPERIENCIA DE TERROR AUDITIVO (+13)", "", "La supervivencia depende de tu oído.", "El audio 3D revelará enemigos invisibles.", "Jugar sin audífonos es imposible.", "", "Tu voz es tu única arma.", "", "> Di 'CONFIRMAR' <"] 
-        if AUDIO_AVAILABLE:
+
+    def enter(self):
+        # El micrófono se abre al activar la escena: al precargarla la anterior aún escucha
+        if audio_available():
             self.audio_running = True
-            threading.Thread(target=self.audio_task, daemon=True).start()
-
-    def audio_task(self):
-        while self.audio_running:
-            stream = None
-            p = None
-            try:
-                model = Model("model")
-                grammar = '["confirmar", "[unk]"]'
-                rec = KaldiRecognizer(model, 16000, grammar)
-                p = pyaudio.PyAudio()
-                stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=4096)
-                stream.start_stream()
-                while self.audio_running:
-                    data = stream.read(4096, exception_on_overflow=False) 
-                    if rec.AcceptWaveform(data): pass
-                    else:
-                        partial = json.loads(rec.PartialResult()).get("partial", "")
-                        if "confirmar" in partial:
-                            self.command_queue.put("confirmar")
-                            rec.Reset() 
-            except Exception:
-                time.sleep(0.5)
-            finally:
-                if stream: 
-                    try: stream.stop_stream(); stream.close()
-                    except Exception: pass
-                if p: 
-                    try: p.terminate()
-                    except Exception: pass
+            self.start_listening()
+
+    def music_mix(self):
+        return "silence"
+
+    def start_listening(self):
+        from voice import VoiceListener
+        VoiceListener(self, '["confirmar", "[unk]"]',
+                      lambda partial: ["confirmar"] if "confirmar" in partial else [],
+                      keywords=["confirmar"]).start()
 
     def update(self):
         self.update_atmosphere()
         self.update_fade()
         self.pulse_val = (math.sin(pygame.time.get_ticks() * 0.003) + 1) * 0.5 
-        while not self.command_queue.empty():
-            cmd = self.command_queue.get()
+        for cmd in self.take_commands():
             if cmd == "confirmar" and not self.exiting:
                 self.exiting = True
                 self.exit_timer = 15 
@@ -417,9 +505,6 @@ class WarningScene(Scene):
             self.exit_timer -= 1
             if self.exit_timer <= 0:
                 self.audio_running = False
-                if pygame.mixer.get_init():
-                    try: pygame.mixer.music.play(-1, fade_ms=3000) 
-                    except Exception: pass
                 self.change_scene(config.STATE_MENU)
 
     def draw_headphones(self, cx, cy):
@@ -431,7 +516,7 @@ class WarningScene(Scene):
         pygame.draw.rect(self.screen, (30,30,30), (cx + 35*scale, cy - 10*scale, 30*scale, 45*scale), border_radius=10)
         pygame.draw.rect(self.screen, color, (cx + 35*scale, cy - 10*scale, 30*scale, 45*scale), 4, border_radius=10)
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         self.draw_atmosphere()
         cx = config.SCREEN_WIDTH // 2
         cy = config.SCREEN_HEIGHT // 2
@@ -478,8 +563,8 @@ class MenuScene(Scene):
         self.current_volume = 1.0 
         self.current_graphics_mode = "Ventana"
         
-        # Gestión de partidas
-        self.slots_data = {}
+        # Gestión de partidas (el resumen vive en database.slot_index, en memoria)
+        self.slot_page = 0
         self.target_slot = 0
         self.waiting_confirmation = False
         self.loading_progress = 0.0 
@@ -487,8 +572,11 @@ class MenuScene(Scene):
         self.loading_text_timer = 0
         self.loading_lines = ["INICIANDO NEURAL_LINK...", "CONECTANDO A VOX_DEI...", "SINCRONIZANDO ECOS...", "DESENCRIPTANDO REALIDAD...", "LEYES FISICAS: OVERRIDE", "MEMORIA: OK"]
         self.current_loading_line = ""
-        self.has_saves = False
         self.auto_start_timer = 0 
+        self.save_pending = False
+
+        # Capas estáticas por estado del menú: estado -> (entradas, superficie, posición)
+        self.static_layers = {}
         
         # LÓGICA CÓDIGO SECRETO (Konami por voz)
         self.cheat_sequence = []
@@ -498,98 +586,93 @@ class MenuScene(Scene):
         self.show_hint_timer = 0  # Timer para mostrar la pista "¿Di el código?"
 
         self._check_saves()
-        if AUDIO_AVAILABLE:
+
+    def enter(self):
+        if audio_available():
             self.audio_running = True
-            threading.Thread(target=self.audio_task, daemon=True).start()
+            self.start_listening()
+
+    def music_mix(self):
+        return "menu"
+
+    def _on_saved(self, slot_id, ok):
+        self.save_pending = False
+
+    def _saved_scene(self):
+        """Escena donde continuar la partida cargada (el prólogo si aún no se terminó)."""
+        scene = database.slot_index.get(CURRENT_SESSION["slot"])["scene"]
+        return config.STATE_DEMO if scene == "demo" else config.STATE_LEVEL_ZERO
 
     def _check_saves(self):
-        all_slots = database.get_slots_info()
-        self.has_saves = False
-        for s_id, data in all_slots.items():
-            if not data["empty"]:
-                self.has_saves = True
-                break
-
-    def calculate_decibels(self, data):
-        count = len(data) // 2
-        if count == 0: return -60.0
-        try:
-            shorts = struct.unpack(f"<{count}h", data)
-            sum_squares = sum(s**2 for s in shorts)
-            rms = math.sqrt(sum_squares / count)
-            if rms > 0: return 20 * math.log10(rms) - 90
-        except Exception: pass
-        return -60.0
-
-    def audio_task(self):
-        while self.audio_running:
-            stream = None
-            p = None
-            try:
-                model = Model("model")
-                # AÑADIDO: "código", "codigo", "secreto", "clave" para activar la pista
-                grammar = '["iniciar", "nueva partida", "cargar partida", "configuración", "opciones", "salir", "audio", "sonido", "gráficos", "pantalla", "ventana", "completa", "bordes", "atrás", "finalizar", "prueba", "microfono", "volumen", "subir", "bajar", "diez", "veinte", "treinta", "cuarenta", "cincuenta", "sesenta", "setenta", "ochenta", "noventa", "cien", "uno", "dos", "tres", "confirmar", "cancelar", "continuar", "arriba", "abajo", "izquierda", "derecha", "b", "a", "empezar", "start", "código", "codigo", "secreto", "clave", "[unk]"]'
-                rec = KaldiRecognizer(model, 16000, grammar)
-                p = pyaudio.PyAudio()
-                stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=4096)
-                stream.start_stream()
-                self.mic_status = "Listo"
-                
-                while self.audio_running:
-                    data = stream.read(4096, exception_on_overflow=False)
-                    self.test_db_level = self.calculate_decibels(data)
-                    
-                    if rec.AcceptWaveform(data): pass
-                    else:
-                        partial = json.loads(rec.PartialResult()).get("partial", "")
-                        if partial:
-                            self.last_detected_text = partial
-                            cmd = ""
-                            
-                            words_priority = [
-                                "uno", "dos", "tres", "confirmar", "cancelar", "continuar",
-                                "atrás", "salir", "finalizar", "iniciar", "nueva partida", "cargar partida",
-                                "configuración", "opciones", "audio", "sonido", "gráficos", "pantalla",
-                                "ventana", "completa", "bordes", "prueba", "microfono",
-                                "subir", "bajar", "volumen",
-                                # Konami + Triggers
-                                "arriba", "abajo", "izquierda", "derecha", "b", "a", "empezar", "start",
-                                "código", "codigo", "secreto", "clave"
-                            ]
-                            
-                            for w in words_priority:
-                                if w in partial:
-                                    if w == "finalizar": cmd = "atrás"
-                                    elif w == "opciones": cmd = "configuración"
-                                    elif w == "sonido": cmd = "audio"
-                                    elif w == "pantalla": cmd = "gráficos"
-                                    elif w == "start": cmd = "empezar"
-                                    elif w in ["código", "codigo", "secreto", "clave"]: cmd = "trigger_hint"
-                                    else: cmd = w
-                                    break 
-                            
-                            if not cmd:
-                                 if "volumen" in partial:
-                                     if "diez" in partial: cmd = "vol 10"
-                                     elif "cincuenta" in partial: cmd = "vol 50"
-                                     elif "cien" in partial: cmd = "vol 100"
-                                     elif "subir" in partial: cmd = "subir volumen"
-                                     elif "bajar" in partial: cmd = "bajar volumen"
-                                 elif "subir" in partial: cmd = "subir volumen"
-                                 elif "bajar" in partial: cmd = "bajar volumen"
-
-                            if cmd:
-                                self.command_queue.put(cmd)
-                                rec.Reset()
-            except Exception:
-                time.sleep(0.5)
-            finally:
-                if stream: 
-                    try: stream.stop_stream(); stream.close()
-                    except Exception: pass
-                if p: 
-                    try: p.terminate()
-                    except Exception: pass
+        # Se construye fuera del hilo principal: aquí se hace la única lectura del resumen de ranuras
+        database.slot_index.ensure_loaded()
+
+    @property
+    def has_saves(self):
+        return database.slot_index.has_saves()
+
+    SLOTS_PER_PAGE = 3
+
+    def _page_slot(self, n):
+        """Ranura global de la tarjeta n (1..3) de la página actual, o 0 si no existe."""
+        slot = self.slot_page * self.SLOTS_PER_PAGE + n
+        return slot if slot <= database.slot_index.slot_count() else 0
+
+    def _turn_slot_page(self, cmd):
+        pages = database.slot_index.page_count(self.SLOTS_PER_PAGE)
+        if cmd == "siguiente": self.slot_page = (self.slot_page + 1) % pages
+        elif cmd == "anterior": self.slot_page = (self.slot_page - 1) % pages
+
+    def start_listening(self):
+        from voice import VoiceListener
+        # AÑADIDO: "código", "codigo", "secreto", "clave" para activar la pista
+        grammar = '["iniciar", "nueva partida", "cargar partida", "configuración", "opciones", "salir", "audio", "sonido", "gráficos", "pantalla", "ventana", "completa", "bordes", "atrás", "finalizar", "prueba", "microfono", "volumen", "subir", "bajar", "diez", "veinte", "treinta", "cuarenta", "cincuenta", "sesenta", "setenta", "ochenta", "noventa", "cien", "uno", "dos", "tres", "confirmar", "cancelar", "continuar", "arriba", "abajo", "izquierda", "derecha", "b", "a", "empezar", "start", "código", "codigo", "secreto", "clave", "siguiente", "anterior", "[unk]"]'
+        VoiceListener(self, grammar, self.match_command, keywords=self.VOICE_PHRASES,
+                      on_level=self._set_db_level, on_status=self._set_mic_status).start()
+
+    def _set_db_level(self, db):
+        self.test_db_level = db
+
+    def _set_mic_status(self, status):
+        self.mic_status = status
+
+    WORDS_PRIORITY = [
+        "uno", "dos", "tres", "confirmar", "cancelar", "continuar",
+        "atrás", "salir", "finalizar", "iniciar", "nueva partida", "cargar partida",
+        "configuración", "opciones", "audio", "sonido", "gráficos", "pantalla",
+        "ventana", "completa", "bordes", "prueba", "microfono",
+        "subir", "bajar", "volumen", "siguiente", "anterior",
+        # Konami + Triggers
+        "arriba", "abajo", "izquierda", "derecha", "b", "a", "empezar", "start",
+        "código", "codigo", "secreto", "clave"
+    ]
+    # Combinaciones de volumen: van antes que sus palabras sueltas
+    VOLUME_PHRASES = {
+        "volumen diez": "vol 10", "volumen cincuenta": "vol 50", "volumen cien": "vol 100",
+        "subir volumen": "subir volumen", "bajar volumen": "bajar volumen",
+    }
+    VOICE_PHRASES = WORDS_PRIORITY + list(VOLUME_PHRASES)
+
+    def match_command(self, partial):
+        """Traduce un parcial del reconocedor al comando del menú (lista vacía si no hay)."""
+        self.last_detected_text = partial
+        # Por palabras completas: "a" no está dentro de "nueva" ni "cargar"
+        said = find_phrases(partial, self.VOICE_PHRASES)
+        for phrase, cmd in self.VOLUME_PHRASES.items():
+            if phrase in said:
+                return [cmd]
+        cmd = ""
+        for w in self.WORDS_PRIORITY:
+            if w in said:
+                if w == "finalizar": cmd = "atrás"
+                elif w == "opciones": cmd = "configuración"
+                elif w == "sonido": cmd = "audio"
+                elif w == "pantalla": cmd = "gráficos"
+                elif w == "start": cmd = "empezar"
+                elif w in ["código", "codigo", "secreto", "clave"]: cmd = "trigger_hint"
+                else: cmd = w
+                break 
+        return [cmd] if cmd else []
 
     def process_events(self, events):
         for e in events:
@@ -617,7 +700,9 @@ class MenuScene(Scene):
             config.SCREEN_HEIGHT = h
             self.screen = new_surface
             self._generate_vignette()
+            self._generate_noise()
             self.update_fonts() 
+            self.static_layers.clear()
 
     def update(self):
         self.update_atmosphere()
@@ -627,12 +712,12 @@ class MenuScene(Scene):
         if "settings" not in self.menu_state:
             if self.glitch_cooldown > 0: self.glitch_cooldown -= 1
             else:
-                if random.randint(0, 100) < 5:
-                    roll = random.randint(0, 100)
-                    if roll < 50: self.glitch_level = 1; self.current_whisper = random.choice(self.shadow_whispers); self.glitch_timer = random.randint(20, 60)
-                    elif roll < 85: self.glitch_level = 2; self.current_whisper = "ERROR CRÍTICO"; self.glitch_timer = random.randint(10, 30)
-                    else: self.glitch_level = 3; self.current_whisper = "¡TE VEO!"; self.glitch_timer = random.randint(5, 15) 
-                    self.glitch_cooldown = random.randint(60, 200)
+                if self.rng.randint(0, 100) < 5:
+                    roll = self.rng.randint(0, 100)
+                    if roll < 50: self.glitch_level = 1; self.current_whisper = self.rng.choice(self.shadow_whispers); self.glitch_timer = self.rng.randint(20, 60)
+                    elif roll < 85: self.glitch_level = 2; self.current_whisper = "ERROR CRÍTICO"; self.glitch_timer = self.rng.randint(10, 30)
+                    else: self.glitch_level = 3; self.current_whisper = "¡TE VEO!"; self.glitch_timer = self.rng.randint(5, 15) 
+                    self.glitch_cooldown = self.rng.randint(60, 200)
             if self.glitch_timer > 0:
                 self.glitch_timer -= 1
                 if self.glitch_timer <= 0: self.glitch_level = 0 
@@ -642,27 +727,39 @@ class MenuScene(Scene):
         # --- ESTADO DE CARGA ---
         if self.menu_state == "loading":
             if not self.loading_complete:
-                if random.random() < 0.2: self.loading_progress += random.uniform(2, 8)
+                if replay.deterministic():
+                    # El paso en que termina la carga no puede depender de lo que tarde la precarga
+                    warmup.wait()
+                # La barra avanza a su ritmo, pero nunca por delante de la precarga real
+                if self.rng.random() < 0.2: self.loading_progress += self.rng.uniform(2, 8)
                 else: self.loading_progress += 0.2 
+                self.loading_progress = min(self.loading_progress, warmup.progress() * 100)
                 
                 self.loading_text_timer += 1
                 if self.loading_text_timer > 30:
                     self.loading_text_timer = 0
-                    self.current_loading_line = random.choice(self.loading_lines)
+                    self.current_loading_line = self.rng.choice(self.loading_lines)
 
                 if self.loading_progress >= 100:
                     self.loading_progress = 100
                     self.loading_complete = True 
                     self.auto_start_timer = 40 
+                    CURRENT_SESSION["autosave"] = not self.cheat_active
                     if self.cheat_active: pass
                     elif not CURRENT_SESSION["should_load"]:
-                        database.save_game(CURRENT_SESSION["slot"], 0, 1500, 1500, "cero")
+                        if replay.deterministic():
+                            # Grabando/reproduciendo: el paso en que termina la carga no puede depender del disco
+                            database.save_game(CURRENT_SESSION["slot"], 0, 1500, 1500, "cero")
+                        else:
+                            self.save_pending = True
+                            database.save_game_async(CURRENT_SESSION["slot"], 0, 1500, 1500, "cero", on_done=self._on_saved)
             else:
                 self.auto_start_timer -= 1
-                if self.auto_start_timer <= 0:
+                # No salir de la carga hasta que la ranura nueva esté realmente escrita
+                if self.auto_start_timer <= 0 and not self.save_pending:
                     self.audio_running = False
                     if self.cheat_active: self.change_scene(config.STATE_DEMO)
-                    elif CURRENT_SESSION["should_load"]: self.change_scene(config.STATE_LEVEL_ZERO)
+                    elif CURRENT_SESSION["should_load"]: self.change_scene(self._saved_scene())
                     else: self.change_scene(config.STATE_LEVEL_ZERO)
             return
 
@@ -674,8 +771,7 @@ class MenuScene(Scene):
         if self.show_hint_timer > 0:
             self.show_hint_timer -= 1
 
-        while not self.command_queue.empty():
-            cmd = self.command_queue.get()
+        for cmd in self.take_commands():
             
             # --- DETECCIÓN DE CÓDIGO KONAMI ---
             if self.menu_state in ["title", "options"]:
@@ -703,10 +799,10 @@ class MenuScene(Scene):
             elif self.menu_state == "options":
                 if cmd == "nueva partida":
                     self.menu_state = "slot_selection_new"
-                    self.slots_data = database.get_slots_info()
+                    self.slot_page = 0
                 elif cmd == "cargar partida" and self.has_saves:
                     self.menu_state = "slot_selection_load"
-                    self.slots_data = database.get_slots_info()
+                    self.slot_page = 0
                 elif cmd == "configuración" or cmd == "opciones":
                     self.menu_state = "settings_main"
                 elif cmd == "salir":
@@ -722,18 +818,20 @@ class MenuScene(Scene):
                     elif cmd == "cancelar": self.waiting_confirmation = False
                 else:
                     if cmd == "atrás" or cmd == "cancelar": self.menu_state = "options"
-                    elif cmd == "uno": self.target_slot = 1; self._check_overwrite(1)
-                    elif cmd == "dos": self.target_slot = 2; self._check_overwrite(2)
-                    elif cmd == "tres": self.target_slot = 3; self._check_overwrite(3)
+                    elif cmd == "siguiente" or cmd == "anterior": self._turn_slot_page(cmd)
+                    elif cmd in ("uno", "dos", "tres"):
+                        slot = self._page_slot(("uno", "dos", "tres").index(cmd) + 1)
+                        if slot: self.target_slot = slot; self._check_overwrite(slot)
 
             elif self.menu_state == "slot_selection_load":
                 if cmd == "atrás" or cmd == "cancelar": self.menu_state = "options"
+                elif cmd == "siguiente" or cmd == "anterior": self._turn_slot_page(cmd)
                 else:
                     t = 0
-                    if cmd == "uno": t = 1
-                    elif cmd == "dos": t = 2
-                    elif cmd == "tres": t = 3
-                    if t > 0 and not self.slots_data[t]["empty"]:
+                    if cmd == "uno": t = self._page_slot(1)
+                    elif cmd == "dos": t = self._page_slot(2)
+                    elif cmd == "tres": t = self._page_slot(3)
+                    if t > 0 and not database.slot_index.get(t)["empty"]:
                         CURRENT_SESSION["slot"] = t; CURRENT_SESSION["should_load"] = True; self.menu_state = "loading"
             
             elif self.menu_state == "settings_main":
@@ -745,7 +843,7 @@ class MenuScene(Scene):
                 if cmd == "atrás": self.menu_state = "settings_main"
                 if cmd == "prueba" or cmd == "microfono": self.menu_state = "settings_audio_test"
                 if "vol" in cmd:
-                    try: val = int(cmd.split(" ")[1]); self.current_volume = val / 100.0; pygame.mixer.music.set_volume(self.current_volume)
+                    try: val = int(cmd.split(" ")[1]); self.current_volume = val / 100.0; music.engine.set_volume(self.current_volume)
                     except Exception: pass
             
             elif self.menu_state == "settings_audio_test":
@@ -758,7 +856,7 @@ class MenuScene(Scene):
                 elif cmd == "sin bordes": self._update_resolution("noframe")
 
     def _check_overwrite(self, slot_id):
-        if not self.slots_data[slot_id]["empty"]: self.waiting_confirmation = True
+        if not database.slot_index.get(slot_id)["empty"]: self.waiting_confirmation = True
         else: CURRENT_SESSION["slot"] = slot_id; CURRENT_SESSION["should_load"] = False; self.menu_state = "loading"
 
     def draw_audio_meter(self, cx, cy):
@@ -780,35 +878,150 @@ class MenuScene(Scene):
             pygame.draw.ellipse(surf, (40, 0, 0, 200), (cx - 100, cy + 100, 200, 300)) 
         self.screen.blit(surf, (0, 0))
 
-    def draw(self):
+    def _layer_inputs(self):
+        """Todo lo que decide el contenido fijo del estado actual: si cambia, la capa se redibuja."""
+        size = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+        if self.menu_state == "options":
+            return (size, self.has_saves)
+        if "slot_selection" in self.menu_state:
+            return (size, database.slot_index.version, self.slot_page, self.waiting_confirmation, self.target_slot)
+        if self.menu_state == "settings_audio":
+            return (size, int(self.current_volume * 100))
+        return (size,)
+
+    def _static_layer(self):
+        """Capa con lo fijo del estado actual (ver _render_static_layer), o None si no tiene nada fijo."""
+        inputs = self._layer_inputs()
+        cached = self.static_layers.get(self.menu_state)
+        if cached is None or cached[0] != inputs:
+            cached = (inputs, self._render_static_layer())
+            self.static_layers[self.menu_state] = cached
+        return cached[1]
+
+    def _render_static_layer(self):
+        """(superficie, posición, flags de blit) con lo fijo del estado, o None si está vacío."""
+        size = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+        if NUMPY_AVAILABLE:
+            # Se dibuja sobre negro y sobre blanco opacos: lo dibujado sobre negro es el color
+            # premultiplicado y la diferencia da la opacidad exacta, así las sombras y el
+            # antialias que se solapan no oscurecen los bordes al componer sobre el fondo
+            on_black = self._draw_static_on(pygame.Surface(size), (0, 0, 0))
+            on_white = self._draw_static_on(pygame.Surface(size), (255, 255, 255))
+            layer = pygame.Surface(size, pygame.SRCALPHA)
+            layer.blit(on_black, (0, 0))
+            spread = pygame.surfarray.array3d(on_white).astype(np.int16) - pygame.surfarray.array3d(on_black)
+            alpha = pygame.surfarray.pixels_alpha(layer)
+            alpha[:] = 255 - np.clip(spread.max(axis=2), 0, 255)
+            del alpha  # Libera el bloqueo de la superficie
+            flags = pygame.BLEND_PREMULTIPLIED
+        else:
+            layer = self._draw_static_on(pygame.Surface(size, pygame.SRCALPHA), None)
+            flags = 0
+        rect = layer.get_bounding_rect()
+        if rect.width == 0:
+            return None
+        # Solo el recuadro con contenido: el blit por frame no recorre la pantalla entera
+        layer = layer.subsurface(rect).copy()
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert_alpha()
+        return layer, rect.topleft, flags
+
+    def _draw_static_on(self, surface, background):
+        # Se dibuja con las mismas funciones de siempre, pero sobre `surface`
+        if background is not None:
+            surface.fill(background)
+        screen, self.screen = self.screen, surface
+        try:
+            self.draw_static_content()
+        finally:
+            self.screen = screen
+        return surface
+
+    def draw_static_content(self):
+        """Textos, tarjetas y recuadros que no cambian mientras no cambien sus entradas."""
+        cx = config.SCREEN_WIDTH // 2
+        cy = config.SCREEN_HEIGHT // 2
+
+        if self.menu_state == "options":
+            self.draw_text_glitch(self.font_large, "ECHOES OF BABEL", cx - 350, 150, config.WHITE, 0)
+            self.draw_centered_text(self.font_medium, "NUEVA PARTIDA", config.WHITE, cx, cy - 60)
+            c_load = config.WHITE if self.has_saves else config.DARK_GRAY
+            self.draw_centered_text(self.font_medium, "CARGAR PARTIDA", c_load, cx, cy + 20)
+            self.draw_centered_text(self.font_medium, "CONFIGURACIÓN", config.WHITE, cx, cy + 100)
+            self.draw_centered_text(self.font_medium, "SALIR", config.RED_BLOOD, cx, cy + 180)
+
+        elif "slot_selection" in self.menu_state:
+            self.draw_centered_text(self.font_medium, "SELECCIONA RANURA", config.LIGHT_BLUE, cx, 100)
+            card_w = 300; gap = 20; total_width = (card_w * 3) + (gap * 2); start_x = cx - (total_width // 2)
+            for n, (i, slot) in enumerate(database.slot_index.page(self.slot_page, self.SLOTS_PER_PAGE)):
+                current_x = start_x + n * (card_w + gap)
+                rect = pygame.Rect(current_x, cy - 100, card_w, 200)
+                color = config.SLOT_FILLED if not slot["empty"] else config.SLOT_EMPTY
+                if self.menu_state == "slot_selection_new" and self.waiting_confirmation and self.target_slot == i:
+                    color = config.SLOT_WARNING 
+                pygame.draw.rect(self.screen, color, rect, border_radius=5)
+                pygame.draw.rect(self.screen, config.WHITE, rect, 2, border_radius=5)
+                self.draw_centered_text(self.font_medium, str(i), config.WHITE, rect.centerx, rect.centery)
+                if not slot["empty"]:
+                    self.draw_centered_text(self.font_small, f"{slot['progress']}%", config.WHITE, rect.centerx, rect.bottom - 30)
+                else:
+                    self.draw_centered_text(self.font_small, "VACÍA", (150,150,150), rect.centerx, rect.bottom - 30)
+            if not self.waiting_confirmation:
+                self.draw_centered_text(self.font_small, "DI 'UNO', 'DOS' O 'TRES'", config.WHITE, cx, cy + 200)
+            pages = database.slot_index.page_count(self.SLOTS_PER_PAGE)
+            if pages > 1:
+                self.draw_centered_text(self.font_small, f"PÁGINA {self.slot_page + 1}/{pages} - 'SIGUIENTE' / 'ANTERIOR'", (150, 150, 150), cx, cy + 250)
+
+        elif self.menu_state == "settings_main":
+            self.draw_centered_text(self.font_medium, "CONFIGURACIÓN", config.LIGHT_BLUE, cx, 100)
+            self.draw_centered_text(self.font_medium, "AUDIO", config.WHITE, cx, cy - 50)
+            self.draw_centered_text(self.font_medium, "GRÁFICOS", config.WHITE, cx, cy + 50)
+            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 150)
+
+        elif self.menu_state == "settings_audio":
+            self.draw_centered_text(self.font_medium, "AUDIO", config.LIGHT_BLUE, cx, 100)
+            vol_perc = int(self.current_volume * 100)
+            self.draw_centered_text(self.font_medium, f"Volumen General: {vol_perc}%", config.WHITE, cx, cy - 50)
+            self.draw_centered_text(self.font_medium, "PRUEBA MICRÓFONO", config.WHITE, cx, cy + 50)
+            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 150)
+
+        elif self.menu_state == "settings_audio_test":
+            self.draw_centered_text(self.font_medium, "PRUEBA ACTIVA", config.GREEN_GLOW, cx, 150)
+            self.draw_centered_text(self.font_small, "Habla fuerte...", config.WHITE, cx, 250)
+            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, 550)
+
+        elif self.menu_state == "settings_graphics":
+            self.draw_centered_text(self.font_medium, "GRÁFICOS", config.LIGHT_BLUE, cx, 100)
+            self.draw_centered_text(self.font_medium, "VENTANA", config.WHITE, cx, cy - 60)
+            self.draw_centered_text(self.font_medium, "COMPLETA", config.WHITE, cx, cy + 20)
+            self.draw_centered_text(self.font_medium, "BORDES", config.WHITE, cx, cy + 100)
+            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 200)
+
+    def draw(self, alpha=1.0):
         tint = None
         if self.glitch_level == 2: tint = (80, 0, 0)
         elif self.glitch_level == 3: tint = (0, 0, 0)
         self.draw_atmosphere(tint)
         
         if self.glitch_level > 0:
-            shake_screen_x = random.randint(-10, 10) * self.glitch_level
-            shake_screen_y = random.randint(-10, 10) * self.glitch_level
+            shake_screen_x = self.fx_rng.randint(-10, 10) * self.glitch_level
+            shake_screen_y = self.fx_rng.randint(-10, 10) * self.glitch_level
             current_screen = self.screen.copy()
             self.screen.fill(config.BLACK)
             self.screen.blit(current_screen, (shake_screen_x, shake_screen_y))
         
         if self.glitch_level == 3: self.draw_scary_face()
+        if self.glitch_level > 0:
+            self.post_fx.tear_lines = 3 * self.glitch_level
+            self.post_fx.tear_shift = 10 * self.glitch_level
+            self.post_fx.rgb_offset = 2 * (self.glitch_level - 1)
         
         cx = config.SCREEN_WIDTH // 2
         cy = config.SCREEN_HEIGHT // 2
         
         # --- PANTALLA DE CARGA ---
         if self.menu_state == "loading":
-            self.draw_centered_text(self.font_large, "ACCEDIENDO MEMORIA...", config.WHITE, cx, cy - 100, glitch=True)
-            bar_w = 600; bar_h = 30; bar_x = cx - bar_w // 2; bar_y = cy
-            pygame.draw.rect(self.screen, config.DARK_GRAY, (bar_x, bar_y, bar_w, bar_h))
-            fill_w = int(bar_w * (self.loading_progress / 100.0))
-            pygame.draw.rect(self.screen, config.LIGHT_BLUE, (bar_x, bar_y, fill_w, bar_h))
-            pygame.draw.rect(self.screen, config.WHITE, (bar_x, bar_y, bar_w, bar_h), 2)
-            perc_text = f"{int(self.loading_progress)}%"
-            self.draw_centered_text(self.font_medium, perc_text, config.WHITE, cx, cy + 50)
-            self.draw_centered_text(self.font_small, f"> {self.current_loading_line}", config.TERMINAL_GREEN, cx, cy + 100)
+            self.draw_loading_bar(self.loading_progress, status="GUARDANDO..." if self.save_pending else (warmup.status() or self.current_loading_line))
             if self.cheat_active:
                 self.draw_centered_text(self.font_medium, ">> PROTOCOLO KONAMI ACTIVADO <<", config.RED_BLOOD, cx, cy + 150, glitch=True)
             return
@@ -836,71 +1049,25 @@ class MenuScene(Scene):
             glitch_int = 0.0
             if self.glitch_level == 1:
                 glitch_int = 1.0 
-                if random.random() < 0.2: title_text = self.current_whisper
+                if self.fx_rng.random() < 0.2: title_text = self.current_whisper
             elif self.glitch_level == 2:
-                glitch_int = 3.0; title_color = config.RED_BLOOD; title_text = random.choice(self.shadow_whispers)
+                glitch_int = 3.0; title_color = config.RED_BLOOD; title_text = self.fx_rng.choice(self.shadow_whispers)
             elif self.glitch_level == 3:
                 glitch_int = 8.0; title_color = (150, 0, 0); title_text = "SINTAXIS ROTA"
             self.draw_text_glitch(self.font_large, title_text, cx - 350, 150, title_color, glitch_int)
             self.draw_centered_text(self.font_medium, "DI 'INICIAR'", config.LIGHT_BLUE, cx, cy + 100, glitch=True)
+        else:
+            # Lo fijo de cada pantalla sale de su capa cacheada; encima solo lo que cambia por frame
+            layer = self._static_layer()
+            if layer is not None:
+                surf, pos, flags = layer
+                self.screen.blit(surf, pos, special_flags=flags)
 
-        # --- OPCIONES ---
-        elif self.menu_state == "options":
-            self.draw_text_glitch(self.font_large, "ECHOES OF BABEL", cx - 350, 150, config.WHITE, 0)
-            self.draw_centered_text(self.font_medium, "NUEVA PARTIDA", config.WHITE, cx, cy - 60)
-            c_load = config.WHITE if self.has_saves else config.DARK_GRAY
-            self.draw_centered_text(self.font_medium, "CARGAR PARTIDA", c_load, cx, cy + 20)
-            self.draw_centered_text(self.font_medium, "CONFIGURACIÓN", config.WHITE, cx, cy + 100)
-            self.draw_centered_text(self.font_medium, "SALIR", config.RED_BLOOD, cx, cy + 180)
-        
-        # --- SLOTS ---
-        elif "slot_selection" in self.menu_state:
-            self.draw_centered_text(self.font_medium, "SELECCIONA RANURA", config.LIGHT_BLUE, cx, 100)
-            card_w = 300; gap = 20; total_width = (card_w * 3) + (gap * 2); start_x = cx - (total_width // 2)
-            for i in range(1, 4):
-                current_x = start_x + (i-1) * (card_w + gap)
-                rect = pygame.Rect(current_x, cy - 100, card_w, 200)
-                color = config.SLOT_FILLED if not self.slots_data[i]["empty"] else config.SLOT_EMPTY
-                if self.menu_state == "slot_selection_new" and self.waiting_confirmation and self.target_slot == i:
-                    color = config.SLOT_WARNING 
-                pygame.draw.rect(self.screen, color, rect, border_radius=5)
-                pygame.draw.rect(self.screen, config.WHITE, rect, 2, border_radius=5)
-                self.draw_centered_text(self.font_medium, str(i), config.WHITE, rect.centerx, rect.centery)
-                if not self.slots_data[i]["empty"]:
-                    self.draw_centered_text(self.font_small, f"{self.slots_data[i]['progress']}%", config.WHITE, rect.centerx, rect.bottom - 30)
-                else:
-                    self.draw_centered_text(self.font_small, "VACÍA", (150,150,150), rect.centerx, rect.bottom - 30)
-            if self.waiting_confirmation:
-                 self.draw_centered_text(self.font_medium, "¿SOBRESCRIBIR? DI 'CONFIRMAR'", config.RED_BLOOD, cx, cy + 200, glitch=True)
-            else:
-                 self.draw_centered_text(self.font_small, "DI 'UNO', 'DOS' O 'TRES'", config.WHITE, cx, cy + 200)
-
-        elif self.menu_state == "settings_main":
-            self.draw_centered_text(self.font_medium, "CONFIGURACIÓN", config.LIGHT_BLUE, cx, 100)
-            self.draw_centered_text(self.font_medium, "AUDIO", config.WHITE, cx, cy - 50)
-            self.draw_centered_text(self.font_medium, "GRÁFICOS", config.WHITE, cx, cy + 50)
-            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 150)
-        
-        elif self.menu_state == "settings_audio":
-            self.draw_centered_text(self.font_medium, "AUDIO", config.LIGHT_BLUE, cx, 100)
-            vol_perc = int(self.current_volume * 100)
-            self.draw_centered_text(self.font_medium, f"Volumen General: {vol_perc}%", config.WHITE, cx, cy - 50)
-            self.draw_centered_text(self.font_medium, "PRUEBA MICRÓFONO", config.WHITE, cx, cy + 50)
-            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 150)
-
-        elif self.menu_state == "settings_audio_test":
-            self.draw_centered_text(self.font_medium, "PRUEBA ACTIVA", config.GREEN_GLOW, cx, 150)
-            self.draw_centered_text(self.font_small, "Habla fuerte...", config.WHITE, cx, 250)
-            self.draw_audio_meter(cx, 350)
-            self.draw_centered_text(self.font_small, f"Detectado: '{self.last_detected_text}'", config.WHITE, cx, 420)
-            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, 550)
-            
-        elif self.menu_state == "settings_graphics":
-            self.draw_centered_text(self.font_medium, "GRÁFICOS", config.LIGHT_BLUE, cx, 100)
-            self.draw_centered_text(self.font_medium, "VENTANA", config.WHITE, cx, cy - 60)
-            self.draw_centered_text(self.font_medium, "COMPLETA", config.WHITE, cx, cy + 20)
-            self.draw_centered_text(self.font_medium, "BORDES", config.WHITE, cx, cy + 100)
-            self.draw_centered_text(self.font_medium, "ATRÁS", config.YELLOW_ICON, cx, cy + 200)
+            if "slot_selection" in self.menu_state and self.waiting_confirmation:
+                self.draw_centered_text(self.font_medium, "¿SOBRESCRIBIR? DI 'CONFIRMAR'", config.RED_BLOOD, cx, cy + 200, glitch=True)
+            elif self.menu_state == "settings_audio_test":
+                self.draw_audio_meter(cx, 350)
+                self.draw_centered_text(self.font_small, f"Detectado: '{self.last_detected_text}'", config.WHITE, cx, 420)
             
         if self.mic_status:
             self.draw_text_shadow(self.font_small, f"Mic: {self.mic_status}", (150, 150, 150), 40, config.SCREEN_HEIGHT - 50)
@@ -0,0 +1,126 @@
+# spatial_hash.py
+import math
+
+
+class SpatialHash:
+    """Rejilla uniforme sobre el mundo: consultas por radio/rectángulo sin recorrer todas las entidades."""
+    def __init__(self, world_width, world_height, cell_size=256):
+        self.cell_size = cell_size
+        self.cols = max(1, int(math.ceil(world_width / cell_size)))
+        self.rows = max(1, int(math.ceil(world_height / cell_size)))
+        self.cells = {}      # (col, row) -> set de claves
+        self.positions = {}  # clave -> (x, y, celda)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def _cell_of(self, x, y):
+        col = min(self.cols - 1, max(0, int(x // self.cell_size)))
+        row = min(self.rows - 1, max(0, int(y // self.cell_size)))
+        return (col, row)
+
+    def insert(self, key, x, y):
+        if key in self.positions:
+            self.move(key, x, y)
+            return
+        cell = self._cell_of(x, y)
+        self.cells.setdefault(cell, set()).add(key)
+        self.positions[key] = (x, y, cell)
+
+    def move(self, key, x, y):
+        _, _, old_cell = self.positions[key]
+        cell = self._cell_of(x, y)
+        if cell != old_cell:
+            bucket = self.cells[old_cell]
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[old_cell]
+            self.cells.setdefault(cell, set()).add(key)
+        self.positions[key] = (x, y, cell)
+
+    def remove(self, key):
+        entry = self.positions.pop(key, None)
+        if entry is None:
+            return
+        bucket = self.cells.get(entry[2])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[entry[2]]
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
+    def position(self, key):
+        x, y, _ = self.positions[key]
+        return x, y
+
+    def _cells_in_rect(self, x0, y0, x1, y1):
+        c0, r0 = self._cell_of(x0, y0)
+        c1, r1 = self._cell_of(x1, y1)
+        cells = self.cells
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                bucket = cells.get((col, row))
+                if bucket:
+                    yield bucket
+
+    def query_rect(self, x, y, w, h):
+        """Claves cuya posición cae dentro del rectángulo (x, y, w, h)."""
+        x1, y1 = x + w, y + h
+        result = []
+        positions = self.positions
+        for bucket in self._cells_in_rect(x, y, x1, y1):
+            for key in bucket:
+                px, py, _ = positions[key]
+                if x <= px <= x1 and y <= py <= y1:
+                    result.append(key)
+        return result
+
+    def query_radius(self, x, y, radius):
+        """Claves a distancia <= radius de (x, y)."""
+        r2 = radius * radius
+        result = []
+        positions = self.positions
+        for bucket in self._cells_in_rect(x - radius, y - radius, x + radius, y + radius):
+            for key in bucket:
+                px, py, _ = positions[key]
+                dx, dy = px - x, py - y
+                if dx * dx + dy * dy <= r2:
+                    result.append(key)
+        return result
+
+    def nearest(self, x, y, max_radius=None):
+        """(clave, distancia) de la entidad más cercana, buscando en anillos de celdas crecientes."""
+        if not self.positions:
+            return None, float('inf')
+        col, row = self._cell_of(x, y)
+        max_ring = max(self.cols, self.rows)
+        if max_radius is not None:
+            max_ring = min(max_ring, int(max_radius // self.cell_size) + 1)
+        best_key, best_d2 = None, float('inf')
+        positions = self.positions
+        for ring in range(max_ring + 1):
+            # Cualquier celda de este anillo está al menos a (ring - 1) celdas de distancia
+            if best_key is not None and ((ring - 1) * self.cell_size) ** 2 > best_d2:
+                break
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if ring and r != row - ring and r != row + ring and c != col - ring and c != col + ring:
+                        continue  # Solo el borde del anillo
+                    bucket = self.cells.get((c, r))
+                    if not bucket:
+                        continue
+                    for key in bucket:
+                        px, py, _ = positions[key]
+                        d2 = (px - x) ** 2 + (py - y) ** 2
+                        if d2 < best_d2:
+                            best_key, best_d2 = key, d2
+        dist = math.sqrt(best_d2) if best_key is not None else float('inf')
+        if max_radius is not None and dist > max_radius:
+            return None, float('inf')
+        return best_key, dist
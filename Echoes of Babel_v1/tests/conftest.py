@@ -0,0 +1,9 @@
+# conftest.py
+# Los módulos del juego están en la carpeta padre y no forman un paquete; pygame sin ventana ni audio.
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,84 @@
+import json
+
+from command_decoder import StreamingDecoder, command_predicate
+from demo_level import DemoScene
+from scenes import MenuScene
+
+
+class FakeRecognizer:
+    """KaldiRecognizer de guion: cada bloque da un parcial (texto) o un final (lista de palabras)."""
+    def __init__(self, script):
+        self.script = list(script)
+        self.current = None
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.current = self.script.pop(0)
+        return isinstance(self.current, list)
+
+    def Result(self):
+        return json.dumps({"result": [{"word": w, "conf": c} for w, c in self.current]})
+
+    def PartialResult(self):
+        return json.dumps({"partial": self.current})
+
+
+def _run(script, keywords):
+    decoder = StreamingDecoder(FakeRecognizer(script), command_predicate(keywords), 0.1,
+                               model_path="sin_modelo", stable_seconds=0.2, min_conf=0.6)
+    return [decoder.accept(b"") for _ in script]
+
+
+def test_stable_word_is_committed_before_the_final():
+    out = _run(["luz", "luz", "luz eco", [("luz", 1.0), ("eco", 1.0)]], ["luz", "eco"])
+    assert out[1] == ["luz"]
+    # El final solo aporta lo que no salió de los parciales
+    assert out[3] == ["eco"]
+
+
+def test_final_resegmentation_does_not_repeat_committed_words():
+    # Los parciales tenían una palabra espuria delante; el final ya no la trae
+    out = _run(["[unk] luz", "[unk] luz", [("luz", 1.0), ("eco", 1.0)]], ["luz", "eco"])
+    assert out[1] == ["luz"]
+    assert out[2] == ["eco"]
+
+
+def test_low_confidence_words_are_dropped_from_the_final():
+    out = _run([[("luz", 0.3), ("eco", 0.9)]], ["luz", "eco"])
+    assert out == [["eco"]]
+
+
+def test_multi_word_command_waits_for_its_last_word():
+    keywords = ["cambiar a sombra"]
+    out = _run(["cambiar", "cambiar", "cambiar a", "cambiar a sombra", "cambiar a sombra"], keywords)
+    assert out == [[], [], [], [], ["cambiar a sombra"]]
+
+
+def test_demo_match_command_returns_every_command():
+    # Sin __init__: match_command solo usa VOICE_WORDS
+    match = object.__new__(DemoScene).match_command
+    assert match("luz eco") == ["luz", "eco"]
+    assert match("camino de fuego") == ["camino de fuego"]
+    assert match("cambiar a sombra y correr") == ["cambiar a sombra", "correr"]
+
+
+def test_menu_phrases_are_not_found_inside_other_words():
+    # La escena pasa WORDS_PRIORITY (con "a" y "b") más las combinaciones de volumen
+    assert set(MenuScene.WORDS_PRIORITY) <= set(MenuScene.VOICE_PHRASES)
+    menu = object.__new__(MenuScene)
+    script = (["nueva"] * 6 + ["nueva partida"] * 3 + [[("nueva", 1.0), ("partida", 1.0)]]
+              + ["cargar"] * 6 + ["cargar partida"] * 3)
+    out = _run(script, MenuScene.VOICE_PHRASES)
+    assert [menu.match_command(text) for texts in out for text in texts] == [["nueva partida"], ["cargar partida"]]
+
+
+def test_menu_prefix_waits_for_the_longer_phrase():
+    menu = object.__new__(MenuScene)
+    script = ["volumen", "volumen", "volumen", "volumen diez", "volumen diez",
+              [("volumen", 1.0), ("diez", 1.0)], "subir", "subir", "subir volumen", "subir volumen"]
+    out = _run(script, MenuScene.VOICE_PHRASES)
+    assert [menu.match_command(text) for texts in out for text in texts] == [["vol 10"], ["subir volumen"]]
+    # Sola y tras el silencio final, "volumen" sí es un comando
+    assert _run(["volumen"] * 6, MenuScene.VOICE_PHRASES)[-2:] == [["volumen"], []]
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "test_save.db"))
+    yield database
+    database.close()
+
+
+def _v1_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE save_slots (slot_id INTEGER PRIMARY KEY, progress INTEGER, "
+                 "timestamp TEXT, player_data TEXT)")
+    conn.executemany("INSERT INTO save_slots VALUES (?, ?, '2020-01-01 00:00', ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def test_sections_round_trip():
+    state = {
+        "prologue": {"scene": "demo", "phase": "ARGUMENT"},
+        "player": {"x": 10.5, "y": -3.0, "facing_x": 1, "facing_y": 0, "is_crouching": True,
+                   "char_type": "cero", "speed_mode": "correr"},
+        "ghosts": {"chunks": [3, 4, 7], "ghosts": [(3, 1.5, 2.5, 40, 1, "hola"), (4, 0.0, 0.0, 0, 0, "")] * 100},
+    }
+    encoded = database.encode_state(state)
+    # La sección grande va comprimida
+    assert encoded["ghosts"][1] & database.FLAG_ZLIB
+    rows = [(database.SECTION_NAMES[name], payload) for name, payload in encoded.items()]
+    decoded = database.decode_sections(rows)
+    assert decoded["prologue"] == state["prologue"]
+    assert decoded["player"] == state["player"]
+    assert decoded["ghosts"] == state["ghosts"]
+
+
+def test_delta_save_only_rewrites_changed_sections(db, capsys):
+    db.init_db()
+    db.save_game(1, 0, 100.0, 200.0, "cero")
+    capsys.readouterr()
+    db.save_state(1, 50, {"prologue": {"scene": "level_zero", "phase": "SETUP"},
+                          "player": {"x": 100.0, "y": 200.0, "char_type": "cero"}})
+    assert "(0 secciones)" in capsys.readouterr().out
+    db.save_state(1, 50, {"prologue": {"scene": "demo", "phase": "SETUP"}})
+    assert "(1 secciones)" in capsys.readouterr().out
+    data = db.load_game(1)
+    assert data["exists"] and data["x"] == 100.0
+    assert data["state"]["prologue"]["scene"] == "demo"
+
+
+def test_v1_rows_are_migrated(db):
+    _v1_database(db.DB_NAME, [(1, 30, "12.0,34.0,cero"), (2, 0, None)])
+    db.init_db()
+    first = db.load_game(1)
+    assert (first["x"], first["y"], first["char_type"]) == (12.0, 34.0, "cero")
+    assert first["state"]["prologue"]["scene"] == "demo"
+    # Una fila v1 sin resumen no rompe la migración
+    second = db.load_game(2)
+    assert second["exists"] and second["state"]["prologue"]["scene"] == "level_zero"
+
+
+def test_newer_save_is_not_loaded(db):
+    db.init_db()
+    db.save_game(1, 10, 1.0, 2.0, "cero")
+    payload = bytes([database.SAVE_VERSION + 1, 0]) + b"\x00"
+    with database._conn_lock:
+        conn = database.get_connection()
+        conn.execute(database.SQL_SECTION_UPSERT, (1, database.SECTION_PROLOGUE, payload))
+        conn.commit()
+    data = db.load_game(1)
+    assert not data["exists"] and data["newer"]
@@ -0,0 +1,61 @@
+import pygame
+import pytest
+
+import config
+import database
+import scenes
+from demo_level import DemoScene
+from entities import NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class _Right:
+    """Campo de flujo falso: todos hacia +x."""
+    def steer(self, xs, ys):
+        if NUMPY_AVAILABLE:
+            return np.ones(len(xs)), np.zeros(len(xs))
+        return [1.0] * len(xs), [0.0] * len(xs)
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "demo_save.db"))
+    monkeypatch.setitem(scenes.CURRENT_SESSION, "should_load", False)
+    pygame.init()
+    pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    database.init_db()
+    yield scenes.CURRENT_SESSION
+    database.close()
+
+
+def _ghosts(scene):
+    return sorted((c, round(x), round(y)) for c, x, y in scene.ghosts.rows("chunk", "x", "y"))
+
+
+def test_ghost_that_changed_chunk_is_not_duplicated_on_load(session):
+    scene = DemoScene(pygame.display.get_surface())
+    (gx, gy), spawn_chunk = scene.ghosts.position(0), int(scene.ghosts.store.chunk[0])
+    scene.ghosts.hear(gx, gy, 10)
+    scene.ghosts.hunt(_Right(), config.SCREEN_WIDTH // 2, -10000, -10000)
+    assert int(scene.ghosts.store.chunk[0]) != spawn_chunk
+    before = _ghosts(scene)
+    database.save_state(session["slot"], 100, scene.capture_state())
+
+    session["should_load"] = True
+    loaded = DemoScene(pygame.display.get_surface())
+    # El chunk de aparición estaba cargado al guardar: no vuelve a sacar el fantasma del nivel
+    assert _ghosts(loaded) == before
+
+
+def test_pursuer_leaving_the_streamed_area_is_evicted(session):
+    scene = DemoScene(pygame.display.get_surface())
+    count = len(scene.ghosts)
+    far = scene.world_width - 10, scene.world_height - 10
+    far_chunk = scene.ghosts.chunk_of(*far)
+    assert far_chunk not in scene.streamed
+    scene.ghosts.add(*far, chunk=far_chunk)
+    scene.ghosts.hear(*far, 10)
+    scene.update()
+    assert len(scene.ghosts) == count
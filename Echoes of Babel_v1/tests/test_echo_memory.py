@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+import database
+from echo_memory import EchoMemory, NUMPY_AVAILABLE
+
+
+def _values(memory):
+    values = memory.intensity(0, 0, memory.cols, memory.rows)
+    return [[int(v) for v in row] for row in values]
+
+
+def test_snapshot_keeps_raw_data_and_decays_on_load():
+    memory = EchoMemory(320, 320)
+    memory.reveal_circle(100, 100, 60, 200)
+    first = memory.snapshot()
+    for _ in range(300):
+        memory.tick()
+    second = memory.snapshot()
+    # Sin revelar nada nuevo, lo guardado no cambia con el olvido (el guardado incremental lo omite)
+    assert (first["level"], first["stamp"]) == (second["level"], second["stamp"])
+    payload = database._encode_section("memory", second)
+    _, saved = database._decode_section(database.SECTION_MEMORY, payload)
+    loaded = EchoMemory(320, 320)
+    loaded.restore(saved)
+    assert _values(loaded) == _values(memory)
+
+
+def test_v2_memory_section_is_still_readable():
+    cols = rows = 4
+    body = database._MEMORY_V2.pack(16, cols, rows) + bytes(range(0, 160, 10))
+    _, saved = database._decode_section(database.SECTION_MEMORY, bytes([2, 0]) + body)
+    memory = EchoMemory(64, 64)
+    memory.restore(saved)
+    assert [v for row in _values(memory) for v in row] == list(range(0, 160, 10))
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="la capa incremental necesita numpy")
+def test_incremental_layer_matches_full_rebuild():
+    memory = EchoMemory(2000, 1200)
+    echo = SimpleNamespace(x=500.0, y=350.0, dist=[150.0] * 180 + [400.0] * 180)
+    cam_x, cam_y = 100.0, 80.0
+    memory.reveal_circle(400, 300, 120)
+    memory.layer(cam_x, cam_y, 640, 360)
+    for i in range(20):
+        memory.tick()
+        cam_x += 7.5
+        cam_y += 3.0
+        memory.reveal_circle(400 + cam_x, 300 + cam_y, 90, 180)
+        memory.reveal_echo(echo, 10 * i, 10 * (i + 1), 230)
+        surf, pos = memory.layer(cam_x, cam_y, 640, 360)
+    incremental = pygame.surfarray.array_alpha(surf).astype(int)
+    memory._layer = None
+    full, full_pos = memory.layer(cam_x, cam_y, 640, 360)
+    assert pos == full_pos
+    assert abs(incremental - pygame.surfarray.array_alpha(full).astype(int)).max() <= 1
@@ -0,0 +1,60 @@
+import math
+import wave
+
+import pytest
+
+import keyword_spotter
+
+if not keyword_spotter.NUMPY_AVAILABLE:
+    pytest.skip("el detector ligero necesita numpy", allow_module_level=True)
+import numpy as np
+
+
+def _word(freq, seed, seconds=0.5):
+    rng = np.random.RandomState(seed)
+    t = np.arange(int(keyword_spotter.SAMPLE_RATE * seconds)) / keyword_spotter.SAMPLE_RATE
+    signal = np.sin(2 * math.pi * freq * (1 + 0.3 * t) * t) * 8000 + rng.normal(0, 300, len(t))
+    return signal.astype(np.int16)
+
+
+def _write(path, samples):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(keyword_spotter.SAMPLE_RATE)
+        w.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_dtw_tolerates_time_warping():
+    rng = np.random.RandomState(0)
+    a = rng.normal(size=(30, 13))
+    slow = np.repeat(a, [2 if i % 3 == 0 else 1 for i in range(30)], axis=0)
+    other = rng.normal(size=(30, 13))
+    assert keyword_spotter.dtw_distance(a, a) == 0.0
+    assert keyword_spotter.dtw_distance(a, slow) < keyword_spotter.dtw_distance(a, other)
+    # Más del doble de larga: no puede ser la misma palabra
+    assert keyword_spotter.dtw_distance(a, np.repeat(a, 3, axis=0)) == math.inf
+
+
+def test_single_template_uses_default_threshold(tmp_path):
+    spotter = keyword_spotter.KeywordSpotter(str(tmp_path))
+    spotter._add("luz", _word(300, 1))
+    assert spotter.thresholds["luz"] == keyword_spotter.DEFAULT_THRESHOLD
+    # Con una sola plantilla el detector no sustituye a Vosk
+    assert not spotter.covers(["luz"])
+    for seed in range(2, keyword_spotter.TEMPLATES_PER_WORD + 1):
+        spotter._add("luz", _word(300, seed))
+    assert spotter.covers(["luz"])
+    assert spotter.thresholds["luz"] != keyword_spotter.DEFAULT_THRESHOLD
+
+
+def test_templates_on_disk_are_loaded_and_classified(tmp_path):
+    assert not keyword_spotter.has_complete_words(str(tmp_path))
+    for n in range(keyword_spotter.TEMPLATES_PER_WORD):
+        _write(tmp_path / f"luz.{n}.wav", _word(300, n))
+        _write(tmp_path / f"eco.{n}.wav", _word(1500, 10 + n))
+    assert keyword_spotter.has_complete_words(str(tmp_path))
+    spotter = keyword_spotter.KeywordSpotter(str(tmp_path))
+    assert spotter.covers(["luz", "eco"])
+    word, _ = spotter.classify(_word(300, 42), ["luz", "eco"])
+    assert word == "luz"
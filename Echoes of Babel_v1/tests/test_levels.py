@@ -0,0 +1,64 @@
+import pytest
+
+import levels
+
+
+def _builder():
+    b = levels.LevelBuilder(2048, 1024, chunk_size=512, tile_size=32)
+    b.phrases = ["Silencio... ellos escuchan.", "¿dónde estás?"]
+    b.spawn = (100.0, 200.0)
+    b.add_wall(100, 100, 1100, 100, levels.MATERIAL_METAL)   # Cruza tres chunks
+    b.add_ghost(1600, 700, 1)
+    b.set_tile(17, 2, levels.TILE_SOLID)                      # Chunk (1, 0), tile (1, 2)
+    return b
+
+
+def test_level_round_trip(tmp_path):
+    path = tmp_path / "nivel.lvl"
+    _builder().save(path)
+    level = levels.open_level(str(path))
+    try:
+        assert (level.chunks_x, level.chunks_y, level.tiles_per_side) == (4, 2, 16)
+        assert level.spawn == (100.0, 200.0)
+        assert level.phrases == ["Silencio... ellos escuchan.", "¿dónde estás?"]
+        # El muro se repite con el mismo id en cada chunk que toca
+        for cx in range(3):
+            (wall,) = level.read_chunk(cx, 0).walls
+            assert wall[0] == 0 and wall[5] == levels.MATERIAL_METAL
+        assert level.read_chunk(3, 1).ghosts == [(1600.0, 700.0, 1)]
+        tiles = level.read_chunk(1, 0).tiles
+        assert tiles[2 * 16 + 1] == levels.TILE_SOLID and sum(tiles) == levels.TILE_SOLID
+        assert level.read_chunk(0, 0).tiles == b""
+        # Los chunks vacíos no ocupan espacio en el archivo
+        assert level.table[level.chunk_id(0, 1)] == (0, 0)
+        assert level.read_chunk(0, 1).walls == []
+    finally:
+        level.close()
+
+
+def test_rejects_foreign_and_newer_files():
+    data = _builder().to_bytes()
+    with pytest.raises(ValueError):
+        levels.LevelFile(b"NOPE" + data[4:])
+    newer = levels.HEADER.unpack_from(data)
+    head = levels.HEADER.pack(newer[0], levels.VERSION + 1, *newer[2:])
+    with pytest.raises(ValueError):
+        levels.LevelFile(head + data[levels.HEADER.size:])
+
+
+def test_missing_path_opens_the_demo_level(tmp_path):
+    level = levels.open_level(str(tmp_path / "no_existe.lvl"))
+    assert level.phrases == levels.DEFAULT_LORE
+    assert level.world_width == levels.config.WORLD_WIDTH
+
+
+def test_streamer_loads_around_the_camera_with_hysteresis():
+    streamer = levels.ChunkStreamer(levels.LevelFile(_builder().to_bytes()), margin=0, synchronous=True)
+    loaded, evicted = streamer.update(0, 0, 400, 400)
+    assert {c.key for c in loaded} == {(0, 0)} and not evicted
+    # Un chunk más allá se carga; el anterior sigue dentro del anillo extra
+    loaded, evicted = streamer.update(600, 0, 400, 400)
+    assert {c.key for c in loaded} == {(1, 0)} and not evicted
+    loaded, evicted = streamer.update(1600, 0, 400, 400)
+    assert {c.key for c in loaded} == {(3, 0)}
+    assert {c.key for c in evicted} == {(0, 0), (1, 0)}
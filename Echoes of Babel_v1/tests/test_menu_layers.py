@@ -0,0 +1,32 @@
+import pygame
+import pytest
+
+import config
+import database
+import scenes
+
+
+@pytest.fixture
+def menu(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "menu_save.db"))
+    pygame.init()
+    pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    database.init_db()
+    yield scenes.MenuScene(pygame.display.get_surface())
+    database.close()
+
+
+@pytest.mark.skipif(not scenes.NUMPY_AVAILABLE, reason="la capa exacta necesita numpy")
+@pytest.mark.parametrize("state", ["options", "settings_main", "slot_selection_load"])
+def test_static_layer_matches_direct_drawing(menu, state):
+    import numpy as np
+    menu.menu_state = state
+    background = pygame.Surface((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    background.fill((40, 90, 160))
+    direct = menu._draw_static_on(background.copy(), None)
+    layered = background.copy()
+    surf, pos, flags = menu._static_layer()
+    layered.blit(surf, pos, special_flags=flags)
+    diff = np.abs(pygame.surfarray.array3d(direct).astype(np.int16) - pygame.surfarray.array3d(layered))
+    # Los bordes del texto con sombra no se oscurecen al pasar por la capa cacheada
+    assert diff.max() <= 2
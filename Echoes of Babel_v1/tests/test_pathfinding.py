@@ -0,0 +1,55 @@
+from pathfinding import FlowField, NUMPY_AVAILABLE
+from entities import GhostSystem
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def _dist(flow, c, r):
+    c0, r0 = flow.origin
+    if NUMPY_AVAILABLE:
+        return int(flow.dist[r - r0, c - c0])
+    return flow.dist[(r - r0) * flow.size[0] + c - c0]
+
+
+def test_bfs_goes_around_solid_cells():
+    # Rejilla de 10x10 celdas con una pared vertical en la columna 5 (abierta en la fila 9)
+    flow = FlowField(320, 320, cell=32)
+    flow.set_obstacles([], [(5, r) for r in range(9)])
+    assert flow.update(16, 16)           # Jugador en la celda (0, 0)
+    assert not flow.update(20, 20)       # Misma celda: no se recalcula
+    assert _dist(flow, 0, 0) == 0
+    assert _dist(flow, 4, 0) == 4
+    assert _dist(flow, 5, 0) == -1       # Pared
+    # Al otro lado hay que bajar hasta la fila 9, cruzar y volver a subir
+    assert _dist(flow, 6, 0) == 9 + 6 + 9
+
+
+def test_steer_points_down_the_gradient():
+    flow = FlowField(320, 320, cell=32)
+    flow.set_obstacles([], [])
+    flow.update(16, 16)
+    xs, ys = [5 * 32 + 16.0], [16.0]
+    if NUMPY_AVAILABLE:
+        xs, ys = np.array(xs), np.array(ys)
+    dx, dy = flow.steer(xs, ys)
+    assert (float(dx[0]), float(dy[0])) == (-1.0, 0.0)
+
+
+class _Right:
+    def steer(self, xs, ys):
+        if NUMPY_AVAILABLE:
+            return np.ones(len(xs)), np.zeros(len(xs))
+        return [1.0] * len(xs), [0.0] * len(xs)
+
+
+def test_pursuers_change_chunk_as_they_move():
+    ghosts = GhostSystem(["a"], 1024, 512, chunk_grid=(512, 2, 1))
+    ghosts.add(500, 100, chunk=0)
+    ghosts.add(100, 100, chunk=0)
+    ghosts.hear(500, 100, 50)            # Solo el primero persigue
+    for _ in range(10):
+        ghosts.hunt(_Right(), 3, -1000, -1000)
+    assert list(ghosts.store.chunk) == [1, 0]
+    ghosts.remove_chunks({0})            # Se descarga el chunk de aparición
+    assert len(ghosts) == 1 and ghosts.position(0)[0] == 530
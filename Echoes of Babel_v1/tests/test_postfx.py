@@ -0,0 +1,38 @@
+import random
+
+import pygame
+
+import postfx
+
+
+def _noise(size):
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill((40, 40, 40, 40))
+    return surf
+
+
+def test_full_fade_reaches_black_over_grain_and_scanlines():
+    screen = pygame.Surface((64, 32))
+    screen.fill((200, 120, 60))
+    fx = postfx.PostFX()
+    fx.noise_frames = [_noise((164, 132))]
+    fx.grain, fx.scanlines, fx.fade = 2, 0.15, 255
+    postfx.apply(screen, fx, random.Random(1))
+    assert pygame.transform.average_color(screen)[:3] == (0, 0, 0)
+    assert fx.fade == 0  # Vale para un solo frame
+
+
+def test_glitch_band_stays_inside_the_text_rect():
+    screen = pygame.Surface((120, 40))
+    screen.fill((10, 10, 10))
+    for x in range(0, 120, 4):
+        screen.fill((250, 30, 200), (x, 0, 2, 40))
+    before = screen.copy()
+    fx = postfx.PostFX()
+    fx.add_band(pygame.Rect(40, 10, 20, 10), rgb_offset=3, shift=2)
+    postfx.apply(screen, fx, random.Random(1))
+    # Recuadro del texto más el margen de desplazamiento y separación (2 + 3 px por lado)
+    band = pygame.Rect(40, 10, 20, 10).inflate(10, 0)
+    changed = [(x, y) for x in range(120) for y in range(40) if screen.get_at((x, y)) != before.get_at((x, y))]
+    assert changed
+    assert all(band.collidepoint(p) for p in changed)
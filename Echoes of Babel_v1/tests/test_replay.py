@@ -0,0 +1,69 @@
+import pygame
+import pytest
+
+import replay
+
+
+@pytest.fixture(autouse=True)
+def live_session():
+    yield
+    replay.seed_scenes(None)
+    replay.active = None
+
+
+def _draws(rng, n=5):
+    return [rng.random() for _ in range(n)]
+
+
+def test_scene_rngs_repeat_with_the_same_seed():
+    replay.seed_scenes(1234)
+    first = [_draws(r) for r in replay.scene_rngs("demo") + replay.scene_rngs("demo")]
+    replay.seed_scenes(1234)
+    second = [_draws(r) for r in replay.scene_rngs("demo") + replay.scene_rngs("demo")]
+    assert first == second
+    # Simulación y efectos son secuencias distintas, y la segunda escena no repite la primera
+    assert first[0] != first[1] and first[0] != first[2]
+
+
+def test_fx_draws_do_not_shift_the_simulation():
+    replay.seed_scenes(7)
+    sim, fx = replay.scene_rngs("level_zero")
+    _draws(fx, 100)  # Más frames dibujados en una máquina rápida
+    replay.seed_scenes(7)
+    same_sim, _ = replay.scene_rngs("level_zero")
+    assert _draws(sim) == _draws(same_sim)
+
+
+def test_recording_replays_frame_by_frame(tmp_path):
+    path = str(tmp_path / "partida.ebr")
+    rec = replay.InputRecorder(path, seed=99)
+    rec.commands(["luz"])
+    rec.level(-40.4)
+    rec.step()
+    rec.events([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, mod=0),
+                pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0))])
+    rec.level(-40.0)   # Igual que el anterior: no se graba
+    rec.step()
+    rec.commands(["cambiar a sombra", "eco"])
+    rec.level(-12.6)
+    rec.close()
+
+    player = replay.InputReplayer(path)
+    assert player.seed == 99
+    assert player.commands([]) == ["luz"] and player.level(0) == -40
+    player.step()
+    (event,) = player.events([])
+    assert (event.type, event.key) == (pygame.KEYDOWN, pygame.K_a)
+    assert player.commands(["ruido en vivo"]) == [] and player.level(0) == -40
+    player.step()
+    assert player.commands([]) == ["cambiar a sombra", "eco"] and player.level(0) == -13
+    assert not player.finished()
+    player.step()
+    assert player.finished()
+
+
+def test_rejects_foreign_recordings(tmp_path):
+    path = tmp_path / "otra.ebr"
+    path.write_bytes(replay.HEADER.pack(b"NOPE", replay.VERSION, 0))
+    with pytest.raises(ValueError):
+        replay.InputReplayer(str(path))
@@ -0,0 +1,53 @@
+import math
+import random
+
+from spatial_hash import SpatialHash
+from entities import GhostSystem
+
+
+def _points(n=300, seed=1):
+    rng = random.Random(seed)
+    return {i: (rng.uniform(0, 3000), rng.uniform(0, 3000)) for i in range(n)}
+
+
+def test_radius_and_rect_match_brute_force():
+    points = _points()
+    index = SpatialHash(3000, 3000, cell_size=256)
+    for key, (x, y) in points.items():
+        index.insert(key, x, y)
+    for x, y, r in [(1500, 1500, 250), (0, 0, 700), (2990, 10, 1200)]:
+        expected = {k for k, (px, py) in points.items() if (px - x) ** 2 + (py - y) ** 2 <= r * r}
+        assert set(index.query_radius(x, y, r)) == expected
+    expected = {k for k, (px, py) in points.items() if 400 <= px <= 1400 and 800 <= py <= 1300}
+    assert set(index.query_rect(400, 800, 1000, 500)) == expected
+
+
+def test_move_remove_and_nearest():
+    points = _points(50)
+    index = SpatialHash(3000, 3000)
+    for key, (x, y) in points.items():
+        index.insert(key, x, y)
+    index.move(0, 10, 10)
+    index.remove(1)
+    assert 1 not in index and len(index) == 49
+    assert 0 in index.query_radius(0, 0, 20)
+    points[0] = (10, 10)
+    del points[1]
+    key, dist = index.nearest(1234, 567)
+    best = min(points, key=lambda k: math.hypot(points[k][0] - 1234, points[k][1] - 567))
+    assert key == best
+    assert dist == math.hypot(points[best][0] - 1234, points[best][1] - 567)
+
+
+def test_ghost_queries_follow_row_compaction():
+    ghosts = GhostSystem(["a", "b"], 3000, 3000)
+    points = _points(120, seed=2)
+    for key, (x, y) in points.items():
+        ghosts.add(x, y, chunk=key % 4)
+    ghosts.remove_chunks({1, 3})
+    xs, ys = list(ghosts.store.x), list(ghosts.store.y)
+    expected = [i for i in range(len(xs)) if (xs[i] - 1500) ** 2 + (ys[i] - 1500) ** 2 <= 600 ** 2]
+    assert ghosts.near(1500, 1500, 600) == expected
+    row, dist = ghosts.nearest(100, 100)
+    assert dist == min(math.hypot(x - 100, y - 100) for x, y in zip(xs, ys))
+    assert ghosts.position(row)[0] == xs[row]
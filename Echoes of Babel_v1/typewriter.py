@@ -0,0 +1,78 @@
+# typewriter.py
+# Texto que aparece letra a letra. Las líneas terminadas se rasterizan una sola vez en una
+# capa persistente; la línea activa solo se vuelve a rasterizar cuando gana un carácter.
+# step() es lógica pura (se llama en update); el dibujo se pone al día en draw().
+import pygame
+
+
+class Typewriter:
+    """Bloque de líneas [(texto, color)] o [(texto, color, temblor_px)] escrito carácter a carácter.
+
+    Las líneas con temblor se guardan aparte para poder dibujarlas con desplazamiento.
+    """
+    def __init__(self, font, lines, line_height=None):
+        self.font = font
+        self.lines = [(line[0], line[1], line[2] if len(line) > 2 else 0) for line in lines]
+        self.line_height = line_height or font.get_linesize()
+        self.line_idx = 0
+        self.char_idx = 0
+        # Lo ya rasterizado (línea, caracteres); va por detrás de line_idx/char_idx hasta draw()
+        self.drawn_line = 0
+        self.drawn_chars = 0
+        width = max([font.size(text)[0] for text, _, _ in self.lines] + [1])
+        self.layer = pygame.Surface((width, max(1, self.line_height * len(self.lines))), pygame.SRCALPHA)
+        self.layer.fill((0, 0, 0, 0))
+        self.line_surfs = {}  # Línea activa y líneas con temblor
+
+    @property
+    def done(self):
+        return self.line_idx >= len(self.lines)
+
+    def step(self):
+        """Avanza un carácter. Devuelve el carácter escrito, o None si el paso cierra una línea."""
+        if self.done:
+            return None
+        text = self.lines[self.line_idx][0]
+        if self.char_idx < len(text):
+            self.char_idx += 1
+            return text[self.char_idx - 1]
+        self.line_idx += 1
+        self.char_idx = 0
+        return None
+
+    def finish(self):
+        """Muestra todo el texto de golpe."""
+        self.line_idx = len(self.lines)
+        self.char_idx = 0
+
+    def visible_text(self, i):
+        if i < self.line_idx:
+            return self.lines[i][0]
+        return self.lines[i][0][:self.char_idx] if i == self.line_idx else ""
+
+    def _catch_up(self):
+        # Solo se rasteriza lo que cambió desde el último draw()
+        while self.drawn_line < len(self.lines):
+            text, color, jitter = self.lines[self.drawn_line]
+            finished = self.drawn_line < self.line_idx
+            shown = len(text) if finished else self.char_idx
+            if shown != self.drawn_chars:
+                self.line_surfs[self.drawn_line] = self.font.render(text[:shown], True, color)
+                self.drawn_chars = shown
+            if not finished:
+                return
+            # Línea terminada: sin temblor pasa a la capa fija y su superficie se libera
+            if not jitter and self.drawn_line in self.line_surfs:
+                self.layer.blit(self.line_surfs.pop(self.drawn_line), (0, self.drawn_line * self.line_height),
+                                special_flags=pygame.BLEND_RGBA_MAX)
+            self.drawn_line += 1
+            self.drawn_chars = 0
+
+    def draw(self, surface, x, y, rng=None):
+        """Dibuja el bloque en (x, y); `rng` mueve las líneas con temblor (azar de efectos)."""
+        self._catch_up()
+        surface.blit(self.layer, (x, y))
+        for i, surf in self.line_surfs.items():
+            jitter = self.lines[i][2]
+            dx = rng.randint(-jitter, jitter) if jitter and rng is not None else 0
+            surface.blit(surf, (x + dx, y + i * self.line_height))
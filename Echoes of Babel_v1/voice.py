@@ -0,0 +1,501 @@
+# voice.py
+# Reconocimiento de voz compartido por todas las escenas.
+# Modo hilo: cada escena abre el micrófono y decodifica en un hilo propio (comportamiento original).
+# Modo proceso (config.VOICE_PROCESS): el micrófono escribe en un ring buffer de memoria compartida
+# y Vosk decodifica en un proceso aparte; solo vuelven textos y niveles por una tubería.
+# Las gramáticas de muy pocas palabras (o todas si no hay Vosk) usan el detector ligero de
+# keyword_spotter cuando ya están todas las plantillas de sus palabras.
+# En ambos modos los comandos salen de command_decoder: se confirman al estabilizarse, sin Reset().
+import math
+import importlib.util
+import array
+import struct
+import sys
+import threading
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+import config
+import keyword_spotter
+from command_decoder import StreamingDecoder, command_predicate
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# pyaudio y vosk son pesados (vosk carga su biblioteca nativa): solo se comprueba que existen
+# y se importan la primera vez que hacen falta, para que la ventana aparezca antes
+CAPTURE_AVAILABLE = importlib.util.find_spec("pyaudio") is not None
+VOSK_AVAILABLE = importlib.util.find_spec("vosk") is not None
+# Hay voz si se puede capturar y decodificar con Vosk, o con el detector ligero (NumPy) si ya hay
+# plantillas completas: sin Vosk no hay quien reconozca las palabras para grabarlas
+AUDIO_AVAILABLE = CAPTURE_AVAILABLE and (VOSK_AVAILABLE or (
+    keyword_spotter.NUMPY_AVAILABLE and keyword_spotter.has_complete_words()))
+pyaudio = None
+Model = None
+KaldiRecognizer = None
+_import_lock = threading.Lock()
+
+
+def import_capture():
+    """Importa pyaudio bajo demanda; False si no se puede cargar."""
+    global pyaudio
+    with _import_lock:
+        if pyaudio is None:
+            try:
+                import pyaudio as pyaudio_module
+            except (ImportError, OSError) as e:
+                print(f"[VOZ] Audio no disponible: {e}")
+                return False
+            pyaudio = pyaudio_module
+        return True
+
+
+def import_audio():
+    """Importa pyaudio y vosk bajo demanda; False si no se pueden cargar."""
+    global Model, KaldiRecognizer
+    if not import_capture():
+        return False
+    with _import_lock:
+        if Model is None:
+            try:
+                from vosk import Model as vosk_model, KaldiRecognizer as vosk_recognizer
+            except (ImportError, OSError) as e:
+                print(f"[VOZ] Vosk no disponible: {e}")
+                return False
+            Model, KaldiRecognizer = vosk_model, vosk_recognizer
+        return True
+
+
+SAMPLE_RATE = 16000
+RING_SECONDS = 4           # Audio que cabe en el ring antes de sobrescribirse
+ENROLL_SECONDS = 2.5       # Audio reciente del que se saca la plantilla de una palabra reconocida
+SPOTTER_FRAMES = 1600      # Bloque de lectura del detector ligero (100 ms)
+CAPTURE_FRAMES = 512       # Tamaño del bloque del callback de captura
+MAX_RESTARTS = 3           # Reinicios del proceso reconocedor antes de rendirse
+
+
+def rms_db(data):
+    """Nivel en dB (misma escala que el medidor del menú, -60 = silencio) de un bloque PCM16."""
+    count = len(data) // 2
+    if count == 0:
+        return -60.0
+    if NUMPY_AVAILABLE:
+        samples = np.frombuffer(data, dtype="<i2", count=count).astype(np.float64)
+        rms = math.sqrt(float(np.dot(samples, samples)) / count)
+    else:
+        samples = array.array("h", data[:count * 2])
+        if sys.byteorder != "little":
+            samples.byteswap()
+        rms = math.sqrt(sum(s * s for s in samples) / count)
+    return (20 * math.log10(rms) - 90) if rms > 0 else -60.0
+
+
+# --- MODELO COMPARTIDO (MODO HILO) ---
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model():
+    """Carga el modelo Vosk una sola vez; todas las escenas crean sus reconocedores sobre él."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            if not import_audio():
+                raise RuntimeError("vosk no disponible")
+            _model = Model(config.VOICE_MODEL_PATH)
+        return _model
+
+
+def prewarm():
+    """Deja listo el reconocedor antes de la primera escena que escucha (se llama desde un hilo)."""
+    if not AUDIO_AVAILABLE:
+        return
+    keyword_spotter.get_spotter()  # Plantillas del detector ligero
+    if not VOSK_AVAILABLE:
+        return
+    if config.VOICE_PROCESS:
+        service = get_service()
+        service.model_ready.wait(30)
+    else:
+        load_model()
+
+
+# --- RING BUFFER EN MEMORIA COMPARTIDA ---
+class AudioRing:
+    """Ring buffer de un productor y un consumidor: [u64 bytes escritos en total][datos]."""
+    HEADER = 8
+
+    def __init__(self, capacity, name=None):
+        self.capacity = capacity
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + capacity)
+            struct.pack_into("<Q", self.shm.buf, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def total(self):
+        return struct.unpack_from("<Q", self.shm.buf, 0)[0]
+
+    def write(self, data):
+        # Primero los datos y después el contador: el lector nunca ve bytes sin escribir
+        buf = self.shm.buf
+        total = self.total()
+        n = min(len(data), self.capacity)
+        data = data[-n:]
+        pos = total % self.capacity
+        first = min(n, self.capacity - pos)
+        start = self.HEADER + pos
+        buf[start:start + first] = data[:first]
+        if first < n:
+            buf[self.HEADER:self.HEADER + n - first] = data[first:]
+        struct.pack_into("<Q", buf, 0, total + len(data))
+
+    def read(self, start, n):
+        """Copia n bytes desde la posición absoluta `start` (el llamador comprueba que siguen en el ring)."""
+        buf = self.shm.buf
+        pos = start % self.capacity
+        first = min(n, self.capacity - pos)
+        out = bytes(buf[self.HEADER + pos:self.HEADER + pos + first])
+        if first < n:
+            out += bytes(buf[self.HEADER:self.HEADER + n - first])
+        return out
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _recognizer_worker(conn, ring_name, capacity, model_path, rate):
+    """Bucle del proceso reconocedor: lee audio del ring, decodifica y devuelve textos por `conn`."""
+    try:
+        from vosk import Model as VoskModel, KaldiRecognizer as VoskRecognizer
+        model = VoskModel(model_path)
+    except Exception as e:
+        conn.send(("error", 0, str(e)))
+        return
+    conn.send(("loaded", 0))
+    ring = AudioRing(capacity, name=ring_name)
+    decoder = None
+    seq = 0
+    chunk = 4096 * 2
+    read_pos = ring.total()
+    try:
+        while True:
+            while conn.poll():
+                msg = conn.recv()
+                if msg[0] == "grammar":
+                    _, seq, grammar, keywords, frames = msg
+                    decoder = StreamingDecoder(VoskRecognizer(model, rate, grammar), command_predicate(keywords),
+                                               frames / rate, model_path)
+                    chunk = frames * 2
+                    read_pos = ring.total()  # El audio anterior pertenecía a otra escena
+                    conn.send(("ready", seq))
+                elif msg[0] == "pause":
+                    decoder = None
+                elif msg[0] == "stop":
+                    return
+            if decoder is None:
+                conn.poll(0.05)
+                continue
+            total = ring.total()
+            if total - read_pos > capacity:
+                read_pos = total - chunk  # Nos sobrescribieron: saltar a lo más reciente
+            if total - read_pos < chunk:
+                conn.poll(0.01)
+                continue
+            data = ring.read(read_pos, chunk)
+            read_pos += chunk
+            conn.send(("level", seq, rms_db(data)))
+            for text in decoder.accept(data):
+                conn.send(("partial", seq, text))
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class RecognizerProcess:
+    """Captura en el proceso del juego (callback de PortAudio) y decodificación en un proceso hijo."""
+    def __init__(self):
+        self.ctx = multiprocessing.get_context("spawn")  # fork no es seguro con SDL y sus hilos
+        self.capacity = SAMPLE_RATE * 2 * RING_SECONDS
+        self.ring = AudioRing(self.capacity)
+        self.lock = threading.Lock()
+        self.listener = None
+        self.seq = 0
+        self.grammar_msg = None
+        self.conn = None
+        self.process = None
+        self.restarts = 0
+        self.failed = False
+        self.stopping = False
+        self.model_ready = threading.Event()
+        self.pa = None
+        self.stream = None
+        if not import_audio():
+            raise RuntimeError("pyaudio no disponible")
+        self._spawn()
+        self._open_stream()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _spawn(self):
+        parent, child = self.ctx.Pipe()
+        self.process = self.ctx.Process(target=_recognizer_worker, daemon=True,
+                                        args=(child, self.ring.name, self.capacity, config.VOICE_MODEL_PATH, SAMPLE_RATE))
+        self.process.start()
+        child.close()
+        self.conn = parent
+        if self.grammar_msg is not None:
+            self._send(self.grammar_msg)
+
+    def _open_stream(self):
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                                   frames_per_buffer=CAPTURE_FRAMES, stream_callback=self._on_audio)
+        self.stream.start_stream()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        # Hilo de PortAudio: solo copiar al ring, nada de decodificar aquí
+        self.ring.write(in_data)
+        return (None, pyaudio.paContinue)
+
+    def _send(self, msg):
+        with self.lock:
+            try:
+                self.conn.send(msg)
+            except (OSError, BrokenPipeError):
+                pass  # El bombeo detecta la caída y reinicia
+
+    def attach(self, listener):
+        """La escena `listener` pasa a recibir el reconocimiento con su gramática."""
+        with self.lock:
+            self.seq += 1
+            self.listener = listener
+            self.grammar_msg = ("grammar", self.seq, listener.grammar, listener.keywords, listener.frames_per_buffer)
+        self._send(self.grammar_msg)
+
+    def detach(self, listener):
+        with self.lock:
+            if self.listener is not listener:
+                return
+            self.listener = None
+            self.grammar_msg = None
+        self._send(("pause",))
+
+    def _pump(self):
+        while not self.stopping:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                if self.stopping or not self._restart():
+                    return
+                continue
+            if msg[0] == "error":
+                print(f"[VOZ] Reconocedor no disponible: {msg[2]}")
+                self.failed = True
+                self.model_ready.set()
+                return
+            if msg[0] == "loaded":
+                self.model_ready.set()
+                continue
+            listener = self.listener
+            if listener is None or msg[1] != self.seq:
+                continue  # Mensaje de una gramática anterior
+            if not listener.owner.audio_running:
+                self.detach(listener)
+                continue
+            if msg[0] == "partial":
+                cmds = listener.handle_partial(msg[2])
+                if cmds and listener.enroll_words:
+                    total = self.ring.total()
+                    n = min(total, self.capacity, int(ENROLL_SECONDS * SAMPLE_RATE) * 2)
+                    listener.enroll(cmds, self.ring.read(total - n, n))
+            elif msg[0] == "level":
+                if listener.on_level:
+                    listener.on_level(msg[2])
+            elif msg[0] == "ready":
+                if listener.on_status:
+                    listener.on_status("Listo")
+
+    def _restart(self):
+        self.restarts += 1
+        if self.restarts > MAX_RESTARTS:
+            print("[VOZ] El reconocedor se cayó demasiadas veces; voz desactivada.")
+            self.failed = True
+            return False
+        print(f"[VOZ] Reconocedor caído, reiniciando ({self.restarts}/{MAX_RESTARTS})...")
+        time.sleep(0.5)
+        self._spawn()
+        return True
+
+    def shutdown(self):
+        self.stopping = True
+        self._send(("stop",))
+        if self.stream is not None:
+            try: self.stream.stop_stream(); self.stream.close()
+            except Exception: pass
+        if self.pa is not None:
+            try: self.pa.terminate()
+            except Exception: pass
+        if self.process is not None:
+            self.process.join(timeout=1.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.ring.close()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Proceso reconocedor compartido (se arranca con la primera escena que escucha)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RecognizerProcess()
+        return _service
+
+
+def shutdown():
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.shutdown()
+            _service = None
+
+
+class VoiceListener:
+    """Escucha con la gramática de una escena y traduce los parciales a comandos en su command_queue.
+
+    matcher(texto) -> lista de comandos; solo recibe textos ya confirmados por el StreamingDecoder.
+    keywords: frases que forman comando, por palabras completas; el StreamingDecoder las usa
+    para decidir cuándo confirmar un texto (None = cualquier texto), sin llamar al matcher.
+    Con gramáticas de hasta config.KWS_MAX_WORDS palabras se usa el detector ligero si ya tiene
+    todas sus plantillas; si no, Vosk las reconoce y de paso las graba (enroll_words).
+    """
+    def __init__(self, owner, grammar, matcher, keywords=None, frames_per_buffer=1024, on_level=None, on_status=None):
+        self.owner = owner
+        self.grammar = grammar
+        self.matcher = matcher
+        self.keywords = list(keywords) if keywords is not None else None
+        self.frames_per_buffer = frames_per_buffer
+        self.on_level = on_level
+        self.on_status = on_status
+        self.words = keyword_spotter.grammar_words(grammar)
+        self.spotter = keyword_spotter.get_spotter() if CAPTURE_AVAILABLE else None
+        small = len(self.words) <= config.KWS_MAX_WORDS
+        self.enroll_words = set(self.words) if self.spotter is not None and small else set()
+
+    def start(self):
+        spotter = self.spotter
+        if spotter is not None and spotter.covers(self.words) and (self.enroll_words or not VOSK_AVAILABLE):
+            threading.Thread(target=self._run_spotter, daemon=True).start()
+            return
+        if not VOSK_AVAILABLE:
+            print(f"[VOZ] Sin Vosk ni plantillas para {self.words}: voz desactivada en esta escena.")
+            return
+        if config.VOICE_PROCESS:
+            try:
+                service = get_service()
+                if not service.failed:
+                    service.attach(self)
+                    return
+            except Exception as e:
+                print(f"[VOZ] Sin proceso reconocedor ({e}), usando hilo.")
+        threading.Thread(target=self._run_thread, daemon=True).start()
+
+    def handle_partial(self, partial):
+        """Encola los comandos del parcial y los devuelve."""
+        cmds = self.matcher(partial)
+        for cmd in cmds:
+            self.owner.command_queue.put(cmd)
+        return cmds
+
+    def enroll(self, cmds, data):
+        """Graba como plantilla el audio reciente `data` (PCM16) de la palabra reconocida.
+        Solo si el texto dio un único comando: si no, el audio reciente tiene varias palabras."""
+        if len(cmds) != 1:
+            return
+        word = cmds[0]
+        if word in self.enroll_words and self.spotter.enroll(word, np.frombuffer(data, dtype="<i2")):
+            print(f"[VOZ] Plantilla de '{word}' grabada ({self.spotter.count(word)}/{keyword_spotter.TEMPLATES_PER_WORD}).")
+
+    def _run_spotter(self):
+        """Bucle del detector ligero: locuciones por energía, clasificadas por DTW."""
+        if not import_capture():
+            return
+        while self.owner.audio_running:
+            stream = None
+            p = None
+            try:
+                segmenter = keyword_spotter.Segmenter(SAMPLE_RATE)
+                p = pyaudio.PyAudio()
+                stream = p.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                                frames_per_buffer=SPOTTER_FRAMES)
+                stream.start_stream()
+                if self.on_status:
+                    self.on_status("Listo")
+                while self.owner.audio_running:
+                    data = stream.read(SPOTTER_FRAMES, exception_on_overflow=False)
+                    if self.on_level:
+                        self.on_level(rms_db(data))
+                    for utterance in segmenter.feed(data):
+                        word, _ = self.spotter.classify(utterance, self.words)
+                        if word is not None:
+                            self.handle_partial(word)
+            except Exception:
+                time.sleep(0.5)
+            finally:
+                if stream:
+                    try: stream.stop_stream(); stream.close()
+                    except Exception: pass
+                if p:
+                    try: p.terminate()
+                    except Exception: pass
+
+    def _run_thread(self):
+        if not import_audio():
+            return
+        while self.owner.audio_running:
+            stream = None
+            p = None
+            try:
+                decoder = StreamingDecoder(KaldiRecognizer(load_model(), SAMPLE_RATE, self.grammar),
+                                           command_predicate(self.keywords), self.frames_per_buffer / SAMPLE_RATE)
+                p = pyaudio.PyAudio()
+                stream = p.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                                frames_per_buffer=self.frames_per_buffer)
+                stream.start_stream()
+                if self.on_status:
+                    self.on_status("Listo")
+                history = deque(maxlen=int(ENROLL_SECONDS * SAMPLE_RATE / self.frames_per_buffer) + 1)
+                while self.owner.audio_running:
+                    data = stream.read(self.frames_per_buffer, exception_on_overflow=False)
+                    history.append(data)
+                    if self.on_level:
+                        self.on_level(rms_db(data))
+                    for text in decoder.accept(data):
+                        cmds = self.handle_partial(text)
+                        if cmds and self.enroll_words:
+                            self.enroll(cmds, b"".join(history))
+                            history.clear()
+            except Exception:
+                time.sleep(0.5)
+            finally:
+                if stream:
+                    try: stream.stop_stream(); stream.close()
+                    except Exception: pass
+                if p:
+                    try: p.terminate()
+                    except Exception: pass
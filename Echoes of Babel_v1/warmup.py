@@ -0,0 +1,105 @@
+# warmup.py
+# Precarga en segundo plano mientras se escribe el texto del arranque: modelo de voz,
+# módulos de escena, capas de pantalla, sonidos, nivel y música. El progreso es real
+# y lo muestra la barra de carga del menú.
+import importlib
+import threading
+import pygame
+import config
+
+_tasks = []          # (etiqueta, función, peso)
+_done_weight = 0
+_total_weight = 0
+_status = ""
+_thread = None
+_finished = threading.Event()
+_lock = threading.Lock()
+
+
+def _import_scenes():
+    from scene_loader import SCENE_REGISTRY
+    for target in SCENE_REGISTRY.values():
+        importlib.import_module(target.split(":")[0])
+
+
+def _prepare_atmosphere():
+    import scenes
+    size = (config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
+    scenes.overlay_cache.get_vignette(size)
+    scenes.overlay_cache.get_noise_frames(size)
+
+
+def _prepare_level():
+    import levels
+    levels.prepare_level(config.LEVEL_FILE)
+    if pygame.mixer.get_init():
+        from demo_level import DemoScene
+        DemoScene.prepare_sounds(render_all=True)
+
+
+def _prepare_music():
+    import music
+    music.engine.load()
+
+
+def _prepare_voice():
+    import voice
+    voice.prewarm()
+
+
+DEFAULT_TASKS = [
+    ("CARGANDO MODELO DE VOZ...", _prepare_voice, 4),
+    ("COMPILANDO ESCENAS...", _import_scenes, 2),
+    ("SINTETIZANDO ATMOSFERA...", _prepare_atmosphere, 2),
+    ("GENERANDO NIVEL...", _prepare_level, 1),
+    ("DECODIFICANDO MUSICA...", _prepare_music, 2),
+]
+
+
+def start(tasks=None):
+    """Lanza la precarga una sola vez por proceso (las siguientes llamadas no hacen nada)."""
+    global _thread, _total_weight
+    with _lock:
+        if _thread is not None:
+            return
+        _tasks.extend(tasks if tasks is not None else DEFAULT_TASKS)
+        _total_weight = sum(weight for _, _, weight in _tasks)
+        _thread = threading.Thread(target=_run, daemon=True)
+        _thread.start()
+
+
+def _run():
+    global _done_weight, _status
+    for label, fn, weight in _tasks:
+        _status = label
+        try:
+            fn()
+        except Exception as e:
+            print(f"[SISTEMA] Precarga '{label}' fallida: {e}")
+        with _lock:
+            _done_weight += weight
+    _status = ""
+    _finished.set()
+
+
+def progress():
+    """Fracción completada (0..1); 1 si la precarga nunca se lanzó."""
+    with _lock:
+        if _thread is None or not _total_weight:
+            return 1.0
+        return _done_weight / _total_weight
+
+
+def status():
+    """Tarea en curso ("" si no hay ninguna)."""
+    return _status
+
+
+def done():
+    return _thread is None or _finished.is_set()
+
+
+def wait(timeout=None):
+    """Bloquea hasta que termine la precarga (o venza `timeout`)."""
+    if _thread is not None:
+        _finished.wait(timeout)